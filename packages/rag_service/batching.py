@@ -0,0 +1,126 @@
+"""
+Dynamic micro-batching for /retrieve
+
+Concurrent /retrieve calls each encode a single sentence, wasting the
+batching the transformer and faiss.Index.search are built for. The
+QueryBatcher coalesces queries that arrive within a short window (or until
+a batch fills up), runs one batched encode + search for all of them, and
+hands every caller its own row sliced to its own k. Queries are only
+batched with others that use the same search options (e.g. nprobe).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+SearchFn = Callable[..., Awaitable[Tuple[np.ndarray, np.ndarray]]]
+
+
+class QueryBatcher:
+    """Coalesces concurrent single-query searches into batched searches"""
+
+    def __init__(self, search_fn: SearchFn, window_ms: float = 3.0, max_batch: int = 32):
+        """
+        Initialize the batcher
+
+        Args:
+            search_fn: Async callable (queries, k, **options) -> (distances, indices)
+            window_ms: How long the first query of a batch waits for company
+                       (0 disables batching)
+            max_batch: Flush as soon as this many queries are pending
+        """
+        self.search_fn = search_fn
+        self.window_ms = window_ms
+        self.max_batch = max(1, max_batch)
+        self._pending: Dict[Hashable, List[Tuple[str, int, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        # The loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.queries = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0 and self.max_batch > 1
+
+    async def search(self, query: str, k: int, **options: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for a single query, sharing the encode/search with concurrent callers
+
+        Args:
+            query: Query text
+            k: Number of neighbours wanted by this caller
+            **options: Extra search options passed through to search_fn;
+                       only queries with equal options share a batch
+
+        Returns:
+            (distances, indices) 1-D arrays of length k for this query
+        """
+        if not self.enabled:
+            distances, indices = await self.search_fn([query], k, **options)
+            self.batches += 1
+            self.queries += 1
+            return distances[0], indices[0]
+
+        key = tuple(sorted(options.items()))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((query, k, future))
+
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window_ms / 1000.0, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(key, [])
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch, dict(key)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, int, asyncio.Future]],
+                         options: Dict[str, Any]):
+        queries = [query for query, _, _ in batch]
+        max_k = max(k for _, k, _ in batch)
+        self.batches += 1
+        self.queries += len(batch)
+
+        try:
+            try:
+                distances, indices = await self.search_fn(queries, max_k, **options)
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            # Top-max_k results are sorted, so each caller's top-k is a prefix
+            for row, (_, k, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result((distances[row, :k], indices[row, :k]))
+        finally:
+            # Cancellation (e.g. loop shutdown) must not leave callers waiting
+            for _, _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    def stats(self) -> Dict[str, float]:
+        """Return batching counters"""
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window_ms,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+        }
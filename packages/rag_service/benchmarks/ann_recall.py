@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Recall@k vs latency report for approximate FAISS index types
+
+Builds each index type from vector_index.py over the same vectors, sweeps
+the search-time knob (nprobe for IVF, efSearch for HNSW) and compares the
+results with exact IndexFlatIP search. Vectors come from an existing flat
+index (--index-dir) or from a synthetic clustered corpus, so the report
+runs offline without the embedding model.
+
+With --storage, each index type is also built with fp16/int8 scalar
+quantization; the report gives the serialized index size per vector and,
+with --rescore N, the recall after exact re-scoring of k*N candidates.
+
+Usage:
+    python benchmarks/ann_recall.py --index-dir ./index --k 5
+    python benchmarks/ann_recall.py --synthetic 100000 --json ann_report.json
+    python benchmarks/ann_recall.py --types flat hnsw --storage float32 fp16 int8 --rescore 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vector_index import (
+    INDEX_TYPES, STORAGE_TYPES, resolve_index_params, create_index, train_index,
+    make_search_params, rescore
+)
+
+
+SWEEPS = {
+    "flat": [None],
+    "hnsw": [16, 32, 64, 128, 256],
+    "ivf-flat": [1, 4, 8, 16, 32, 64],
+    "ivf-pq": [1, 4, 8, 16, 32, 64],
+}
+
+
+def load_vectors(index_dir: str) -> np.ndarray:
+    """Reconstruct all vectors from a saved flat index"""
+    index = faiss.read_index(str(Path(index_dir) / "faiss_index.bin"))
+    if not isinstance(faiss.downcast_index(index), faiss.IndexFlat):
+        raise ValueError("--index-dir must contain a flat index (exact vectors needed)")
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def synthetic_vectors(num_vectors: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors (a flat Gaussian cloud is unrealistically hard for ANN)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, num_vectors // 200), dim)).astype(np.float32)
+    assignment = rng.integers(0, len(centers), num_vectors)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, num_queries: int, seed: int = 1) -> np.ndarray:
+    """Perturbed corpus vectors, so queries resemble (but don't equal) stored chunks"""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(vectors), min(num_queries, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.3 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the exact top-k present in the approximate top-k"""
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def search_one(index: faiss.Index, query: np.ndarray, k: int, search_params,
+               vectors: np.ndarray, rescore_factor: int) -> np.ndarray:
+    """Labels of one query, optionally re-scored against the exact vectors"""
+    if rescore_factor <= 1:
+        return index.search(query, k, params=search_params)[1]
+    _, candidates = index.search(query, k * rescore_factor, params=search_params)
+    return rescore(query, candidates, vectors, k)[1]
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, index_types: List[str],
+        pq_m: int, storages: List[str] = ("float32",), rescore_factor: int = 0) -> List[Dict]:
+    dim = vectors.shape[1]
+    exact = faiss.IndexFlatIP(dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in index_types:
+        for storage in storages:
+            if index_type == "ivf-pq" and storage != "float32":
+                continue
+            params = resolve_index_params(index_type, len(vectors), pq_m=pq_m, storage=storage)
+            build_start = time.perf_counter()
+            index = create_index(dim, params)
+            train_index(index, vectors, params)
+            index.add(vectors)
+            build_s = time.perf_counter() - build_start
+            bytes_per_vector = len(faiss.serialize_index(index)) / len(vectors)
+
+            factors = [0] if storage == "float32" or rescore_factor <= 1 else [0, rescore_factor]
+            for knob in SWEEPS[index_type]:
+                search_params = make_search_params(
+                    index,
+                    nprobe=knob if index_type.startswith("ivf") else None,
+                    ef_search=knob if index_type == "hnsw" else None,
+                )
+                for factor in factors:
+                    start = time.perf_counter()
+                    # One query at a time, like /retrieve without batching
+                    found = np.vstack([
+                        search_one(index, queries[i:i + 1], k, search_params, vectors, factor)
+                        for i in range(len(queries))
+                    ])
+                    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+                    rows.append({
+                        "index_type": index_type,
+                        "storage": storage,
+                        "rescore": factor,
+                        "knob": ("nprobe" if index_type.startswith("ivf") else "efSearch") if knob else "-",
+                        "value": knob,
+                        "recall_at_k": round(recall_at_k(found, truth), 4),
+                        "latency_ms": round(latency_ms, 4),
+                        "build_s": round(build_s, 2),
+                        "bytes_per_vector": round(bytes_per_vector, 1),
+                        "params": params,
+                    })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k vs latency for ANN index types")
+    parser.add_argument("--index-dir", type=str, default=None, help="Directory with a flat faiss_index.bin")
+    parser.add_argument("--synthetic", type=int, default=50000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--storage", nargs="+", default=["float32"], choices=STORAGE_TYPES,
+                        help="Vector storage to compare (ivf-pq is always float32)")
+    parser.add_argument("--rescore", type=int, default=0,
+                        help="Also re-score k*N candidates of quantized indexes exactly (0 = off)")
+    parser.add_argument("--json", type=str, default=None, help="Write rows to this JSON file")
+    args = parser.parse_args()
+
+    if args.index_dir:
+        vectors = load_vectors(args.index_dir)
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+    queries = make_queries(vectors, args.queries)
+
+    print(f"Corpus: {len(vectors)} x {vectors.shape[1]}, {len(queries)} queries, k={args.k}")
+    rows = run(vectors, queries, args.k, args.types, args.pq_m, args.storage, args.rescore)
+
+    print(f"{'index':<10} {'storage':<8} {'rescore':>7} {'knob':<9} {'value':>6} "
+          f"{'recall@k':>9} {'ms/query':>9} {'bytes/vec':>10} {'build s':>8}")
+    for row in rows:
+        print(f"{row['index_type']:<10} {row['storage']:<8} {row['rescore'] or '-':>7} "
+              f"{row['knob']:<9} {str(row['value'] or '-'):>6} "
+              f"{row['recall_at_k']:>9.4f} {row['latency_ms']:>9.3f} "
+              f"{row['bytes_per_vector']:>10.1f} {row['build_s']:>8.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"num_vectors": len(vectors), "k": args.k, "rows": rows}, f, indent=2)
+        print(f"✓ Saved report to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
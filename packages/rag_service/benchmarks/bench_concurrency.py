@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Concurrent-load latency benchmark for /retrieve
+
+Fires concurrent /retrieve requests (with /health probes mixed in) and
+reports p50/p95/p99 latencies. By default it runs in-process against a
+synthetic index and the deterministic stub encoder, comparing the legacy
+inline mode (INFERENCE_WORKERS=0, blocking the event loop) with the
+inference executor. Use --url to measure a running server instead.
+
+Usage:
+    python benchmarks/bench_concurrency.py --requests 400 --concurrency 32
+    python benchmarks/bench_concurrency.py --url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Return p50/p95/p99 (ms) of latency samples"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    values = np.array(samples) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+    }
+
+
+async def run_load(client: httpx.AsyncClient, num_requests: int, concurrency: int) -> Dict:
+    """Run concurrent /retrieve calls and /health probes"""
+    semaphore = asyncio.Semaphore(concurrency)
+    retrieve_latencies, health_latencies = [], []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/retrieve", json={"query": f"loan eligibility question {i}", "k": 5}
+            )
+            if response.status_code != 200:
+                errors += 1
+            retrieve_latencies.append(time.perf_counter() - start)
+
+    async def probe():
+        while len(retrieve_latencies) < num_requests:
+            start = time.perf_counter()
+            await client.get("/health")
+            health_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    wall_start = time.perf_counter()
+    probe_task = asyncio.create_task(probe())
+    await asyncio.gather(*(one(i) for i in range(num_requests)))
+    wall = time.perf_counter() - wall_start
+    await probe_task
+
+    return {
+        "retrieve_ms": percentiles(retrieve_latencies),
+        "health_ms": percentiles(health_latencies),
+        "throughput_rps": round(num_requests / wall, 1),
+        "errors": errors,
+    }
+
+
+def setup_in_process(num_chunks: int, dim: int, work: int):
+    """Load a synthetic index and the stub encoder into server.state"""
+    import faiss
+    import server
+    from chunk_store import ChunkStore
+    from index_bundle import IndexBundle
+    from stub_encoder import StubEncoder
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((num_chunks, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(dim)
+    index.add(vectors)
+
+    server.state.model = StubEncoder(dim=dim, work=work)
+    chunks = ChunkStore.from_chunks([
+        {
+            "chunk_id": i, "filename": "synthetic.pdf", "page_num": 1 + i // 10,
+            "text": f"chunk {i}", "char_start": 0, "char_end": 10,
+        }
+        for i in range(num_chunks)
+    ])
+    server.publish_bundle(IndexBundle(index, chunks, {}))
+    # Unique queries per run, so measure the inference path rather than the cache
+    server.state.query_cache.bind_model("stub")
+    server.state.query_cache.clear()
+    server.state.ready = True
+    # State is injected above; skip the real model/index loading on startup
+    server.app.router.on_startup.clear()
+    return server
+
+
+def start_server(app, port: int):
+    """Run uvicorn in a background thread (own event loop) and wait until it is up"""
+    import threading
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    uvicorn_server = uvicorn.Server(config)
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    while not uvicorn_server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Benchmark server failed to start")
+        time.sleep(0.05)
+    return uvicorn_server, thread
+
+
+async def measure(url: str, args) -> Dict:
+    async with httpx.AsyncClient(base_url=url, timeout=60,
+                                 limits=httpx.Limits(max_connections=args.concurrency + 2)) as client:
+        return await run_load(client, args.requests, args.concurrency)
+
+
+def main_in_process(args) -> int:
+    from inference import InferenceExecutor
+    server = setup_in_process(args.chunks, args.dim, args.work)
+    modes = {
+        "inline (before)": 0,
+        f"executor x{args.workers} (after)": args.workers,
+    }
+    for label, workers in modes.items():
+        server.state.executor = InferenceExecutor(max_workers=workers, max_queue=args.requests)
+        server.state.query_cache.clear()
+        uvicorn_server, thread = start_server(server.app, args.port)
+        try:
+            print(run_label(label, asyncio.run(measure(f"http://127.0.0.1:{args.port}", args))))
+        finally:
+            uvicorn_server.should_exit = True
+            thread.join()
+            server.state.executor.shutdown()
+    return 0
+
+
+def run_label(label: str, result: Dict) -> str:
+    return (
+        f"{label:<24} retrieve p50/p95/p99 = "
+        f"{result['retrieve_ms']['p50']}/{result['retrieve_ms']['p95']}/{result['retrieve_ms']['p99']} ms | "
+        f"health p99 = {result['health_ms']['p99']} ms | "
+        f"{result['throughput_rps']} req/s | errors = {result['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /retrieve latency benchmark")
+    parser.add_argument("--url", type=str, default=None, help="Benchmark a running server")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="Executor workers (in-process)")
+    parser.add_argument("--chunks", type=int, default=20000, help="Synthetic index size")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--work", type=int, default=384, help="Stub encoder matmul size")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the in-process server")
+    args = parser.parse_args()
+
+    if args.url:
+        print(run_label("server", asyncio.run(measure(args.url, args))))
+        return 0
+    return main_in_process(args)
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Chunk embedding throughput: single process vs length-bucketed worker pool
+
+Embeds the same chunk texts with the original single-process path
+(model.encode, batch_size=32) and with encoding_pool.BucketedEncoder at
+each worker count, and reports embeddings/sec, speedup over the original
+path and the lowest cosine similarity to its embeddings.
+
+Chunks come from the given PDFs (700-character chunks, 100 overlap, as
+ingest.py makes by default) or, without PDFs, from a synthetic mix of
+short and long English and Hindi texts. --stub swaps the model for the
+deterministic stub encoder (no download; measures scheduling only).
+
+Usage:
+    python benchmarks/bench_embed.py ../../data/pdfs/*.pdf
+    python benchmarks/bench_embed.py --workers 1 2 4 --chunks 4000 --json embed.json
+    python benchmarks/bench_embed.py --stub
+"""
+
+import argparse
+import functools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from encoding_pool import BucketedEncoder, available_cores, load_sentence_transformer
+from stub_encoder import StubEncoder
+
+ENGLISH = ("The loan to value ratio shall not exceed seventy five percent of the value "
+           "of gold jewellery pledged, and lenders shall verify the ownership. ")
+HINDI = ("स्वर्ण आभूषणों के बदले ऋण का मूल्य अनुपात पचहत्तर प्रतिशत से अधिक नहीं होगा "
+         "और ऋणदाता स्वामित्व का सत्यापन करेंगे। ")
+
+
+def default_worker_counts() -> List[int]:
+    cores = available_cores()
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def synthetic_texts(count: int) -> List[str]:
+    """Chunks of 1-8 sentences, a third of them Hindi"""
+    rng = np.random.default_rng(0)
+    return [
+        f"[{i}] " + (HINDI if i % 3 == 0 else ENGLISH) * int(rng.integers(1, 9))
+        for i in range(count)
+    ]
+
+
+def pdf_texts(pdfs: List[str], chunk_size: int = 700, overlap: int = 100) -> List[str]:
+    from ingest import extract_pdf_pages
+
+    texts = []
+    for pdf in pdfs:
+        pages, _ = extract_pdf_pages(pdf)
+        for _, text in pages:
+            texts.extend(text[start:start + chunk_size]
+                         for start in range(0, max(1, len(text) - overlap), chunk_size - overlap))
+    return [text for text in texts if text.strip()]
+
+
+def timed(encode, texts: List[str]) -> Dict:
+    start = time.perf_counter()
+    embeddings = np.asarray(encode(texts), dtype=np.float32)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "per_sec": len(texts) / seconds, "embeddings": embeddings}
+
+
+def min_cosine(a: np.ndarray, b: np.ndarray) -> float:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return float(np.min(np.sum(a * b, axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk embedding scaling benchmark")
+    parser.add_argument("pdfs", nargs="*", help="PDFs to chunk (default: synthetic texts)")
+    parser.add_argument("--model", type=str, default="paraphrase-multilingual-mpnet-base-v2")
+    parser.add_argument("--stub", action="store_true", help="Use the stub encoder")
+    parser.add_argument("--chunks", type=int, default=2000,
+                        help="Chunks to embed (default: 2000; PDF chunks are truncated to it)")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to try (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--batch-tokens", type=int, default=8192,
+                        help="Padded-token budget per bucketed batch (default: 8192)")
+    parser.add_argument("--json", type=str, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    texts = pdf_texts(args.pdfs)[:args.chunks] if args.pdfs else synthetic_texts(args.chunks)
+    loader = (functools.partial(StubEncoder) if args.stub
+              else functools.partial(load_sentence_transformer, args.model))
+    model = loader()
+    print(f"{len(texts)} chunks | {available_cores()} cores available | "
+          f"model: {'stub' if args.stub else args.model}")
+
+    model.encode(texts[:32], batch_size=32, convert_to_numpy=True)
+    baseline = timed(lambda batch: model.encode(batch, batch_size=32, convert_to_numpy=True),
+                     texts)
+    reference = baseline.pop("embeddings")
+    results = [{"path": "single-process", "workers": 1, **baseline, "speedup": 1.0,
+                "min_cosine": 1.0}]
+    print(f"{'single-process':<16} | {baseline['seconds']:7.2f} s | "
+          f"{baseline['per_sec']:8.1f} emb/s | speedup  1.00x")
+
+    for workers in args.workers or default_worker_counts():
+        encoder = BucketedEncoder(model, args.model, workers=workers,
+                                  max_batch_tokens=args.batch_tokens, model_loader=loader)
+        try:
+            # Warm-up run starts the workers and loads their models
+            encoder.encode(texts)
+            result = timed(encoder.encode, texts)
+        finally:
+            encoder.close()
+        result["min_cosine"] = min_cosine(reference, result.pop("embeddings"))
+        result.update(path="bucketed", workers=workers,
+                      speedup=baseline["seconds"] / result["seconds"])
+        results.append(result)
+        print(f"{f'bucketed x{workers}':<16} | {result['seconds']:7.2f} s | "
+              f"{result['per_sec']:8.1f} emb/s | speedup {result['speedup']:5.2f}x | "
+              f"min cosine vs single-process {result['min_cosine']:.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
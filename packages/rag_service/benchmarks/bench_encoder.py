@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Per-query encode latency and fidelity of the query encoder backends
+
+Encodes the same queries one at a time (as /retrieve does) with the
+PyTorch SentenceTransformer and the ONNX Runtime fp32 / int8 backends,
+and reports p50/p95 latency plus the lowest cosine similarity to the
+PyTorch embeddings.
+
+Usage:
+    python benchmarks/bench_encoder.py
+    python benchmarks/bench_encoder.py --model ./my-model --threads 4 --queries 200
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from onnx_encoder import ENCODER_BACKENDS, OnnxEncoder, PROBE_TEXTS, embedding_agreement
+
+
+def make_queries(count: int) -> List[str]:
+    """Probe queries, varied so no two are identical"""
+    return [f"{PROBE_TEXTS[i % len(PROBE_TEXTS)]} ({i})" for i in range(count)]
+
+
+def time_encoder(encoder, queries: List[str], warmup: int = 5) -> Dict[str, float]:
+    for query in queries[:warmup]:
+        encoder.encode([query], convert_to_numpy=True)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        encoder.encode([query], convert_to_numpy=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(np.mean(latencies)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query encoder backend latency benchmark")
+    parser.add_argument("--model", type=str,
+                        default="sentence-transformers/paraphrase-multilingual-mpnet-base-v2")
+    parser.add_argument("--backends", nargs="+", default=list(ENCODER_BACKENDS),
+                        choices=ENCODER_BACKENDS)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = default)")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Where to export ONNX models (default: temporary directory)")
+    parser.add_argument("--json", type=str, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    reference = SentenceTransformer(args.model)
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="onnx_encoder_")
+    queries = make_queries(args.queries)
+
+    results = {}
+    for backend in args.backends:
+        if backend == "torch":
+            encoder = reference
+        else:
+            encoder = OnnxEncoder.from_sentence_transformer(
+                reference, cache_dir, args.model,
+                quantized=backend == "onnx-int8", threads=args.threads
+            )
+        result = time_encoder(encoder, queries)
+        result["min_cosine"] = embedding_agreement(reference, encoder)
+        results[backend] = result
+
+    baseline = results.get("torch", {}).get("p50_ms")
+    print(f"Model: {args.model} | {args.queries} queries, batch size 1, "
+          f"threads: {args.threads or torch.get_num_threads()}")
+    for backend, result in results.items():
+        speedup = f"{baseline / result['p50_ms']:.2f}x" if baseline else "-"
+        print(f"{backend:<10} p50 {result['p50_ms']:7.2f} ms | p95 {result['p95_ms']:7.2f} ms | "
+              f"speedup {speedup:>6} | min cosine vs torch {result['min_cosine']:.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
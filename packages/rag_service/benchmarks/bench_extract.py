@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+PDF text extraction throughput by number of worker processes
+
+Extracts the same PDFs with ingest.py's page-parallel extraction at each
+worker count and reports pages/sec and speedup over one process. Output
+is checked to be identical to the single-process run.
+
+Usage:
+    python benchmarks/bench_extract.py ../../data/pdfs/151.pdf
+    python benchmarks/bench_extract.py ../../data/pdfs/*.pdf --workers 1 2 4 8 --json extract.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ingest import extract_pdf_pages
+
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_worker_counts() -> List[int]:
+    cores = available_cores()
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def run(pdfs: List[str], workers: int) -> Dict:
+    """Extract every PDF once; pool startup is included in the time"""
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        extracted = {pdf: extract_pdf_pages(pdf, pool, workers) for pdf in pdfs}
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    seconds = time.perf_counter() - start
+    num_pages = sum(len(pages) + len(failures) for pages, failures in extracted.values())
+    return {
+        "workers": workers,
+        "seconds": seconds,
+        "pages": num_pages,
+        "pages_per_sec": num_pages / seconds,
+        "failed_pages": sum(len(failures) for _, failures in extracted.values()),
+        "output": {pdf: pages for pdf, (pages, _) in extracted.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF extraction scaling benchmark")
+    parser.add_argument("pdfs", nargs="+", help="PDF files to extract")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to try (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--json", type=str, default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    worker_counts = args.workers or default_worker_counts()
+    print(f"{len(args.pdfs)} PDFs | {available_cores()} cores available")
+
+    results = []
+    for workers in worker_counts:
+        result = run(args.pdfs, workers)
+        baseline = results[0] if results else result
+        result["speedup"] = baseline["seconds"] / result["seconds"]
+        result["identical"] = result["output"] == baseline["output"]
+        results.append(result)
+        print(f"workers {workers:>3} | {result['pages']} pages in {result['seconds']:7.2f} s | "
+              f"{result['pages_per_sec']:7.1f} pages/s | speedup {result['speedup']:5.2f}x | "
+              f"failed pages {result['failed_pages']} | "
+              f"{'same output' if result['identical'] else 'OUTPUT DIFFERS'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([{key: value for key, value in result.items() if key != "output"}
+                       for result in results], f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory and time-to-ready for FAISS index loading
+
+Starts N worker processes that each load faiss_index.bin (plus the chunk
+store, if present) the way server.py does, run one search, and then report
+time-to-ready and memory from /proc/self/smaps_rollup (Linux). Workers wait
+for each other before measuring, so pages shared through the page cache
+show up as a lower PSS (proportional set size) in mmap mode.
+
+Usage:
+    python benchmarks/bench_index_load.py --index-dir ./index --workers 4
+    python benchmarks/bench_index_load.py --synthetic 100000 --workers 4
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def memory_kb() -> Dict[str, int]:
+    """RSS/PSS/shared memory of the current process in kB"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def worker(index_dir: str, mmap: bool, barrier, results, slot: int):
+    import faiss
+    from chunk_store import ChunkStore
+    from vector_index import read_index
+
+    baseline = memory_kb()
+    start = time.perf_counter()
+    index = read_index(str(Path(index_dir) / "faiss_index.bin"), mmap=mmap)
+    if ChunkStore.exists(index_dir):
+        ChunkStore.open(index_dir)
+    query = np.random.default_rng(slot).standard_normal((1, index.d)).astype(np.float32)
+    faiss.normalize_L2(query)
+    index.search(query, 5)
+    ready_ms = (time.perf_counter() - start) * 1000
+
+    barrier.wait()
+    memory = memory_kb()
+    results[slot] = {
+        "ready_ms": ready_ms,
+        "rss_mb": (memory["Rss"] - baseline["Rss"]) / 1024,
+        "pss_mb": (memory["Pss"] - baseline["Pss"]) / 1024,
+    }
+    barrier.wait()
+
+
+def run_mode(index_dir: str, workers: int, mmap: bool) -> Dict[str, float]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    manager = ctx.Manager()
+    results = manager.dict()
+    processes = [
+        ctx.Process(target=worker, args=(index_dir, mmap, barrier, results, slot))
+        for slot in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    rows = list(results.values())
+    return {
+        "ready_ms": float(np.mean([r["ready_ms"] for r in rows])),
+        "rss_mb": float(np.mean([r["rss_mb"] for r in rows])),
+        "pss_mb": float(np.mean([r["pss_mb"] for r in rows])),
+        "total_pss_mb": float(np.sum([r["pss_mb"] for r in rows])),
+    }
+
+
+def write_synthetic(num_vectors: int, dim: int) -> str:
+    import faiss
+    index_dir = tempfile.mkdtemp(prefix="bench_index_")
+    vectors = np.random.default_rng(0).standard_normal((num_vectors, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(dim)
+    index.add(vectors)
+    faiss.write_index(index, str(Path(index_dir) / "faiss_index.bin"))
+    return index_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index load RSS / time-to-ready per worker")
+    parser.add_argument("--index-dir", type=str, default=None)
+    parser.add_argument("--synthetic", type=int, default=100000, help="Synthetic flat index size")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from vector_index import mmap_supports_flat_codes
+
+    index_dir = args.index_dir or write_synthetic(args.synthetic, args.dim)
+    index_size_mb = (Path(index_dir) / "faiss_index.bin").stat().st_size / 2**20
+    print(f"Index: {index_dir} ({index_size_mb:.1f} MB), {args.workers} workers, "
+          f"flat mmap supported: {mmap_supports_flat_codes()}")
+
+    for label, mmap in (("read (copy)", False), ("mmap", True)):
+        result = run_mode(index_dir, args.workers, mmap)
+        print(f"{label:<12} time-to-ready {result['ready_ms']:8.1f} ms | "
+              f"RSS/worker {result['rss_mb']:7.1f} MB | PSS/worker {result['pss_mb']:7.1f} MB | "
+              f"total PSS {result['total_pss_mb']:7.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Retrieval performance benchmark suite (offline, deterministic)
+
+Builds a synthetic corpus of the requested sizes with the deterministic
+stub encoder in place of the SentenceTransformer, then times every stage
+of ingestion and of a /retrieve request:
+
+    ingest   chunk_text, encode (bucketed stub encoding), build_faiss_index,
+             save_index, load (IndexBundle.load: index, chunk store, BM25)
+    query    encode (encode_queries, cache miss), search (dense_search on a
+             cached embedding), assemble (build_results), serialize
+             (RetrievalResponse JSON)
+
+Page text, vectors and queries are seeded, so two runs on the same
+machine differ only by timing noise. Results are written as JSON, tagged
+with the git commit, and can be compared against an earlier run: stages
+slower than --tolerance exit non-zero.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes 10000 100000 --json bench.json
+    python benchmarks/bench_suite.py --sizes 1000000 --dim 384 --queries 500
+    python benchmarks/bench_suite.py --json new.json --compare bench.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from stub_encoder import StubEncoder
+
+RESULTS_FORMAT = 1
+STAGES = ("chunk_text", "ingest_encode", "build_faiss_index", "save_index", "load",
+          "query_encode", "search", "assemble", "serialize")
+
+WORDS = (
+    "loan borrower collateral gold jewellery interest rate tenor repayment bank NBFC "
+    "reserve circular directions compliance audit board policy customer account "
+    "deposit credit risk weight capital provision default eligibility valuation "
+    "ऋण ब्याज बैंक ग्राहक खाता जमा नीति निर्देश जोखिम पूंजी स्वर्ण आभूषण"
+).split()
+
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/mean (ms) and calls per second of per-call latencies (seconds)"""
+    values = np.array(samples) * 1000
+    return {
+        "calls": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "mean_ms": round(float(values.mean()), 4),
+        "per_sec": round(len(samples) / max(float(values.sum()) / 1000, 1e-12), 1),
+    }
+
+
+def bulk_stats(seconds: float, items: int) -> Dict[str, float]:
+    """Wall time and items per second of one bulk operation"""
+    return {"items": items, "seconds": round(seconds, 4),
+            "per_sec": round(items / max(seconds, 1e-12), 1)}
+
+
+def timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def synthetic_page(rng: np.random.Generator, chars: int = 2100) -> str:
+    """Page of sentences drawn from a fixed vocabulary"""
+    sentences, length = [], 0
+    while length < chars:
+        words = rng.choice(WORDS, size=int(rng.integers(8, 25)))
+        sentence = " ".join(words) + (" ।" if words[0] in WORDS[-12:] else ".")
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def make_pipeline(dim: int, work: int):
+    """PDFIngestionPipeline whose model is the stub encoder"""
+    import ingest
+
+    ingest.SentenceTransformer = lambda name, token=None: StubEncoder(dim=dim, work=work)
+    return ingest.PDFIngestionPipeline(embedding_model="stub")
+
+
+def bench_ingest(pipeline, num_chunks: int, dim: int, encode_sample: int,
+                 index_type: str, index_dir: str, seed: int) -> Dict[str, Dict]:
+    """Chunk, encode, index, save and load a corpus of num_chunks chunks"""
+    from index_bundle import IndexBundle
+
+    rng = np.random.default_rng(seed)
+    stages = {}
+
+    chunks, pages, seconds = [], 0, 0.0
+    while len(chunks) < num_chunks:
+        text = synthetic_page(rng)
+        page_chunks, elapsed = timed(pipeline.chunk_text, text, f"doc{pages // 40}.pdf",
+                                     1 + pages % 40, len(chunks))
+        seconds += elapsed
+        chunks.extend(page_chunks)
+        pages += 1
+    del chunks[num_chunks:]
+    stages["chunk_text"] = bulk_stats(seconds, len(chunks))
+
+    # The stub is too slow to embed 1M texts; measure a sample, index seeded vectors
+    sample = [chunk.text for chunk in chunks[:encode_sample]]
+    _, seconds = timed(pipeline.encode_texts, sample)
+    stages["ingest_encode"] = bulk_stats(seconds, len(sample))
+
+    embeddings = np.empty((num_chunks, dim), dtype=np.float32)
+    for start in range(0, num_chunks, 100000):
+        block = embeddings[start:start + 100000]
+        block[:] = rng.standard_normal(block.shape, dtype=np.float32)
+
+    pipeline.index_type = index_type
+    index, seconds = timed(pipeline.build_faiss_index, embeddings)
+    stages["build_faiss_index"] = bulk_stats(seconds, num_chunks)
+    del embeddings
+
+    _, seconds = timed(pipeline.save_index, index, chunks, index_dir)
+    stages["save_index"] = bulk_stats(seconds, num_chunks)
+    del index, chunks
+
+    bundle, seconds = timed(IndexBundle.load, Path(index_dir))
+    stages["load"] = bulk_stats(seconds, num_chunks)
+    return stages, bundle
+
+
+def bench_queries(bundle, dim: int, work: int, num_queries: int, k: int,
+                  seed: int) -> Dict[str, Dict]:
+    """Time the stages of a dense /retrieve request, one query at a time"""
+    import server
+
+    server.state.model = StubEncoder(dim=dim, work=work)
+    server.state.query_cache.bind_model(f"stub-{seed}")
+    server.state.query_cache.clear()
+    server.publish_bundle(bundle)
+
+    rng = np.random.default_rng(seed + 1)
+    queries = [" ".join(rng.choice(WORDS, size=8)) + f" {i}" for i in range(num_queries)]
+    samples = {stage: [] for stage in ("query_encode", "search", "assemble", "serialize")}
+    for query in queries:
+        request = server.RetrievalRequest(query=query, k=k)
+
+        # First call misses the query cache: encode only
+        _, seconds = timed(server.encode_queries, [query])
+        samples["query_encode"].append(seconds)
+        # The embedding is now cached, so this is (almost) pure FAISS search
+        (distances, rows), seconds = timed(server.dense_search, [query], k, bundle)
+        samples["search"].append(seconds)
+
+        results, seconds = timed(server.build_results, request, distances[0], rows[0], bundle)
+        samples["assemble"].append(seconds)
+
+        response = server.RetrievalResponse(
+            query=query, results=results, num_results=len(results),
+            detected_language=None, reranked=False, processing_time_ms=0.0
+        )
+        _, seconds = timed(lambda: response.model_dump_json().encode("utf-8"))
+        samples["serialize"].append(seconds)
+    return {stage: latency_stats(values) for stage, values in samples.items()}
+
+
+def environment() -> Dict[str, str]:
+    """Commit and machine the results belong to"""
+    import faiss
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "faiss": getattr(faiss, "__version__", "unknown"),
+        "numpy": np.__version__,
+    }
+
+
+def stage_rate(stats: Dict) -> float:
+    """Throughput of a stage (per_sec), the figure regressions are judged on"""
+    return stats["per_sec"]
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Print stage-by-stage throughput change against a baseline run
+
+    Returns:
+        "<chunks>/<stage>" of every stage slower than the tolerance allows
+    """
+    base_runs = {run["chunks"]: run for run in baseline["runs"]}
+    regressions = []
+    print(f"\nCompared with {baseline['environment']['commit'][:12]} "
+          f"({baseline['environment']['created_at']}):")
+    for run in current["runs"]:
+        base = base_runs.get(run["chunks"])
+        if base is None:
+            continue
+        for stage in STAGES:
+            if stage not in run["stages"] or stage not in base["stages"]:
+                continue
+            ratio = stage_rate(run["stages"][stage]) / max(stage_rate(base["stages"][stage]), 1e-12)
+            slower = ratio < 1 - tolerance
+            if slower:
+                regressions.append(f"{run['chunks']}/{stage}")
+            print(f"  {run['chunks']:>8} {stage:<18} {ratio:6.2f}x throughput"
+                  f"{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000],
+                        help="Corpus sizes in chunks (default: 10000)")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--index-type", type=str, default="flat")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per corpus size")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--work", type=int, default=256, help="Stub encoder matmul size")
+    parser.add_argument("--encode-sample", type=int, default=5000,
+                        help="Chunk texts embedded to measure ingest encoding")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=str, default=None, help="Write results as JSON")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed throughput loss per stage with --compare (default: 0.1)")
+    args = parser.parse_args()
+
+    pipeline = make_pipeline(args.dim, args.work)
+    results = {"format": RESULTS_FORMAT, "environment": environment(),
+               "config": vars(args), "runs": []}
+
+    for num_chunks in args.sizes:
+        print(f"\n=== {num_chunks} chunks, dim {args.dim}, {args.index_type} ===")
+        with tempfile.TemporaryDirectory(prefix="bench_suite_") as index_dir:
+            stages, bundle = bench_ingest(pipeline, num_chunks, args.dim, args.encode_sample,
+                                          args.index_type, index_dir, args.seed)
+            stages.update(bench_queries(bundle, args.dim, args.work, args.queries,
+                                        args.k, args.seed))
+            del bundle
+        results["runs"].append({"chunks": num_chunks, "stages": stages})
+
+        print(f"{'stage':<18} {'per sec':>12} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9}")
+        for stage in STAGES:
+            stats = stages[stage]
+            print(f"{stage:<18} {stats['per_sec']:>12.1f} {stats.get('p50_ms', '-'):>10} "
+                  f"{stats.get('p95_ms', '-'):>10} {stats.get('seconds', '-'):>9}")
+    pipeline.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Saved results to {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"✗ {len(regressions)} stage(s) regressed beyond {args.tolerance:.0%}: "
+                  f"{', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,49 @@
+"""
+Deterministic stub encoder for offline benchmarks
+
+Mimics the parts of SentenceTransformer the service uses (encode and
+get_sentence_embedding_dimension) without downloading a model. Each text
+maps to a fixed pseudo-random unit vector derived from its hash, and an
+optional matmul workload stands in for the transformer forward pass
+(numpy releases the GIL there, like torch does).
+"""
+
+import hashlib
+from typing import List
+
+import numpy as np
+
+
+class StubEncoder:
+    """Hash-seeded embedding model with a tunable CPU cost"""
+
+    def __init__(self, dim: int = 768, work: int = 256):
+        """
+        Args:
+            dim: Embedding dimension
+            work: Side of the square matmul run per encode call (0 = none)
+        """
+        self.dim = dim
+        self.work = work
+        self._work_matrix = (
+            np.random.default_rng(0).standard_normal((work, work)).astype(np.float32)
+            if work else None
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def embed_one(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, texts: List[str], batch_size: int = 32,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        if self._work_matrix is not None:
+            # Cost grows with the batch like a real forward pass
+            for _ in range(max(1, len(texts) // 8)):
+                self._work_matrix @ self._work_matrix
+        return np.vstack([self.embed_one(text) for text in texts]).astype(np.float32)
@@ -0,0 +1,226 @@
+"""
+In-process caches for the RAG retrieval service
+
+Provides a small thread-safe LRU cache with optional TTL, byte budget and
+hit/miss counters, a query-embedding cache that sits in front of
+SentenceTransformer.encode so repeated chatbot questions skip the
+transformer forward pass, and a response cache that serves identical
+/retrieve requests from serialized JSON.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text for cache lookups
+
+    Applies Unicode NFC (so composed/decomposed Devanagari match) and
+    collapses whitespace. Case is kept: the embedding model and the
+    reranker are cased, so "SBI" and "sbi" can encode differently.
+
+    Args:
+        query: Raw query text
+
+    Returns:
+        Normalized query string
+    """
+    query = unicodedata.normalize("NFC", query)
+    return _WHITESPACE_RE.sub(" ", query).strip()
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU cache with optional time-to-live"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 0, max_bytes: int = 0):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of entries (0 disables the cache)
+            ttl_seconds: Entry lifetime in seconds (0 = never expire)
+            max_bytes: Budget for the sizes passed to put() (0 = unlimited)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on miss/expiry"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at, nbytes = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.nbytes -= nbytes
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, nbytes: int = 0):
+        """
+        Store value under key, evicting least recently used entries
+
+        Args:
+            key: Cache key
+            value: Value to store
+            nbytes: Size of value counted against max_bytes
+        """
+        if not self.enabled or (self.max_bytes and nbytes > self.max_bytes):
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[2]
+            self._entries[key] = (value, time.monotonic(), nbytes)
+            self.nbytes += nbytes
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes and self.nbytes > self.max_bytes):
+                _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_bytes
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class QueryEmbeddingCache:
+    """
+    Cache of L2-normalized query embeddings
+
+    Keyed by (embedding model name, normalized query text). Binding a
+    different model name drops every cached vector, so a model swap can
+    never serve embeddings from the wrong vector space.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 3600):
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.model_name: Optional[str] = None
+
+    def bind_model(self, model_name: str):
+        """Associate the cache with a model, invalidating it if the model changed"""
+        if model_name != self.model_name:
+            self._cache.clear()
+            self.model_name = model_name
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for query, or None"""
+        return self._cache.get((self.model_name, normalize_query(query)))
+
+    def put(self, query: str, embedding: np.ndarray):
+        """Cache a (normalized) embedding for query"""
+        embedding = np.array(embedding, dtype=np.float32)
+        # Cached vectors are shared between requests; never let callers mutate them
+        embedding.flags.writeable = False
+        self._cache.put((self.model_name, normalize_query(query)), embedding)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["model"] = self.model_name
+        return stats
+
+
+class ResponseCache:
+    """
+    Cache of serialized /retrieve responses
+
+    Keyed by (index version, request parameters) and bounded by the total
+    size of the stored JSON. Binding a new index version drops every
+    entry, so results from a replaced index are never served.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, max_entries: int = 100000,
+                 ttl_seconds: float = 0):
+        # A zero byte budget disables the cache rather than lifting the limit
+        self._cache = LRUCache(max_entries=max_entries if max_bytes > 0 else 0,
+                               ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self.index_version: Optional[str] = None
+
+    def bind_index(self, index_version: str):
+        """Associate the cache with an index version, purging it if the index changed"""
+        if index_version != self.index_version:
+            self._cache.clear()
+            self.index_version = index_version
+
+    def get(self, request_key: Hashable) -> Optional[bytes]:
+        """Return the cached response body for request_key, or None"""
+        if self.index_version is None:
+            return None
+        return self._cache.get((self.index_version, request_key))
+
+    def put(self, request_key: Hashable, body: bytes, index_version: str):
+        """
+        Cache a serialized response body
+
+        Args:
+            request_key: Request parameters
+            body: Serialized response
+            index_version: Index version the response was computed with;
+                responses from an index that has since been replaced are dropped
+        """
+        if index_version != self.index_version:
+            return
+        self._cache.put((index_version, request_key), body, nbytes=len(body))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["index_version"] = self.index_version
+        return stats
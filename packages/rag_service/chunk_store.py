@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Columnar, memory-mapped chunk metadata store
+
+Replaces the list of per-chunk dicts that used to live in metadata.pkl.
+Written by ingest.py next to faiss_index.bin:
+
+    chunks.npy       - structured array, one row per chunk (integer columns,
+                       byte offsets into the text blob, script language)
+    chunk_text.bin   - all chunk texts as one UTF-8 blob
+    chunk_docs.json  - document id -> filename table
+    chunk_alternates.npy - optional; other locations of near-duplicate chunks
+                       that were collapsed into one row (ingest.py --dedup)
+
+The server memory-maps both files, so N workers share one copy through the
+page cache and text is only decoded for the hits actually returned.
+Writers build temporary files and os.replace() them into place, so a
+rewrite never truncates a file a running server still has mapped.
+
+Migrate an index built with an older ingest.py:
+    python chunk_store.py --migrate ./index
+"""
+
+import json
+import mmap
+import os
+import argparse
+import pickle
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+COLUMNS_FILE = "chunks.npy"
+TEXT_FILE = "chunk_text.bin"
+DOCS_FILE = "chunk_docs.json"
+ALTERNATES_FILE = "chunk_alternates.npy"
+STORE_FORMAT = "columnar-v2"
+
+CHUNK_DTYPE = np.dtype([
+    ("chunk_id", np.int64),
+    ("doc_id", np.int32),
+    ("page_num", np.int32),
+    ("char_start", np.int32),
+    ("char_end", np.int32),
+    ("text_start", np.int64),
+    ("text_end", np.int64),
+    ("lang", "S2"),
+])
+
+# Where else a (canonical) chunk's text appears, sorted by chunk_id
+ALTERNATE_DTYPE = np.dtype([
+    ("chunk_id", np.int64),
+    ("doc_id", np.int32),
+    ("page_num", np.int32),
+    ("char_start", np.int32),
+    ("char_end", np.int32),
+])
+
+EXCERPT_CHARS = 100
+
+# A chunk counts as Hindi when this share of its letters is Devanagari
+DEVANAGARI_RATIO = 0.3
+
+
+def make_excerpt(text: str) -> str:
+    """Short preview of a chunk (same rule ingest.py has always used)"""
+    return text[:EXCERPT_CHARS] + "..." if len(text) > EXCERPT_CHARS else text
+
+
+def chunk_language(text: str) -> str:
+    """
+    Script-based language tag for a chunk ("hi" or "en")
+
+    Cheap and deterministic, unlike statistical detection on short chunks.
+    """
+    letters = [ch for ch in text if ch.isalpha() or "\u0900" <= ch <= "\u097f"]
+    if not letters:
+        return "en"
+    devanagari = sum(1 for ch in letters if "\u0900" <= ch <= "\u097f")
+    return "hi" if devanagari / len(letters) >= DEVANAGARI_RATIO else "en"
+
+
+# Rows buffered as tuples before being packed into a structured array block
+ROW_BLOCK = 8192
+
+
+def _tmp_path(path: Path) -> Path:
+    """Temporary sibling of path (same directory, so os.replace is atomic)"""
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def _save_array(path: Path, array: np.ndarray):
+    """np.save to a temporary file, then replace path (old mmaps keep the old inode)"""
+    tmp = _tmp_path(path)
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _save_json(path: Path, data: Dict):
+    tmp = _tmp_path(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class ChunkStoreWriter:
+    """
+    Appends chunks to a columnar store, streaming text to disk
+
+    Nothing in output_dir changes until close(): text streams to a
+    temporary file that replaces chunk_text.bin along with the columns.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_path = Path(output_dir)
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        self._text_tmp = _tmp_path(self.output_path / TEXT_FILE)
+        self._text_file = open(self._text_tmp, "wb")
+        self._blocks: List[np.ndarray] = []
+        self._rows: List[tuple] = []
+        self._alternates: List[tuple] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._offset = 0
+
+    def add(self, text: str, filename: str, page_num: int, chunk_id: int,
+            char_start: int, char_end: int):
+        """Append one chunk"""
+        encoded = text.encode("utf-8")
+        self._text_file.write(encoded)
+        doc_id = self._doc_ids.setdefault(filename, len(self._doc_ids))
+        self._rows.append((
+            chunk_id, doc_id, page_num, char_start, char_end,
+            self._offset, self._offset + len(encoded), chunk_language(text)
+        ))
+        self._offset += len(encoded)
+        if len(self._rows) >= ROW_BLOCK:
+            self._blocks.append(np.array(self._rows, dtype=CHUNK_DTYPE))
+            self._rows = []
+
+    def add_alternate(self, chunk_id: int, filename: str, page_num: int,
+                      char_start: int, char_end: int):
+        """Record another location of the text of chunk chunk_id"""
+        doc_id = self._doc_ids.setdefault(filename, len(self._doc_ids))
+        self._alternates.append((chunk_id, doc_id, page_num, char_start, char_end))
+
+    def add_dict(self, chunk: Dict):
+        """Append a chunk given as a DocumentChunk.to_dict() style dict"""
+        self.add(chunk["text"], chunk["filename"], chunk["page_num"], chunk["chunk_id"],
+                 chunk["char_start"], chunk["char_end"])
+
+    def close(self) -> int:
+        """Flush columns and document table; returns number of chunks written"""
+        self._text_file.close()
+        os.replace(self._text_tmp, self.output_path / TEXT_FILE)
+        columns = np.concatenate(self._blocks + [np.array(self._rows, dtype=CHUNK_DTYPE)])
+        _save_array(self.output_path / COLUMNS_FILE, columns)
+        alternates_file = self.output_path / ALTERNATES_FILE
+        if self._alternates:
+            alternates = np.array(self._alternates, dtype=ALTERNATE_DTYPE)
+            _save_array(alternates_file,
+                        alternates[np.argsort(alternates["chunk_id"], kind="stable")])
+        elif alternates_file.exists():
+            # Left by an earlier --dedup build into the same directory
+            alternates_file.unlink()
+        documents = [name for name, _ in sorted(self._doc_ids.items(), key=lambda item: item[1])]
+        _save_json(self.output_path / DOCS_FILE, {"format": STORE_FORMAT, "documents": documents})
+        return len(columns)
+
+    def abort(self):
+        """Drop everything added so far, leaving output_dir untouched"""
+        self._text_file.close()
+        os.remove(self._text_tmp)
+
+
+def write_chunk_store(chunks: Iterable[Dict], output_dir: str) -> int:
+    """
+    Write chunk dicts to a columnar store
+
+    Args:
+        chunks: Iterable of dicts with text/filename/page_num/chunk_id/char_start/char_end
+        output_dir: Index directory
+
+    Returns:
+        Number of chunks written
+    """
+    writer = ChunkStoreWriter(output_dir)
+    for chunk in chunks:
+        writer.add_dict(chunk)
+    return writer.close()
+
+
+class ChunkStore:
+    """
+    Read-only view over a columnar chunk store
+
+    Rows are looked up by position (the FAISS label); indexing returns the
+    same dict shape the legacy metadata.pkl chunks had.
+    """
+
+    def __init__(self, columns: np.ndarray, text_blob, documents: List[str],
+                 alternates: Optional[np.ndarray] = None):
+        self.columns = columns
+        self.documents = documents
+        self.alternates = alternates
+        self._text = text_blob
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        index_path = Path(index_dir)
+        return all((index_path / name).exists() for name in (COLUMNS_FILE, TEXT_FILE, DOCS_FILE))
+
+    @classmethod
+    def open(cls, index_dir: str) -> "ChunkStore":
+        """Memory-map a store written by ChunkStoreWriter"""
+        index_path = Path(index_dir)
+        columns = np.load(index_path / COLUMNS_FILE, mmap_mode="r")
+        with open(index_path / DOCS_FILE, "r", encoding="utf-8") as f:
+            documents = json.load(f)["documents"]
+
+        text_blob = b""
+        with open(index_path / TEXT_FILE, "rb") as f:
+            # mmap can't map empty files
+            if (index_path / TEXT_FILE).stat().st_size > 0:
+                text_blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        alternates = None
+        if (index_path / ALTERNATES_FILE).exists():
+            alternates = np.load(index_path / ALTERNATES_FILE)
+        return cls(columns, text_blob, documents, alternates)
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict]) -> "ChunkStore":
+        """Build an in-memory store from legacy metadata.pkl chunk dicts"""
+        doc_ids: Dict[str, int] = {}
+        rows, texts, offset = [], [], 0
+        for chunk in chunks:
+            encoded = chunk["text"].encode("utf-8")
+            texts.append(encoded)
+            doc_id = doc_ids.setdefault(chunk["filename"], len(doc_ids))
+            rows.append((
+                chunk["chunk_id"], doc_id, chunk["page_num"], chunk["char_start"],
+                chunk["char_end"], offset, offset + len(encoded), chunk_language(chunk["text"])
+            ))
+            offset += len(encoded)
+        documents = [name for name, _ in sorted(doc_ids.items(), key=lambda item: item[1])]
+        return cls(np.array(rows, dtype=CHUNK_DTYPE), b"".join(texts), documents)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def has_languages(self) -> bool:
+        """Whether the store has the per-chunk language column (columnar-v2+)"""
+        return "lang" in self.columns.dtype.names
+
+    def text(self, row: int) -> str:
+        """Decode the text of one chunk"""
+        record = self.columns[row]
+        return self._text[int(record["text_start"]):int(record["text_end"])].decode("utf-8")
+
+    def filename(self, row: int) -> str:
+        return self.documents[int(self.columns[row]["doc_id"])]
+
+    def alternate_locations(self, row: int) -> List[Dict]:
+        """Other (filename, page) locations of a chunk's text, in ingestion order"""
+        if self.alternates is None:
+            return []
+        chunk_id = self.columns[row]["chunk_id"]
+        ids = self.alternates["chunk_id"]
+        start, end = np.searchsorted(ids, chunk_id, "left"), np.searchsorted(ids, chunk_id, "right")
+        return [
+            {"filename": self.documents[int(record["doc_id"])],
+             "page_num": int(record["page_num"]),
+             "char_start": int(record["char_start"]),
+             "char_end": int(record["char_end"])}
+            for record in self.alternates[start:end]
+        ]
+
+    def __getitem__(self, row: int) -> Dict:
+        record = self.columns[row]
+        text = self.text(row)
+        return {
+            "chunk_id": int(record["chunk_id"]),
+            "filename": self.documents[int(record["doc_id"])],
+            "page_num": int(record["page_num"]),
+            "text": text,
+            "excerpt": make_excerpt(text),
+            "char_start": int(record["char_start"]),
+            "char_end": int(record["char_end"]),
+            "alternate_locations": self.alternate_locations(row),
+        }
+
+
+def load_chunk_store(index_dir: str, metadata: Dict) -> ChunkStore:
+    """
+    Open the chunk store for an index directory
+
+    Falls back to the chunk dicts of a legacy metadata.pkl.
+
+    Args:
+        index_dir: Index directory
+        metadata: Unpickled metadata.pkl contents
+
+    Returns:
+        ChunkStore
+    """
+    if ChunkStore.exists(index_dir):
+        return ChunkStore.open(index_dir)
+    if "chunks" in metadata:
+        return ChunkStore.from_chunks(metadata["chunks"])
+    raise RuntimeError(f"No chunk store ({COLUMNS_FILE}) or legacy chunks found in {index_dir}")
+
+
+def migrate(index_dir: str, keep_pickle_chunks: bool = False) -> int:
+    """
+    Convert a legacy metadata.pkl (with inline chunks) into a columnar store
+
+    Args:
+        index_dir: Index directory containing metadata.pkl
+        keep_pickle_chunks: Leave the chunk dicts in metadata.pkl as well
+
+    Returns:
+        Number of chunks migrated
+    """
+    metadata_file = Path(index_dir) / "metadata.pkl"
+    with open(metadata_file, "rb") as f:
+        metadata = pickle.load(f)
+    if "chunks" not in metadata:
+        if ChunkStore.exists(index_dir) and not ChunkStore.open(index_dir).has_languages:
+            return add_language_column(index_dir)
+        print(f"✓ {metadata_file} has no inline chunks; nothing to migrate")
+        return 0
+
+    num_chunks = write_chunk_store(metadata["chunks"], index_dir)
+    if not keep_pickle_chunks:
+        del metadata["chunks"]
+    metadata["chunk_store"] = STORE_FORMAT
+    with open(metadata_file, "wb") as f:
+        pickle.dump(metadata, f)
+    print(f"✓ Migrated {num_chunks} chunks to {STORE_FORMAT} store in {index_dir}")
+    return num_chunks
+
+
+def add_language_column(index_dir: str) -> int:
+    """
+    Upgrade a columnar-v1 store in place with the per-chunk language column
+
+    Returns:
+        Number of chunks upgraded
+    """
+    store = ChunkStore.open(index_dir)
+    columns = np.zeros(len(store), dtype=CHUNK_DTYPE)
+    for name in store.columns.dtype.names:
+        columns[name] = store.columns[name]
+    columns["lang"] = [chunk_language(store.text(row)) for row in range(len(store))]
+    del store
+    _save_array(Path(index_dir) / COLUMNS_FILE, columns)
+
+    docs_file = Path(index_dir) / DOCS_FILE
+    with open(docs_file, "r", encoding="utf-8") as f:
+        docs = json.load(f)
+    docs["format"] = STORE_FORMAT
+    _save_json(docs_file, docs)
+    print(f"✓ Added language column to {len(columns)} chunks in {index_dir}")
+    return len(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar chunk store utilities")
+    parser.add_argument("--migrate", type=str, metavar="INDEX_DIR",
+                        help="Convert a legacy metadata.pkl (or columnar-v1 store) to "
+                             f"the {STORE_FORMAT} store")
+    parser.add_argument("--keep-pickle-chunks", action="store_true",
+                        help="Keep inline chunks in metadata.pkl after migrating")
+    args = parser.parse_args()
+
+    if not args.migrate:
+        parser.print_help()
+        return 1
+    migrate(args.migrate, keep_pickle_chunks=args.keep_pickle_chunks)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,150 @@
+"""
+Token-budget chunking with the embedding model's fast tokenizer
+
+Character-count chunks don't map to a fixed number of model tokens:
+Devanagari text tokenizes into far more tokens per character than
+English, so a 700-character Hindi chunk is silently truncated at the
+model's max_seq_length while an English one may use half the window.
+
+TokenChunker tokenizes each page once and cuts chunks on token indices,
+preferring a sentence end, then a word start, in the second half of the
+token budget. The tokenizer's offset mapping turns token ranges back
+into exact character spans of the page, so chunk text is always
+text[char_start:char_end].
+
+Usage:
+    python ingest.py --chunking tokens
+    python ingest.py --chunking tokens --chunk-tokens 256 --chunk-overlap-tokens 32
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Sentence ends (Latin and Devanagari danda) and paragraph breaks
+SENTENCE_END = re.compile(r"[.?!।](?=\s)|\n\n")
+
+
+def _last_cut(cuts: np.ndarray, low: int, high: int) -> Optional[int]:
+    """Largest cut in (low, high]"""
+    i = np.searchsorted(cuts, high, side="right") - 1
+    return int(cuts[i]) if i >= 0 and cuts[i] > low else None
+
+
+def _first_cut(cuts: np.ndarray, low: int, high: int) -> Optional[int]:
+    """Smallest cut in [low, high)"""
+    i = np.searchsorted(cuts, low, side="left")
+    return int(cuts[i]) if i < len(cuts) and cuts[i] < high else None
+
+
+def token_spans(text: str, offsets: np.ndarray, max_tokens: int,
+                overlap_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Split a tokenized text into overlapping runs of at most max_tokens tokens
+
+    Args:
+        text: The tokenized text
+        offsets: (num_tokens x 2) character offsets of each token in text
+        max_tokens: Token budget per chunk
+        overlap_tokens: Tokens shared by consecutive chunks
+
+    Returns:
+        (start, end) token index ranges, end exclusive
+    """
+    num_tokens = len(offsets)
+    if num_tokens == 0:
+        return []
+    starts, ends = offsets[:, 0], offsets[:, 1]
+
+    # Cutting before token i is clean if i starts a word (whitespace before it)
+    word_cuts = np.flatnonzero(starts[1:] > ends[:-1]) + 1
+    sentence_ends = np.array([match.end() for match in SENTENCE_END.finditer(text)],
+                             dtype=np.int64)
+    sentence_cuts = np.unique(np.searchsorted(starts, sentence_ends, side="left"))
+
+    spans = []
+    start = 0
+    while True:
+        end = start + max_tokens
+        if end >= num_tokens:
+            spans.append((start, num_tokens))
+            return spans
+
+        # Prefer a sentence end, then a word start, in the second half of the window
+        floor = start + max_tokens // 2
+        cut = _last_cut(sentence_cuts, floor, end)
+        if cut is None:
+            cut = _last_cut(word_cuts, floor, end)
+        end = cut if cut is not None else end
+        spans.append((start, end))
+
+        # Begin the overlap on a word so it re-tokenizes the same way
+        next_start = end - overlap_tokens
+        word_start = _first_cut(word_cuts, next_start, end)
+        if word_start is not None:
+            next_start = word_start
+        start = max(next_start, start + 1)
+
+
+class TokenChunker:
+    """Cuts page text into chunks that fit the embedding model's token window"""
+
+    def __init__(self, tokenizer, max_tokens: int, overlap_tokens: int = 32):
+        """
+        Args:
+            tokenizer: Hugging Face fast tokenizer (needs offset mappings)
+            max_tokens: Token budget per chunk, excluding special tokens
+            overlap_tokens: Tokens shared by consecutive chunks
+
+        Raises:
+            ValueError: If the tokenizer is not a fast tokenizer or the budget is invalid
+        """
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("Token chunking needs a fast tokenizer (offset mappings)")
+        if max_tokens < 1 or not 0 <= overlap_tokens < max_tokens:
+            raise ValueError(
+                f"Invalid token budget: {max_tokens} tokens with {overlap_tokens} overlap"
+            )
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @classmethod
+    def from_model(cls, model, max_tokens: Optional[int] = None,
+                   overlap_tokens: int = 32) -> "TokenChunker":
+        """
+        Chunker for a SentenceTransformer model
+
+        Args:
+            model: Loaded SentenceTransformer
+            max_tokens: Token budget (default: the model's max_seq_length minus
+                special tokens, i.e. everything the model actually reads)
+            overlap_tokens: Tokens shared by consecutive chunks
+        """
+        tokenizer = model.tokenizer
+        if max_tokens is None:
+            max_tokens = model.max_seq_length - tokenizer.num_special_tokens_to_add(pair=False)
+        return cls(tokenizer, max_tokens, overlap_tokens)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Character spans of the chunks of text
+
+        Args:
+            text: Page text
+
+        Returns:
+            (char_start, char_end) of each chunk, end exclusive
+        """
+        encoding = self.tokenizer(text, add_special_tokens=False,
+                                  return_offsets_mapping=True, verbose=False)
+        offsets = np.array(encoding["offset_mapping"], dtype=np.int64).reshape(-1, 2)
+        return [
+            (int(offsets[start, 0]), int(offsets[end - 1, 1]))
+            for start, end in token_spans(text, offsets, self.max_tokens, self.overlap_tokens)
+        ]
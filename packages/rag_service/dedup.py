@@ -0,0 +1,139 @@
+"""
+Near-duplicate chunk detection with MinHash and LSH banding
+
+Circulars repeat running headers, footers and whole clauses, so a corpus
+holds many chunks that differ only in a page number or a few words. With
+`python ingest.py --dedup` such chunks are collapsed into the first
+(canonical) occurrence: only the canonical chunk is embedded and indexed,
+and the other (filename, page) locations are stored with it so citations
+still cover every place the text appears.
+
+Each chunk is reduced to word 3-shingles, and a 128-value MinHash
+signature estimates the Jaccard similarity of two chunks' shingle sets.
+Signatures are split into bands; chunks sharing any band are candidates,
+and a candidate is a duplicate when its estimated similarity reaches the
+threshold. The band layout is chosen so the LSH S-curve crosses just
+below the threshold.
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+NUM_PERM = 128
+SHINGLE_WORDS = 3
+# Mersenne prime above every 32-bit shingle hash; (a * x + b) fits in uint64
+PRIME = (1 << 61) - 1
+HASH_MASK = (1 << 32) - 1
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """32-bit hashes of the lower-cased word shingles of text"""
+    words = text.lower().split()
+    if len(words) <= size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                                 dtype=np.uint64, count=len(shingles)))
+
+
+def lsh_bands(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    (bands, rows per band) whose S-curve (1/bands)^(1/rows) crosses at or
+    just below threshold
+
+    Crossing below the threshold trades extra candidates (rejected by the
+    signature comparison) for few missed duplicates.
+    """
+    layouts = [(bands, num_perm // bands) for bands in range(1, num_perm + 1)
+               if num_perm % bands == 0]
+    crossing = {layout: (1 / layout[0]) ** (1 / layout[1]) for layout in layouts}
+    below = [layout for layout in layouts if crossing[layout] <= threshold]
+    if not below:
+        return min(layouts, key=crossing.get)
+    return max(below, key=crossing.get)
+
+
+class MinHasher:
+    """Fixed family of NUM_PERM universal hash functions"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # a < 2^29 keeps a * x + b below 2^61 for 32-bit x, so nothing overflows
+        self.a = rng.integers(1, 1 << 29, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingle_hashes(text)
+        return (((self.a * hashes + self.b) % PRIME) & HASH_MASK).min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate detector
+
+    Chunks are offered in order; the first of a group of near-duplicates
+    becomes canonical and later ones are reported as its duplicates.
+    Memory grows with the number of canonical chunks (one signature and
+    one bucket entry per band each).
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = NUM_PERM):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity of shingle sets at which
+                two chunks count as duplicates
+            num_perm: MinHash signature length
+
+        Raises:
+            ValueError: If threshold is not in (0, 1]
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Dedup threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self._buckets: List[Dict[bytes, int]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self._keys: List[int] = []
+        self.duplicates = 0
+
+    def add(self, key: int, text: str) -> Optional[int]:
+        """
+        Offer one chunk
+
+        Args:
+            key: Caller's id for the chunk (e.g. its chunk id)
+            text: Chunk text
+
+        Returns:
+            Key of the canonical chunk text duplicates, or None if the chunk
+            is new (it then becomes canonical itself)
+        """
+        signature = self.hasher.signature(text)
+        band_keys = [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+        candidates = {self._buckets[i][band] for i, band in enumerate(band_keys)
+                      if band in self._buckets[i]}
+        best, best_similarity = None, 0.0
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold and similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        if best is not None:
+            self.duplicates += 1
+            return self._keys[best]
+
+        position = len(self._keys)
+        self._signatures.append(signature)
+        self._keys.append(key)
+        for bucket, band in zip(self._buckets, band_keys):
+            bucket.setdefault(band, position)
+        return None
+
+    def __len__(self) -> int:
+        """Number of canonical chunks"""
+        return len(self._keys)
@@ -0,0 +1,228 @@
+"""
+Content-addressed on-disk cache of chunk embeddings
+
+Re-chunking (--chunk-size / --chunk-overlap), switching --index-type or
+rebuilding after a small corpus change re-embeds mostly the same chunk
+texts. ingest.py looks every chunk up here by (embedding model, hash of
+its text) and only runs the model on cache misses, so such rebuilds are
+dominated by I/O instead of encoding.
+
+One directory per model under the cache root:
+    meta.json     {"format": 1, "model": "...", "dim": 768}
+    keys.bin      16-byte BLAKE2b digests of the chunk texts, one per row
+    vectors.f32   raw float32 embeddings (rows x dim), memory-mapped for reads
+
+Both data files are append-only. Vectors are written before their keys,
+so a run that dies mid-append leaves at most a tail of unkeyed vectors,
+which is truncated on the next open. The cache assumes a single writer
+(one ingestion run at a time per cache directory).
+
+Usage:
+    python embedding_cache.py --stats ./models/embedding_cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+CACHE_FORMAT = 1
+KEY_BYTES = 16
+KEY_DTYPE = f"S{KEY_BYTES}"
+META_FILE = "meta.json"
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.f32"
+
+
+def text_key(text: str) -> bytes:
+    """Cache key of a chunk text"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+def model_dir_name(model_name: str) -> str:
+    """Filesystem-safe, collision-free directory name for a model name or path"""
+    readable = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name).strip("_.")[-64:]
+    digest = hashlib.blake2b(model_name.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{readable}-{digest}"
+
+
+class EmbeddingCache:
+    """Append-only embedding store for one model, looked up by text hash"""
+
+    def __init__(self, cache_dir: str, model_name: str, dim: int):
+        """
+        Open (or create) the cache of one model
+
+        Args:
+            cache_dir: Cache root shared by all models
+            model_name: Embedding model name or path
+            dim: Embedding dimension of the model
+
+        Raises:
+            ValueError: If the cache was written for another dimension
+        """
+        self.model_name = model_name
+        self.dim = dim
+        self.path = Path(cache_dir) / model_dir_name(model_name)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+        meta_file = self.path / META_FILE
+        if meta_file.exists():
+            with open(meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != CACHE_FORMAT or meta.get("dim") != dim:
+                raise ValueError(
+                    f"Embedding cache {self.path} holds format {meta.get('format')} / "
+                    f"dim {meta.get('dim')} vectors, expected format {CACHE_FORMAT} / dim {dim}"
+                )
+        else:
+            with open(meta_file, "w", encoding="utf-8") as f:
+                json.dump({"format": CACHE_FORMAT, "model": model_name, "dim": dim}, f)
+        self._load()
+
+    def _load(self):
+        keys_file = self.path / KEYS_FILE
+        vectors_file = self.path / VECTORS_FILE
+        keys_file.touch()
+        vectors_file.touch()
+
+        row_bytes = 4 * self.dim
+        count = min(keys_file.stat().st_size // KEY_BYTES,
+                    vectors_file.stat().st_size // row_bytes)
+        # Drop partial appends left by an interrupted run
+        if keys_file.stat().st_size != count * KEY_BYTES:
+            os.truncate(keys_file, count * KEY_BYTES)
+        if vectors_file.stat().st_size != count * row_bytes:
+            os.truncate(vectors_file, count * row_bytes)
+
+        keys = np.fromfile(keys_file, dtype=KEY_DTYPE, count=count)
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+        # Rows appended since open; merged into the sorted keys on the next open
+        self._new_rows: Dict[bytes, int] = {}
+        self.count = count
+        self._vectors = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def vectors(self) -> np.ndarray:
+        """Read-only memory map of every cached vector"""
+        if self._vectors is None or len(self._vectors) != self.count:
+            self._vectors = (
+                np.memmap(self.path / VECTORS_FILE, dtype=np.float32, mode="r",
+                          shape=(self.count, self.dim))
+                if self.count else np.empty((0, self.dim), dtype=np.float32)
+            )
+        return self._vectors
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Cache rows of the given keys (-1 where missing)"""
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if len(self._sorted_keys):
+            pos = np.searchsorted(self._sorted_keys, keys)
+            pos = np.minimum(pos, len(self._sorted_keys) - 1)
+            found = self._sorted_keys[pos] == keys
+            rows[found] = self._order[pos[found]]
+        if self._new_rows:
+            for i in np.flatnonzero(rows < 0):
+                rows[i] = self._new_rows.get(keys[i], -1)
+        return rows
+
+    def append(self, keys: np.ndarray, vectors: np.ndarray):
+        """Add vectors for keys that are not cached yet"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with open(self.path / VECTORS_FILE, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self.path / KEYS_FILE, "ab") as f:
+            f.write(np.asarray(keys, dtype=KEY_DTYPE).tobytes())
+        for offset, key in enumerate(keys):
+            self._new_rows[key] = self.count + offset
+        self.count += len(keys)
+
+    def encode(self, texts: Sequence[str],
+               encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embeddings of texts, running encode_fn only on texts not in the cache
+
+        Duplicate texts within one call are encoded once.
+
+        Args:
+            texts: Chunk texts
+            encode_fn: Model call mapping a list of texts to (n x dim) embeddings
+
+        Returns:
+            float32 array (len(texts) x dim) in the order of texts
+        """
+        keys = np.array([text_key(text) for text in texts], dtype=KEY_DTYPE)
+        rows = self.lookup(keys)
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        hit = rows >= 0
+        if hit.any():
+            # Sorted reads keep memory-map access sequential
+            hit_rows = rows[hit]
+            order = np.argsort(hit_rows)
+            gathered = np.empty((len(hit_rows), self.dim), dtype=np.float32)
+            gathered[order] = self.vectors()[hit_rows[order]]
+            embeddings[hit] = gathered
+
+        missing = np.flatnonzero(~hit)
+        if len(missing):
+            new_keys, first, inverse = np.unique(
+                keys[missing], return_index=True, return_inverse=True
+            )
+            encoded = np.asarray(encode_fn([texts[missing[i]] for i in first]),
+                                 dtype=np.float32)
+            embeddings[missing] = encoded[inverse.reshape(-1)]
+            self.append(new_keys, encoded)
+
+        self.hits += int(hit.sum())
+        self.misses += len(missing)
+        return embeddings
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "path": str(self.path),
+            "vectors": self.count,
+            "size_mb": self.count * (4 * self.dim + KEY_BYTES) / 1e6,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding cache utilities")
+    parser.add_argument("--stats", type=str, metavar="CACHE_DIR",
+                        help="Show the models and vector counts held in a cache directory")
+    args = parser.parse_args()
+
+    if not args.stats:
+        parser.print_help()
+        return 1
+    model_dirs = sorted(path for path in Path(args.stats).glob(f"*/{META_FILE}"))
+    if not model_dirs:
+        print(f"✗ No embedding caches in {args.stats}")
+        return 1
+    for meta_file in model_dirs:
+        with open(meta_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        stats = EmbeddingCache(args.stats, meta["model"], meta["dim"]).stats()
+        print(f"{meta['model']}: {stats['vectors']} vectors (dim {meta['dim']}, "
+              f"{stats['size_mb']:.1f} MB) in {stats['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,192 @@
+"""
+Length-bucketed, multi-process chunk embedding for ingestion
+
+SentenceTransformer.encode pads every batch to its longest text. Chunk
+lengths differ a lot between English and Devanagari pages (in tokens),
+so fixed batches of 32 spend much of their compute on padding, and one
+process leaves most build-machine cores idle.
+
+BucketedEncoder sorts texts by token length, cuts them into batches
+whose padded size (batch size x longest text) stays within a token
+budget - short texts go in large batches, long ones in small - and
+returns embeddings in the original order. With workers > 1 the batches
+are spread over a pool of processes, each holding its own copy of the
+model and limited to its share of the cores, so embeddings/sec scale
+with the core count instead of one process's intra-op threads.
+
+Usage:
+    python ingest.py --encode-workers 4
+    python ingest.py --encode-workers 0 --encode-batch-tokens 16384
+"""
+
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+# Padded tokens per batch; 32 texts of 256 tokens, the old fixed batch
+MAX_BATCH_TOKENS = 8192
+MAX_BATCH_SIZE = 256
+
+# Model of this worker process, loaded once by the pool initializer
+_worker_model = None
+
+
+def available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_sentence_transformer(model_name: str):
+    """Default model loader of the worker processes"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, token=False)
+
+
+def token_lengths(model, texts: Sequence[str]) -> np.ndarray:
+    """
+    Tokens the model will actually read for each text
+
+    Uses the model's tokenizer when it has one (capped at max_seq_length,
+    where the model truncates) and falls back to character counts.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    encoded = tokenizer(list(texts), add_special_tokens=True, verbose=False)["input_ids"]
+    lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(texts))
+    max_seq_length = getattr(model, "max_seq_length", None)
+    return np.minimum(lengths, max_seq_length) if max_seq_length else lengths
+
+
+def plan_batches(lengths: np.ndarray, max_batch_tokens: int = MAX_BATCH_TOKENS,
+                 max_batch_size: int = MAX_BATCH_SIZE) -> List[np.ndarray]:
+    """
+    Group texts of similar length into batches within a padded-token budget
+
+    Texts are taken longest first, so each batch's first text is its
+    longest and sets the batch size: max_batch_tokens // its length.
+
+    Args:
+        lengths: Length (tokens) of each text
+        max_batch_tokens: Budget for batch size x longest length
+        max_batch_size: Upper bound on texts per batch
+
+    Returns:
+        Index arrays into lengths, one per batch; together a permutation
+    """
+    order = np.argsort(-np.asarray(lengths), kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(1, int(lengths[order[start]]))
+        size = max(1, min(max_batch_size, max_batch_tokens // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def _init_worker(model_loader: Callable, threads: int):
+    global _worker_model
+    from inference import configure_threads
+    configure_threads(threads)
+    _worker_model = model_loader()
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=len(texts), show_progress_bar=False,
+                                convert_to_numpy=True)
+
+
+class BucketedEncoder:
+    """Embeds chunk texts in length buckets, optionally across worker processes"""
+
+    def __init__(self, model, model_name: str, workers: int = 1,
+                 threads_per_worker: int = 0,
+                 max_batch_tokens: int = MAX_BATCH_TOKENS,
+                 max_batch_size: int = MAX_BATCH_SIZE,
+                 model_loader: Optional[Callable] = None):
+        """
+        Args:
+            model: Loaded model of this process; measures text lengths and
+                encodes when workers == 1
+            model_name: Model the worker processes load
+            workers: Encoding processes (1 = encode in-process)
+            threads_per_worker: Intra-op threads per worker (0 = split the
+                available cores evenly)
+            max_batch_tokens: Padded-token budget per batch
+            max_batch_size: Upper bound on texts per batch
+            model_loader: Picklable zero-argument callable returning the
+                worker model (default: SentenceTransformer(model_name))
+
+        Raises:
+            ValueError: If the batch budget is invalid
+        """
+        if max_batch_tokens < 1 or max_batch_size < 1:
+            raise ValueError(
+                f"Invalid batch budget: {max_batch_tokens} tokens, {max_batch_size} texts"
+            )
+        self.model = model
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, available_cores() // self.workers)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.model_loader = model_loader or functools.partial(load_sentence_transformer,
+                                                              model_name)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Worker pool, started on first use (None with one worker)"""
+        if self.workers > 1 and self._pool is None:
+            # spawn: forking a process that already ran torch can deadlock its thread pools
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_loader, self.threads_per_worker),
+            )
+        return self._pool
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            Raw (unnormalized) float32 embeddings (len(texts) x dim), in the
+            order of texts
+        """
+        if not texts:
+            dim = self.model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+
+        batches = plan_batches(token_lengths(self.model, texts),
+                               self.max_batch_tokens, self.max_batch_size)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+        pool = self._get_pool()
+        if pool is None:
+            encoded = (self.model.encode(batch, batch_size=len(batch), show_progress_bar=False,
+                                         convert_to_numpy=True)
+                       for batch in batch_texts)
+        else:
+            encoded = pool.map(_encode_batch, batch_texts)
+
+        embeddings = None
+        for batch, vectors in zip(batches, encoded):
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            embeddings[batch] = vectors
+        return embeddings
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,198 @@
+"""
+Metadata filters evaluated inside the index search
+
+Turns filename / page-range / language filters into FAISS ID selectors
+(and boolean masks for BM25), so vectors outside the filter are skipped
+instead of being scored and then discarded.
+
+ingest.py writes each document's chunks as one contiguous run of chunk
+store rows in page order. FilterIndex precomputes those per-document runs, so
+filename and page filters resolve to a few label ranges by binary search:
+a single range becomes an IDSelectorRange, anything else (several
+documents, language filters) an IDSelectorBitmap.
+
+Selections are computed over chunk store rows. After an incremental
+update the FAISS labels are the chunk ids (ascending with the rows, with
+gaps where documents were removed), and selectors are translated to them.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from caching import LRUCache
+from chunk_store import ChunkStore
+
+
+class SearchFilter(NamedTuple):
+    """Hashable filter spec (doubles as a cache and batching key)"""
+    filenames: Optional[Tuple[str, ...]] = None
+    page_min: Optional[int] = None
+    page_max: Optional[int] = None
+    language: Optional[str] = None
+
+
+class Selection:
+    """Rows matched by one filter, as row ranges and/or a boolean mask"""
+
+    def __init__(self, num_rows: int, ranges: Optional[np.ndarray] = None,
+                 mask: Optional[np.ndarray] = None, labels: Optional[np.ndarray] = None):
+        self.num_rows = num_rows
+        self.ranges = ranges
+        # FAISS label of every row (None = labels are the rows themselves)
+        self.labels = labels
+        if mask is None:
+            mask = np.zeros(num_rows, dtype=bool)
+            for start, end in ranges:
+                mask[start:end] = True
+        self.mask = mask
+        self.count = int(mask.sum())
+        self._bitmap: Optional[np.ndarray] = None
+        self._selector: Optional[faiss.IDSelector] = None
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Matched FAISS labels, ascending"""
+        rows = np.flatnonzero(self.mask)
+        return rows if self.labels is None else self.labels[rows]
+
+    def selector(self) -> faiss.IDSelector:
+        """FAISS selector for the matched labels (built once, kept alive here)"""
+        if self._selector is None:
+            if self.ranges is not None and len(self.ranges) == 1:
+                start, end = (int(bound) for bound in self.ranges[0])
+                if self.labels is not None:
+                    # Labels ascend with rows, so a row run is a label run
+                    start, end = int(self.labels[start]), int(self.labels[end - 1]) + 1
+                if self.labels is None:
+                    try:
+                        # IVF lists of a fresh build hold labels in insertion
+                        # (ascending) order
+                        self._selector = faiss.IDSelectorRange(start, end, True)
+                    except TypeError:  # FAISS < 1.7.4 has no assume_sorted
+                        self._selector = faiss.IDSelectorRange(start, end)
+                else:
+                    # IVF remove_ids (incremental updates) moves the last entry of
+                    # a list into each freed slot, so the lists are no longer sorted
+                    self._selector = faiss.IDSelectorRange(start, end)
+            else:
+                mask = self.mask
+                if self.labels is not None:
+                    mask = np.zeros(int(self.labels[-1]) + 1 if len(self.labels) else 0, dtype=bool)
+                    mask[self.labels[self.mask]] = True
+                self._bitmap = np.packbits(mask, bitorder="little")
+                self._selector = faiss.IDSelectorBitmap(len(self._bitmap),
+                                                        faiss.swig_ptr(self._bitmap))
+        return self._selector
+
+
+class FilterIndex:
+    """Per-document row ranges and page/language columns of a chunk store"""
+
+    def __init__(self, chunks: ChunkStore, cache_size: int = 64,
+                 labels: Optional[np.ndarray] = None):
+        """
+        Args:
+            chunks: Chunk store
+            cache_size: Resolved filters kept in memory
+            labels: Ascending FAISS label per row (None = label is the row)
+        """
+        columns = chunks.columns
+        self.num_rows = len(chunks)
+        self.labels = labels
+        self.doc_id = np.asarray(columns["doc_id"])
+        self.page_num = np.asarray(columns["page_num"])
+        self.lang = np.asarray(columns["lang"]) if chunks.has_languages else None
+        self.documents = {name: doc_id for doc_id, name in enumerate(chunks.documents)}
+        self._cache = LRUCache(max_entries=cache_size)
+
+        # [start, end) row run of every document; only usable for range
+        # lookups when the run is contiguous and in page order
+        num_docs = len(chunks.documents)
+        rows = np.arange(self.num_rows)
+        self.doc_start = np.full(num_docs, self.num_rows, dtype=np.int64)
+        self.doc_end = np.zeros(num_docs, dtype=np.int64)
+        np.minimum.at(self.doc_start, self.doc_id, rows)
+        np.maximum.at(self.doc_end, self.doc_id, rows + 1)
+        counts = np.bincount(self.doc_id, minlength=num_docs)
+        page_steps = np.diff(self.page_num) >= 0
+        self.contiguous = bool(
+            np.all(counts == np.maximum(self.doc_end - self.doc_start, 0))
+            and np.all(page_steps | (np.diff(self.doc_id) != 0))
+            and (labels is None or np.all(np.diff(labels) > 0))
+        )
+
+    @property
+    def supports_language(self) -> bool:
+        return self.lang is not None
+
+    def select(self, search_filter: SearchFilter) -> Selection:
+        """
+        Resolve a filter to the rows it matches (cached per filter)
+
+        Args:
+            search_filter: Filter spec
+
+        Returns:
+            Selection
+        """
+        selection = self._cache.get(search_filter)
+        if selection is None:
+            selection = self._resolve(search_filter)
+            self._cache.put(search_filter, selection)
+        return selection
+
+    def _resolve(self, search_filter: SearchFilter) -> Selection:
+        page_min = search_filter.page_min
+        page_max = search_filter.page_max
+
+        if self.contiguous:
+            ranges = self._ranges(search_filter.filenames, page_min, page_max)
+            if search_filter.language is None:
+                return Selection(self.num_rows, ranges=ranges, labels=self.labels)
+            mask = Selection(self.num_rows, ranges=ranges).mask
+        else:
+            mask = np.ones(self.num_rows, dtype=bool)
+            if search_filter.filenames is not None:
+                doc_ids = [self.documents[name] for name in search_filter.filenames
+                           if name in self.documents]
+                mask &= np.isin(self.doc_id, doc_ids)
+            if page_min is not None:
+                mask &= self.page_num >= page_min
+            if page_max is not None:
+                mask &= self.page_num <= page_max
+
+        if search_filter.language is not None:
+            if self.lang is None:
+                raise ValueError("Index has no language column; re-run ingest.py "
+                                 "or python chunk_store.py --migrate")
+            mask &= self.lang == search_filter.language.encode("ascii")
+        return Selection(self.num_rows, mask=mask, labels=self.labels)
+
+    def _ranges(self, filenames: Optional[Tuple[str, ...]], page_min: Optional[int],
+                page_max: Optional[int]) -> np.ndarray:
+        """Row ranges for the documents/pages, via binary search per document"""
+        if filenames is None:
+            doc_ids = range(len(self.doc_start))
+        else:
+            doc_ids = sorted({self.documents[name] for name in filenames
+                              if name in self.documents})
+
+        ranges = []
+        for doc_id in doc_ids:
+            start, end = int(self.doc_start[doc_id]), int(self.doc_end[doc_id])
+            if start >= end:
+                continue
+            pages = self.page_num[start:end]
+            if page_min is not None:
+                start += int(np.searchsorted(pages, page_min, side="left"))
+            if page_max is not None:
+                end = int(self.doc_start[doc_id]) + int(np.searchsorted(pages, page_max, side="right"))
+            if start < end:
+                # Merge with the previous run when adjacent
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1][1] = end
+                else:
+                    ranges.append([start, end])
+        return np.array(ranges, dtype=np.int64).reshape(-1, 2)
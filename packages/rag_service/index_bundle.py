@@ -0,0 +1,249 @@
+"""
+Loading, versioning and hot-swapping of retrieval indexes
+
+Everything built from one ingest run (FAISS index, chunk store, BM25
+postings, filter ranges, metadata) is loaded into one IndexBundle. The
+server publishes a bundle with a single reference assignment and every
+request works against the bundle it started with, so a reload never mixes
+labels from one index with chunks from another.
+
+Index directory layouts under INDEX_PATH:
+
+    flat (legacy)    INDEX_PATH/faiss_index.bin, metadata.pkl, ...
+    versioned        INDEX_PATH/<version>/faiss_index.bin, ...
+                     INDEX_PATH/CURRENT   (name of the live version)
+
+`python ingest.py --versioned` writes a new version directory and then
+repoints CURRENT atomically. Without CURRENT the newest version wins.
+
+Indexes updated by `ingest.py --incremental` are labelled by chunk id
+rather than by chunk store row; IndexBundle.rows() maps search results
+back to rows. Updated flat and HNSW indexes are IndexIDMap2 wrappers
+whose ids follow the rows, so the bundle searches the wrapped index
+directly (FAISS 1.7.4 rejects search parameters on IndexIDMap).
+
+Indexes built with --shards N have shards.json and one file per shard
+instead of faiss_index.bin; they load as a sharded.ShardedIndex.
+
+Indexes built with --storage fp16/int8 come with their full-precision
+vectors (vectors.f32), which are memory-mapped for exact re-scoring.
+"""
+
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from chunk_store import ChunkStore, load_chunk_store
+from filters import FilterIndex
+from lexical import BM25Index
+from sharding import SHARDS_FILE, ShardedIndex
+from vector_index import (
+    FULL_VECTORS_FILE, apply_search_defaults, file_digest, read_index, unwrap_id_map
+)
+
+
+INDEX_FILE = "faiss_index.bin"
+METADATA_FILE = "metadata.pkl"
+CURRENT_FILE = "CURRENT"
+
+
+def has_index(index_dir: Path) -> bool:
+    """Whether index_dir holds a (single or sharded) FAISS index"""
+    return (index_dir / INDEX_FILE).exists() or (index_dir / SHARDS_FILE).exists()
+
+
+def list_versions(index_path: str) -> List[str]:
+    """Version directories under index_path, oldest first"""
+    root = Path(index_path)
+    if not root.is_dir():
+        return []
+    return sorted(entry.name for entry in root.iterdir()
+                  if entry.is_dir() and has_index(entry))
+
+
+def current_version(index_path: str) -> Optional[str]:
+    """Live version named by CURRENT, else the newest version (None = flat layout)"""
+    pointer = Path(index_path) / CURRENT_FILE
+    if pointer.exists():
+        return pointer.read_text(encoding="utf-8").strip() or None
+    versions = list_versions(index_path)
+    return versions[-1] if versions else None
+
+
+def resolve_index_dir(index_path: str, version: Optional[str] = None) -> Path:
+    """
+    Directory holding the index files to load
+
+    Args:
+        index_path: INDEX_PATH
+        version: Explicit version (default: CURRENT / newest)
+
+    Returns:
+        Path of the version directory, or index_path itself for the flat layout
+    """
+    root = Path(index_path)
+    if version is None:
+        if has_index(root):
+            return root
+        version = current_version(index_path)
+        if version is None:
+            return root
+
+    if Path(version).name != version:
+        raise ValueError(f"Invalid index version name: {version}")
+    return root / version
+
+
+def set_current(index_path: str, version: str):
+    """Atomically point CURRENT at a version directory"""
+    root = Path(index_path)
+    if not has_index(root / version):
+        raise FileNotFoundError(f"No index version {version} in {index_path}")
+    tmp = root / f".{CURRENT_FILE}.tmp"
+    tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp, root / CURRENT_FILE)
+
+
+class IndexBundle:
+    """FAISS index plus everything derived from the same ingest run"""
+
+    def __init__(self, index: faiss.Index, chunks: ChunkStore, metadata: Dict[str, Any],
+                 index_params: Optional[Dict[str, Any]] = None,
+                 bm25: Optional[BM25Index] = None, version: str = "unversioned",
+                 path: Optional[Path] = None, vectors: Optional[np.ndarray] = None):
+        self.index = index
+        self.chunks = chunks
+        self.metadata = metadata
+        self.index_params = index_params or metadata.get('index_params', {'index_type': 'flat'})
+        self.bm25 = bm25
+        # Full-precision vectors by label, for re-scoring a quantized index
+        self.vectors = vectors
+        # Ascending FAISS label of each row, when labels aren't the rows themselves
+        self.labels = (np.asarray(chunks.columns["chunk_id"], dtype=np.int64)
+                       if metadata.get('id_mapped') else None)
+        if self.labels is not None:
+            inner = unwrap_id_map(index, self.labels)
+            if inner is not None:
+                # ID-mapped flat/HNSW: positions in the wrapped index are rows
+                self.index, self.labels = inner, None
+        self.filters = FilterIndex(chunks, labels=self.labels)
+        self.version = version
+        self.path = path
+
+    @classmethod
+    def load(cls, index_dir: Path, mmap: bool = False, nprobe: int = 0,
+             ef_search: int = 0, shard_threads: int = 0) -> "IndexBundle":
+        """
+        Load a bundle from one index directory (blocking)
+
+        Args:
+            index_dir: Directory written by ingest.py
+            mmap: Memory-map the FAISS index
+            nprobe: IVF nprobe override (0 = value stored by ingest.py)
+            ef_search: HNSW efSearch override (0 = value stored by ingest.py)
+            shard_threads: Threads searching a sharded index (0 = one per shard)
+
+        Returns:
+            IndexBundle
+        """
+        index_dir = Path(index_dir)
+        if not index_dir.exists():
+            raise RuntimeError(
+                f"Index directory not found: {index_dir}\n"
+                f"Run 'python ingest.py' first to create the index."
+            )
+
+        # Load FAISS index (search defaults of shards are applied per shard)
+        index_file = index_dir / INDEX_FILE
+        sharded = (index_dir / SHARDS_FILE).exists()
+        if not sharded and not index_file.exists():
+            raise RuntimeError(f"FAISS index file not found: {index_file}")
+
+        if sharded:
+            print(f"Loading sharded FAISS index from {index_dir} (mmap: {mmap})...")
+            index = ShardedIndex.read(str(index_dir), mmap=mmap, nprobe=nprobe,
+                                      ef_search=ef_search, threads=shard_threads)
+            print(f"✓ Loaded {len(index.shards)} shards with {index.ntotal} vectors")
+        else:
+            print(f"Loading FAISS index from {index_file} (mmap: {mmap})...")
+            index = read_index(str(index_file), mmap=mmap)
+            print(f"✓ Loaded index with {index.ntotal} vectors")
+
+        # Load metadata
+        metadata_file = index_dir / METADATA_FILE
+        if not metadata_file.exists():
+            raise RuntimeError(f"Metadata file not found: {metadata_file}")
+
+        print(f"Loading metadata from {metadata_file}...")
+        with open(metadata_file, 'rb') as f:
+            metadata = pickle.load(f)
+
+        # Memory-map the columnar chunk store (or convert a legacy inline pickle)
+        chunks = load_chunk_store(str(index_dir), metadata)
+        metadata.pop('chunks', None)
+        print(f"✓ Loaded metadata for {len(chunks)} chunks")
+        if len(chunks) != index.ntotal:
+            raise RuntimeError(
+                f"Index has {index.ntotal} vectors but the chunk store has {len(chunks)} chunks"
+            )
+
+        # Apply search-time knobs for approximate indexes (env overrides metadata)
+        index_params = metadata.get('index_params', {'index_type': 'flat'})
+        if not sharded:
+            apply_search_defaults(index, index_params, nprobe=nprobe, ef_search=ef_search)
+        print(f"✓ Index type: {index_params['index_type']} "
+              f"({index_params.get('storage', 'float32')} storage)")
+
+        # Full-precision copy of quantized vectors (read lazily through the page cache)
+        vectors = None
+        vectors_file = index_dir / FULL_VECTORS_FILE
+        if index_params.get('storage', 'float32') != 'float32' and vectors_file.exists():
+            vectors = np.memmap(vectors_file, dtype=np.float32, mode='r',
+                                shape=(index.ntotal, index.d))
+            print(f"✓ Mapped full-precision vectors for re-scoring from {vectors_file}")
+
+        # BM25 postings for lexical / hybrid mode (absent in indexes built before it)
+        bm25 = None
+        if BM25Index.exists(str(index_dir)):
+            bm25 = BM25Index.load(str(index_dir))
+            print(f"✓ Loaded BM25 index ({len(bm25.terms)} terms)")
+        else:
+            print("⚠ No BM25 index found; lexical/hybrid retrieval disabled (re-run ingest.py)")
+
+        # Content hash of the index file plus build time identifies this index
+        index_hash = metadata.get('index_hash') or file_digest(str(index_file))
+        version = f"{index_hash[:16]}@{metadata.get('created_at', 'unknown')}"
+
+        return cls(index, chunks, metadata, index_params=index_params, bm25=bm25,
+                   version=version, path=index_dir, vectors=vectors)
+
+    def rows(self, labels: np.ndarray) -> np.ndarray:
+        """Chunk store rows for FAISS search results (-1 stays -1)"""
+        if self.labels is None or len(self.labels) == 0:
+            return labels
+        rows = np.minimum(np.searchsorted(self.labels, labels), len(self.labels) - 1)
+        return np.where((labels >= 0) & (self.labels[rows] == labels), rows, -1)
+
+    def close(self):
+        """Release the search threads of a sharded index"""
+        if isinstance(self.index, ShardedIndex):
+            self.index.close()
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary for the admin/status endpoints"""
+        return {
+            "version": self.version,
+            "path": str(self.path) if self.path is not None else None,
+            "embedding_model": self.metadata.get('embedding_model'),
+            "created_at": self.metadata.get('created_at'),
+            "num_chunks": len(self.chunks),
+            "index_type": self.index_params.get('index_type'),
+            "storage": self.index_params.get('storage', 'float32'),
+            "shards": self.index_params.get('num_shards', 1),
+            "rescore": self.vectors is not None,
+            "bm25": self.bm25 is not None,
+        }
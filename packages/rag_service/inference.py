@@ -0,0 +1,117 @@
+"""
+Inference executor for the RAG retrieval service
+
+Embedding and FAISS calls are blocking and CPU-bound. Running them directly
+inside `async def` endpoints stalls the uvicorn event loop, so every other
+request (including /health and /status) waits behind a slow query. This
+module provides a dedicated, bounded thread pool those calls go through.
+Both PyTorch and FAISS release the GIL in their kernels, so concurrent
+requests genuinely overlap.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import faiss
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference queue has no free slots"""
+
+
+def configure_threads(torch_threads: int = 0, faiss_threads: int = 0):
+    """
+    Apply intra-op thread limits for torch and FAISS (OpenMP)
+
+    Args:
+        torch_threads: torch.set_num_threads value (0 = library default)
+        faiss_threads: faiss.omp_set_num_threads value (0 = library default)
+    """
+    if torch_threads > 0 and TORCH_AVAILABLE:
+        torch.set_num_threads(torch_threads)
+    if faiss_threads > 0:
+        faiss.omp_set_num_threads(faiss_threads)
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking inference calls
+
+    At most `max_workers` jobs run at once and at most `max_queue` more may
+    wait for a worker; further submissions fail fast with InferenceQueueFull
+    so overload turns into 503s instead of unbounded latency.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32):
+        """
+        Initialize the executor
+
+        Args:
+            max_workers: Worker threads (0 = run inline on the caller's thread)
+            max_queue: Jobs allowed to wait for a free worker
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+            if max_workers > 0 else None
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the inference pool and await its result
+
+        Raises:
+            InferenceQueueFull: If all worker and queue slots are taken
+        """
+        if self._pool is None:
+            # Legacy inline mode: blocks the event loop (kept for benchmarking)
+            return fn(*args, **kwargs)
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise InferenceQueueFull(
+                f"Inference queue full ({self.max_workers} running, {self.max_queue} queued)"
+            )
+
+        with self._lock:
+            self.in_flight += 1
+
+        future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        # Release the slot when the job really finishes, even if the caller
+        # was cancelled while waiting
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size and queue counters"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
@@ -8,6 +8,16 @@ and builds a FAISS vector index for semantic search.
 Usage:
     python ingest.py --data-dir ../../data --output-dir ./index
     python ingest.py --data-dir ../../data --chunk-size 700 --overlap 100
+    python ingest.py --data-dir ../../data --chunking tokens --chunk-overlap-tokens 32
+    python ingest.py --data-dir ../../data --index-type hnsw --ef-search 64
+    python ingest.py --data-dir ../../data --index-type ivf-pq --nlist 256 --pq-m 64
+    python ingest.py --data-dir ../../data --output-dir ./index --versioned
+    python ingest.py --data-dir ../../data --output-dir ./index --incremental
+    python ingest.py --data-dir ../../data --workers 8
+    python ingest.py --data-dir ../../data --encode-workers 4
+    python ingest.py --data-dir ../../data --storage int8
+    python ingest.py --data-dir ../../data --shards 4 --shard-by document
+    python ingest.py --data-dir ../../data --dedup --dedup-threshold 0.8
 
 Author: Shankh.ai Team
 """
@@ -16,8 +26,13 @@ import os
 import json
 import argparse
 import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, Iterator, List, Dict, Sequence, Tuple, Optional, Union
 from datetime import datetime
 
 import numpy as np
@@ -25,6 +40,20 @@ import faiss
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+from chunk_store import STORE_FORMAT, ChunkStoreWriter, load_chunk_store
+from chunking import TokenChunker
+from dedup import NearDuplicateIndex
+from embedding_cache import EmbeddingCache
+from encoding_pool import MAX_BATCH_TOKENS, BucketedEncoder, available_cores
+from index_bundle import resolve_index_dir, set_current
+from lexical import BM25_FILE, BM25Builder
+from manifest import IngestManifest
+from sharding import SHARD_BY, ShardedIndex, ShardedIndexBuilder
+from vector_index import (
+    FULL_VECTORS_FILE, INDEX_TYPES, STORAGE_TYPES, StreamingIndexBuilder, resolve_index_params,
+    create_index, train_index, update_index, file_digest
+)
+
 # PDF processing libraries (multiple for robustness)
 try:
     import pdfplumber
@@ -47,6 +76,134 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
+# Page batches handed out per extraction worker (smaller = better balance)
+BATCHES_PER_WORKER = 4
+
+
+def count_pages(pdf_path: str) -> int:
+    """Number of pages in a PDF"""
+    if PDFPLUMBER_AVAILABLE:
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    if PYPDF_AVAILABLE:
+        return len(PdfReader(pdf_path).pages)
+    raise RuntimeError("No PDF library available")
+
+
+def extract_pages(pdf_path: str, page_nums: Sequence[int]) -> List[Tuple[int, str, Optional[str]]]:
+    """
+    Extract the text of some pages of one PDF
+    
+    Runs in extraction worker processes, so it only takes picklable
+    arguments. Pages fail independently: a page pdfplumber can't parse is
+    retried with pypdf, and if that fails too its error is returned
+    instead of aborting the batch.
+    
+    Args:
+        pdf_path: Path to PDF file
+        page_nums: 1-based page numbers, in the order to return them
+        
+    Returns:
+        (page_num, text, error) per requested page
+    """
+    results = []
+    plumber_pdf = pdfplumber.open(pdf_path) if PDFPLUMBER_AVAILABLE else None
+    reader = None
+    try:
+        for page_num in page_nums:
+            error = None
+            if plumber_pdf is not None:
+                try:
+                    results.append((page_num, plumber_pdf.pages[page_num - 1].extract_text() or "", None))
+                    continue
+                except Exception as e:
+                    error = f"pdfplumber: {type(e).__name__}: {e}"
+            if PYPDF_AVAILABLE:
+                try:
+                    if reader is None:
+                        reader = PdfReader(pdf_path)
+                    results.append((page_num, reader.pages[page_num - 1].extract_text() or "", None))
+                    continue
+                except Exception as e:
+                    error = f"{error}; " if error else ""
+                    error += f"pypdf: {type(e).__name__}: {e}"
+            results.append((page_num, "", error or "No PDF library available"))
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+    return results
+
+
+def _failed_batch(batch: Sequence[int], error: BaseException) -> List[Tuple[int, str, str]]:
+    return [(page_num, "", f"worker: {type(error).__name__}: {error}") for page_num in batch]
+
+
+def extract_pdf_pages(pdf_path: str, pool: Optional[Executor] = None, workers: int = 1,
+                      restart_pool: Optional[Callable[[], Executor]] = None
+                      ) -> Tuple[List[Tuple[int, str]], Dict[int, str]]:
+    """
+    Extract all pages of a PDF, optionally spread across a process pool
+    
+    Pages are split into contiguous batches (each worker opens the PDF
+    once per batch) and reassembled in page order.
+    
+    A worker that dies (e.g. a parser segfault) breaks the whole process
+    pool and every unfinished batch with it. With restart_pool, those
+    batches are rerun one at a time in fresh pools, so only the batch that
+    crashes its worker on its own is lost.
+    
+    Args:
+        pdf_path: Path to PDF file
+        pool: Process pool for extraction (None = extract in this process)
+        workers: Number of processes in the pool
+        restart_pool: Replaces a broken pool and returns the new one
+        
+    Returns:
+        ([(page_num, text)] for pages with text, {page_num: error} for failed pages)
+    """
+    page_nums = list(range(1, count_pages(pdf_path) + 1))
+    if pool is None or workers <= 1 or len(page_nums) <= 1:
+        results = extract_pages(pdf_path, page_nums)
+    else:
+        batch_size = max(1, -(-len(page_nums) // (workers * BATCHES_PER_WORKER)))
+        batches = [page_nums[i:i + batch_size] for i in range(0, len(page_nums), batch_size)]
+        try:
+            futures = [pool.submit(extract_pages, pdf_path, batch) for batch in batches]
+        except BrokenProcessPool:
+            # Broken by an earlier PDF
+            if restart_pool is None:
+                raise
+            pool = restart_pool()
+            futures = [pool.submit(extract_pages, pdf_path, batch) for batch in batches]
+        
+        batch_results: List[List[Tuple[int, str, Optional[str]]]] = []
+        unfinished = []
+        for i, (batch, future) in enumerate(zip(batches, futures)):
+            try:
+                batch_results.append(future.result())
+            except BrokenProcessPool as e:
+                batch_results.append(_failed_batch(batch, e))
+                unfinished.append(i)
+            except Exception as e:
+                batch_results.append(_failed_batch(batch, e))
+        
+        if unfinished and restart_pool is not None:
+            pool = restart_pool()
+            for i in unfinished:
+                try:
+                    batch_results[i] = pool.submit(extract_pages, pdf_path, batches[i]).result()
+                except BrokenProcessPool as e:
+                    # Crashed on its own: this is the batch to skip
+                    batch_results[i] = _failed_batch(batches[i], e)
+                    pool = restart_pool()
+                except Exception as e:
+                    batch_results[i] = _failed_batch(batches[i], e)
+        results = [result for batch in batch_results for result in batch]
+    
+    pages = [(page_num, text) for page_num, text, error in results if text]
+    failures = {page_num: error for page_num, _, error in results if error}
+    return pages, failures
+
 
 class DocumentChunk:
     """Represents a text chunk with metadata"""
@@ -79,7 +236,25 @@ class PDFIngestionPipeline:
     def __init__(self, 
                  embedding_model: str = None,
                  chunk_size: int = 700,
-                 chunk_overlap: int = 100):
+                 chunk_overlap: int = 100,
+                 chunking: str = "chars",
+                 chunk_tokens: Optional[int] = None,
+                 chunk_overlap_tokens: int = 32,
+                 index_type: str = "flat",
+                 nlist: Optional[int] = None,
+                 nprobe: Optional[int] = None,
+                 hnsw_m: Optional[int] = None,
+                 ef_search: Optional[int] = None,
+                 pq_m: Optional[int] = None,
+                 train_size: int = 50000,
+                 storage: str = "float32",
+                 shards: int = 1,
+                 shard_by: str = "document",
+                 workers: int = 1,
+                 embedding_cache_dir: Optional[str] = None,
+                 dedup_threshold: Optional[float] = None,
+                 encode_workers: int = 1,
+                 encode_batch_tokens: int = MAX_BATCH_TOKENS):
         """
         Initialize the ingestion pipeline
         
@@ -87,6 +262,30 @@ class PDFIngestionPipeline:
             embedding_model: Name of sentence-transformer model (default from env)
             chunk_size: Maximum characters per chunk
             chunk_overlap: Overlap between consecutive chunks
+            chunking: "chars" (chunk_size/chunk_overlap characters) or "tokens"
+                (chunk_tokens/chunk_overlap_tokens of the model's tokenizer)
+            chunk_tokens: Token budget per chunk (default: the model's max_seq_length)
+            chunk_overlap_tokens: Token overlap between consecutive chunks
+            index_type: FAISS index type (flat, hnsw, ivf-flat, ivf-pq)
+            nlist: IVF lists (default ~4*sqrt(num_chunks))
+            nprobe: Default IVF lists probed per query
+            hnsw_m: HNSW graph degree
+            ef_search: Default HNSW search beam width
+            pq_m: PQ sub-quantizers for ivf-pq (must divide embedding dim)
+            train_size: Maximum vectors sampled to train IVF/PQ indexes
+            storage: Vector storage in the index (float32, fp16, int8); quantized
+                builds keep full-precision vectors on disk for exact re-scoring
+            shards: Number of FAISS index shards (1 = a single index)
+            shard_by: Assign chunks to shards per "document" or per "chunk"
+            workers: Processes for PDF text extraction (1 = in-process)
+            embedding_cache_dir: Reuse embeddings of previously seen chunk texts
+                from this directory (None = always encode)
+            dedup_threshold: Collapse chunks whose shingle sets are at least this
+                similar (estimated Jaccard) into one indexed chunk (None = keep all)
+            encode_workers: Processes generating embeddings, each with its own
+                model copy (1 = in-process)
+            encode_batch_tokens: Padded-token budget per embedding batch; texts
+                are batched by length, so short chunks go in larger batches
         """
         self.embedding_model_name = embedding_model or os.getenv(
             "EMBEDDING_MODEL", 
@@ -94,6 +293,28 @@ class PDFIngestionPipeline:
         )
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunking = chunking
+        self.index_type = index_type
+        self.storage = storage
+        self.shards = max(1, shards)
+        self.shard_by = shard_by
+        self.index_options = {
+            "nlist": nlist,
+            "nprobe": nprobe,
+            "hnsw_m": hnsw_m,
+            "ef_search": ef_search,
+            "pq_m": pq_m,
+            "train_size": train_size,
+            "storage": storage,
+        }
+        self.index_params: Dict = {"index_type": index_type}
+        self.workers = max(1, workers)
+        self.dedup_threshold = dedup_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Per-PDF hashes and chunk-id runs, written next to the index
+        self.manifest: Optional[IngestManifest] = None
+        # Set once labels are chunk ids rather than chunk store rows
+        self.id_mapped = False
         
         print(f"Initializing embedding model: {self.embedding_model_name}")
         print(f"This may take a few minutes on first run (downloading model)...")
@@ -107,47 +328,91 @@ class PDFIngestionPipeline:
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
         
         print(f"✓ Model loaded (embedding dimension: {self.embedding_dim})")
+        
+        self.encoder = BucketedEncoder(
+            self.model, self.embedding_model_name,
+            workers=encode_workers, max_batch_tokens=encode_batch_tokens
+        )
+        if self.encoder.workers > 1:
+            print(f"✓ Embedding with {self.encoder.workers} processes, "
+                  f"{self.encoder.threads_per_worker} threads each")
+        
+        self.token_chunker: Optional[TokenChunker] = None
+        if chunking == "tokens":
+            self.token_chunker = TokenChunker.from_model(
+                self.model, chunk_tokens, chunk_overlap_tokens
+            )
+            print(f"✓ Token chunking: {self.token_chunker.max_tokens} tokens, "
+                  f"{self.token_chunker.overlap_tokens} overlap")
+        
+        self.embedding_cache: Optional[EmbeddingCache] = None
+        if embedding_cache_dir:
+            self.embedding_cache = EmbeddingCache(
+                embedding_cache_dir, self.embedding_model_name, self.embedding_dim
+            )
+            print(f"✓ Embedding cache: {len(self.embedding_cache)} vectors "
+                  f"in {self.embedding_cache.path}")
     
-    def extract_text_from_pdf(self, pdf_path: str) -> List[Tuple[int, str]]:
+    def extract_text_from_pdf(self, pdf_path: str) -> Optional[List[Tuple[int, str]]]:
         """
         Extract text from PDF file, returns list of (page_num, text) tuples
         
+        With workers > 1, pages are extracted in parallel across a process
+        pool. A page that fails is skipped with a warning; the rest of the
+        document is kept.
+        
         Args:
             pdf_path: Path to PDF file
             
         Returns:
-            List of (page_number, page_text) tuples
+            List of (page_number, page_text) tuples, or None if the whole
+            document failed (so it can be retried on the next run)
         """
-        pages = []
         filename = Path(pdf_path).name
         
         try:
-            # Try pdfplumber first (better text extraction)
-            if PDFPLUMBER_AVAILABLE:
-                print(f"  Using pdfplumber for {filename}")
-                with pdfplumber.open(pdf_path) as pdf:
-                    for page_num, page in enumerate(pdf.pages, start=1):
-                        text = page.extract_text()
-                        if text:
-                            pages.append((page_num, text))
-            
-            # Fallback to pypdf/PyPDF2
-            elif PYPDF_AVAILABLE:
-                print(f"  Using pypdf for {filename}")
-                reader = PdfReader(pdf_path)
-                for page_num, page in enumerate(reader.pages, start=1):
-                    text = page.extract_text()
-                    if text:
-                        pages.append((page_num, text))
-            else:
-                raise RuntimeError("No PDF library available")
-            
-            print(f"  ✓ Extracted {len(pages)} pages from {filename}")
-            return pages
-            
+            library = "pdfplumber" if PDFPLUMBER_AVAILABLE else "pypdf"
+            print(f"  Using {library} for {filename} ({self.workers} workers)")
+            pages, failures = extract_pdf_pages(pdf_path, self._get_pool(), self.workers,
+                                                restart_pool=self._restart_pool)
+        except BrokenProcessPool as e:
+            # Only the extraction pool: the encoder may be mid-batch on another thread
+            self._reset_pool()
+            print(f"  ✗ Extraction workers crashed on {filename}: {e}")
+            return None
         except Exception as e:
             print(f"  ✗ Error extracting text from {filename}: {e}")
-            return []
+            return None
+        
+        for page_num, error in sorted(failures.items()):
+            print(f"  ⚠ Page {page_num} of {filename} skipped: {error}")
+        if failures and not pages:
+            print(f"  ✗ Every page of {filename} failed")
+            return None
+        print(f"  ✓ Extracted {len(pages)} pages from {filename}")
+        return pages
+    
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Extraction process pool, started on first use (None with one worker)"""
+        if self.workers > 1 and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def _restart_pool(self) -> ProcessPoolExecutor:
+        """Replace a broken extraction pool with a fresh one"""
+        self._reset_pool()
+        return self._get_pool()
+    
+    def _reset_pool(self):
+        """Drop the extraction pool; the next extraction starts a fresh one"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+    
+    def close(self):
+        """Shut down the extraction and embedding process pools"""
+        self._reset_pool()
+        self.encoder.close()
     
     def chunk_text(self, text: str, filename: str, page_num: int, 
                    chunk_offset: int = 0) -> List[DocumentChunk]:
@@ -163,6 +428,9 @@ class PDFIngestionPipeline:
         Returns:
             List of DocumentChunk objects
         """
+        if self.token_chunker is not None:
+            return self.chunk_text_tokens(text, filename, page_num, chunk_offset)
+        
         chunks = []
         text_len = len(text)
         start = 0
@@ -212,6 +480,46 @@ class PDFIngestionPipeline:
         
         return chunks
     
+    def chunk_text_tokens(self, text: str, filename: str, page_num: int,
+                          chunk_offset: int = 0) -> List[DocumentChunk]:
+        """
+        Split text into overlapping chunks within the model's token budget
+        
+        Args:
+            text: Text to chunk
+            filename: Source filename
+            page_num: Page number
+            chunk_offset: Starting chunk ID offset
+            
+        Returns:
+            List of DocumentChunk objects (text == page text[char_start:char_end])
+        """
+        chunks = []
+        for char_start, char_end in self.token_chunker.spans(text):
+            chunk_text = text[char_start:char_end]
+            # Same minimum chunk size as character chunking
+            if len(chunk_text) > 50:
+                chunks.append(DocumentChunk(
+                    text=chunk_text,
+                    filename=filename,
+                    page_num=page_num,
+                    chunk_id=chunk_offset + len(chunks),
+                    char_start=char_start,
+                    char_end=char_end
+                ))
+        return chunks
+    
+    def chunking_config(self) -> Dict:
+        """Chunking settings recorded with the index"""
+        config = {"chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
+        if self.token_chunker is not None:
+            config = {
+                "chunking": "tokens",
+                "chunk_tokens": self.token_chunker.max_tokens,
+                "chunk_overlap_tokens": self.token_chunker.overlap_tokens,
+            }
+        return config
+    
     def process_pdfs(self, data_dir: str) -> List[DocumentChunk]:
         """
         Process all PDFs in directory and create chunks
@@ -222,39 +530,160 @@ class PDFIngestionPipeline:
         Returns:
             List of all DocumentChunk objects
         """
-        data_path = Path(data_dir)
-        if not data_path.exists():
-            raise FileNotFoundError(f"Data directory not found: {data_dir}")
-        
-        pdf_files = list(data_path.glob("*.pdf"))
-        if not pdf_files:
-            raise ValueError(f"No PDF files found in {data_dir}")
+        pdf_files = self.find_pdfs(data_dir)
         
         print(f"\nFound {len(pdf_files)} PDF files:")
         for pdf in pdf_files:
             print(f"  - {pdf.name}")
         
         all_chunks = []
-        chunk_id_offset = 0
+        self.manifest = IngestManifest(self.manifest_config())
         
         for pdf_path in pdf_files:
-            print(f"\nProcessing: {pdf_path.name}")
-            pages = self.extract_text_from_pdf(str(pdf_path))
-            
-            for page_num, page_text in pages:
-                chunks = self.chunk_text(
-                    page_text, 
-                    pdf_path.name, 
-                    page_num,
-                    chunk_offset=chunk_id_offset
-                )
-                all_chunks.extend(chunks)
-                chunk_id_offset += len(chunks)
-                print(f"    Page {page_num}: {len(chunks)} chunks")
+            all_chunks.extend(self.process_pdf(pdf_path))
         
         print(f"\n✓ Total chunks created: {len(all_chunks)}")
         return all_chunks
     
+    def find_pdfs(self, data_dir: str) -> List[Path]:
+        """PDF files in data_dir, sorted by name"""
+        data_path = Path(data_dir)
+        if not data_path.exists():
+            raise FileNotFoundError(f"Data directory not found: {data_dir}")
+        
+        pdf_files = sorted(data_path.glob("*.pdf"))
+        if not pdf_files:
+            raise ValueError(f"No PDF files found in {data_dir}")
+        return pdf_files
+    
+    def process_pdf(self, pdf_path: Path) -> List[DocumentChunk]:
+        """
+        Extract and chunk one PDF, numbering its chunks from the manifest
+        
+        Args:
+            pdf_path: PDF file
+            
+        Returns:
+            DocumentChunk objects of this PDF
+        """
+        print(f"\nProcessing: {pdf_path.name}")
+        pages = self.extract_text_from_pdf(str(pdf_path))
+        if pages is None:
+            self.manifest.record(pdf_path, 0, failed=True)
+            return []
+        
+        pdf_chunks = []
+        chunk_id_offset = self.manifest.next_chunk_id
+        for page_num, page_text in pages:
+            chunks = self.chunk_text(
+                page_text, 
+                pdf_path.name, 
+                page_num,
+                chunk_offset=chunk_id_offset
+            )
+            pdf_chunks.extend(chunks)
+            chunk_id_offset += len(chunks)
+            print(f"    Page {page_num}: {len(chunks)} chunks")
+        
+        self.manifest.record(pdf_path, len(pdf_chunks))
+        return pdf_chunks
+    
+    def manifest_config(self) -> Dict:
+        """Settings an incremental update must share with the existing index"""
+        return {
+            "embedding_model": self.embedding_model_name,
+            **self.chunking_config(),
+            "index_type": self.index_type,
+            **({"storage": self.storage}
+               if self.storage != "float32" else {}),
+            **({"shards": self.shards, "shard_by": self.shard_by} if self.shards > 1 else {}),
+            **({"dedup_threshold": self.dedup_threshold} if self.dedup_threshold else {}),
+        }
+    
+    def incremental_blocker(self, index_dir: str) -> Optional[str]:
+        """Why index_dir can't be updated incrementally (None if it can)"""
+        if not (Path(index_dir) / "faiss_index.bin").exists():
+            return f"No index in {index_dir}"
+        if not IngestManifest.exists(index_dir):
+            return f"No manifest in {index_dir} (built before incremental ingestion)"
+        if self.dedup_threshold:
+            # A changed PDF may hold the canonical copy of another PDF's chunks
+            return "Near-duplicate elimination needs a full build"
+        if self.storage != "float32":
+            # vectors.f32 is stored by row; updates would relabel by chunk id
+            return "Quantized storage needs a full build"
+        if self.shards > 1:
+            return "Sharded indexes need a full build"
+        config = IngestManifest.load(index_dir).config
+        current = self.manifest_config()
+        changed = [key for key in {**config, **current} if config.get(key) != current.get(key)]
+        if changed:
+            return f"Settings changed since the last build ({', '.join(changed)})"
+        return None
+    
+    def update_index(self, data_dir: str, index_dir: str
+                     ) -> Optional[Tuple[faiss.Index, List[DocumentChunk]]]:
+        """
+        Bring an existing index up to date with data_dir
+        
+        Only new and changed PDFs are extracted and embedded. Vectors of
+        changed and deleted PDFs are removed by chunk id; everything else
+        is reused as stored.
+        
+        Args:
+            data_dir: Directory containing PDF files
+            index_dir: Index directory written by an earlier run
+            
+        Returns:
+            (index, all chunks) to save, or None if nothing changed
+        """
+        self.manifest = IngestManifest.load(index_dir)
+        diff = self.manifest.diff(self.find_pdfs(data_dir))
+        print(f"\nIncremental update: {len(diff.added)} new, {len(diff.changed)} changed, "
+              f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged PDFs")
+        if not diff.to_process and not diff.removed:
+            return None
+        
+        index_path = Path(index_dir)
+        index = faiss.read_index(str(index_path / "faiss_index.bin"))
+        with open(index_path / "metadata.pkl", 'rb') as f:
+            metadata = pickle.load(f)
+        self.index_params = metadata['index_params']
+        
+        # Keep the chunks of untouched documents (store rows ascend by chunk id)
+        remove_ids = self.manifest.chunk_ids(diff.to_remove)
+        self.manifest.forget(diff.to_remove)
+        removed = set(remove_ids)
+        store = load_chunk_store(str(index_path), metadata)
+        chunks = []
+        for row in range(len(store)):
+            chunk = store[row]
+            if chunk["chunk_id"] not in removed:
+                chunks.append(DocumentChunk(
+                    text=chunk["text"],
+                    filename=chunk["filename"],
+                    page_num=chunk["page_num"],
+                    chunk_id=chunk["chunk_id"],
+                    char_start=chunk["char_start"],
+                    char_end=chunk["char_end"]
+                ))
+        
+        new_chunks = []
+        for pdf_path in diff.to_process:
+            new_chunks.extend(self.process_pdf(pdf_path))
+        
+        embeddings = np.zeros((0, self.embedding_dim), dtype=np.float32)
+        if new_chunks:
+            embeddings = self.create_embeddings(new_chunks)
+            faiss.normalize_L2(embeddings)
+        
+        index = update_index(index, self.index_params, np.array(remove_ids, dtype=np.int64),
+                             embeddings, np.array([c.chunk_id for c in new_chunks], dtype=np.int64))
+        self.id_mapped = True
+        print(f"✓ Removed {len(remove_ids)} and added {len(new_chunks)} vectors "
+              f"({index.ntotal} total)")
+        return index, chunks + new_chunks
+    
     def create_embeddings(self, chunks: List[DocumentChunk]) -> np.ndarray:
         """
         Generate embeddings for all chunks
@@ -269,40 +698,234 @@ class PDFIngestionPipeline:
         print("This may take several minutes depending on corpus size...")
         
         texts = [chunk.text for chunk in chunks]
-        
-        # Generate embeddings in batches for efficiency
-        embeddings = self.model.encode(
-            texts,
-            batch_size=32,
-            show_progress_bar=True,
-            convert_to_numpy=True
-        )
+        embeddings = self.encode_texts(texts)
         
         print(f"✓ Generated embeddings shape: {embeddings.shape}")
         return embeddings
     
-    def build_faiss_index(self, embeddings: np.ndarray) -> faiss.IndexFlatIP:
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed chunk texts, encoding only those missing from the embedding cache
+        
+        Args:
+            texts: Chunk texts
+            
+        Returns:
+            Numpy array of raw (unnormalized) embeddings (len(texts) x embedding_dim)
+        """
+        if self.embedding_cache is None:
+            return self.encoder.encode(texts)
+        return self.embedding_cache.encode(texts, self.encoder.encode)
+    
+    def report_embedding_cache(self):
+        """Print embedding cache hits and misses of this run"""
+        if self.embedding_cache is None:
+            return
+        stats = self.embedding_cache.stats()
+        print(f"✓ Embedding cache: {stats['hits']} hits, {stats['misses']} encoded "
+              f"({stats['hit_rate']:.0%} hit rate, {stats['vectors']} vectors cached)")
+    
+    def build_faiss_index(self, embeddings: np.ndarray) -> faiss.Index:
         """
         Build FAISS index for similarity search
         
+        Approximate index types are trained on a random sample of the
+        embeddings first. The resolved parameters are kept in
+        self.index_params and saved with the metadata.
+        
         Args:
             embeddings: Numpy array of embeddings
             
         Returns:
             FAISS index object
         """
-        print("\nBuilding FAISS index...")
+        print(f"\nBuilding FAISS index (type: {self.index_type})...")
         
         # Normalize embeddings for cosine similarity (using inner product)
         faiss.normalize_L2(embeddings)
         
         # Create FAISS index (Inner Product = cosine similarity after normalization)
-        index = faiss.IndexFlatIP(self.embedding_dim)
+        self.index_params = resolve_index_params(
+            self.index_type, embeddings.shape[0], **self.index_options
+        )
+        index = create_index(self.embedding_dim, self.index_params)
+        
+        if not index.is_trained:
+            print(f"  Training on up to {self.index_params['train_size']} vectors...")
+            train_index(index, embeddings, self.index_params)
+        
         index.add(embeddings)
         
-        print(f"✓ FAISS index built with {index.ntotal} vectors")
+        print(f"✓ FAISS index built with {index.ntotal} vectors ({self.index_params})")
         return index
     
+    def build_streaming(self, data_dir: str, output_dir: str, batch_size: int = 256,
+                        max_pending: int = 8) -> int:
+        """
+        Full build as a streaming pipeline: extract -> chunk -> embed -> index
+        
+        A background thread extracts and chunks PDFs into a bounded queue of
+        fixed-size chunk batches while this thread embeds each batch and adds
+        it to the index. Chunk text streams to the chunk store as it goes, so
+        memory is bounded by the queue, not by the corpus.
+        
+        With dedup_threshold set, near-duplicates of an earlier chunk are not
+        embedded or indexed; their locations are stored with that chunk.
+        
+        Args:
+            data_dir: Directory containing PDF files
+            output_dir: Directory to write the index to
+            batch_size: Chunks per embedding batch
+            max_pending: Chunk batches extraction may run ahead of the encoder
+            
+        Returns:
+            Number of chunks indexed (0 = nothing written)
+        """
+        pdf_files = self.find_pdfs(data_dir)
+        print(f"\nFound {len(pdf_files)} PDF files")
+        
+        self.manifest = IngestManifest(self.manifest_config())
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        writer = IndexWriter(self, output_dir)
+        vectors_path = (str(output_path / FULL_VECTORS_FILE)
+                        if self.storage != "float32" else None)
+        if self.shards > 1:
+            builder = ShardedIndexBuilder(
+                self.embedding_dim, self.index_type, self.shards, self.shard_by,
+                output_dir, vectors_path=vectors_path, **self.index_options
+            )
+        else:
+            builder = StreamingIndexBuilder(
+                self.embedding_dim, self.index_type,
+                spill_path=str(output_path / "embeddings.spill"),
+                vectors_path=vectors_path, **self.index_options
+            )
+        
+        dedup = NearDuplicateIndex(self.dedup_threshold) if self.dedup_threshold else None
+        
+        start = time.perf_counter()
+        for batch in self.stream_chunk_batches(pdf_files, batch_size, max_pending):
+            if dedup is not None:
+                batch = self.drop_duplicates(batch, dedup, writer)
+                if not batch:
+                    continue
+            embeddings = self.encode_texts([chunk.text for chunk in batch])
+            faiss.normalize_L2(embeddings)
+            if self.shards > 1:
+                builder.add(embeddings, [chunk.filename for chunk in batch])
+            else:
+                builder.add(embeddings)
+            for chunk in batch:
+                writer.add(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"  Embedded {builder.count} chunks ({builder.count / elapsed:.1f} chunks/s)")
+        
+        if builder.count == 0:
+            builder.discard()
+            writer.abort()
+            return 0
+        
+        print(f"\nFinishing FAISS index (type: {self.index_type})...")
+        index = builder.finish()
+        self.index_params = builder.params
+        print(f"✓ FAISS index built with {index.ntotal} vectors ({self.index_params})")
+        if self.shards > 1:
+            print(f"✓ {len(index.shards)} shards by {self.shard_by}: "
+                  f"{', '.join(str(shard.ntotal) for shard in index.shards)} vectors")
+        if dedup is not None:
+            total = builder.count + dedup.duplicates
+            print(f"✓ Near-duplicates: {dedup.duplicates} of {total} chunks collapsed "
+                  f"(index {dedup.duplicates / total:.1%} smaller)")
+        writer.close(index)
+        return builder.count
+    
+    def drop_duplicates(self, batch: List[DocumentChunk], dedup: NearDuplicateIndex,
+                        writer: "IndexWriter") -> List[DocumentChunk]:
+        """
+        Keep the chunks of batch that aren't near-duplicates of an earlier chunk
+        
+        Dropped chunks are recorded with the writer as alternate locations of
+        their canonical chunk.
+        
+        Args:
+            batch: Chunks in chunk id order
+            dedup: Detector holding every chunk kept so far
+            writer: Index writer of this build
+            
+        Returns:
+            Chunks to embed and index
+        """
+        kept = []
+        for chunk in batch:
+            canonical_id = dedup.add(chunk.chunk_id, chunk.text)
+            if canonical_id is None:
+                kept.append(chunk)
+            else:
+                writer.add_duplicate(chunk, canonical_id)
+        return kept
+    
+    def stream_chunk_batches(self, pdf_files: List[Path], batch_size: int,
+                             max_pending: int) -> Iterator[List[DocumentChunk]]:
+        """
+        Extract and chunk PDFs in a background thread, yielding chunk batches
+        
+        At most max_pending batches wait in the queue, so extraction runs
+        ahead of the consumer by a bounded amount. Extraction errors are
+        re-raised in the consumer.
+        
+        Args:
+            pdf_files: PDFs to process, in order
+            batch_size: Chunks per batch (the last one may be smaller)
+            max_pending: Queue capacity in batches
+            
+        Yields:
+            Lists of DocumentChunk, in chunk id order
+        """
+        pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        stop = threading.Event()
+        done = object()
+        
+        def put(item) -> bool:
+            # Give up once the consumer has gone away
+            while not stop.is_set():
+                try:
+                    pending.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                batch = []
+                for pdf_path in pdf_files:
+                    for chunk in self.process_pdf(pdf_path):
+                        batch.append(chunk)
+                        if len(batch) == batch_size:
+                            if not put(batch):
+                                return
+                            batch = []
+                if batch and not put(batch):
+                    return
+                put(done)
+            except BaseException as e:
+                put(e)
+        
+        producer = threading.Thread(target=produce, name="ingest-extract", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = pending.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            producer.join()
+    
     def save_index(self, index: faiss.Index, chunks: List[DocumentChunk], 
                    output_dir: str):
         """
@@ -313,54 +936,133 @@ class PDFIngestionPipeline:
             chunks: List of DocumentChunk objects
             output_dir: Directory to save index and metadata
         """
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
+        writer = IndexWriter(self, output_dir)
+        for chunk in chunks:
+            writer.add(chunk)
+        writer.close(index)
+
+
+class IndexWriter:
+    """
+    Writes an index directory, taking chunks one at a time
+    
+    Chunk text goes straight to the chunk store and BM25 postings are
+    accumulated in compact arrays, so callers can stream chunks without
+    holding them all in memory.
+    """
+    
+    def __init__(self, pipeline: PDFIngestionPipeline, output_dir: str):
+        self.pipeline = pipeline
+        self.output_path = Path(output_dir)
+        self.output_path.mkdir(parents=True, exist_ok=True)
+        self.chunk_store = ChunkStoreWriter(str(self.output_path))
+        self.bm25 = BM25Builder()
+        self.documents: Dict[str, Dict] = {}
+        self.num_chunks = 0
+        self.num_duplicates = 0
+    
+    def add(self, chunk: DocumentChunk):
+        """Append one chunk (in FAISS label order)"""
+        self.chunk_store.add(chunk.text, chunk.filename, chunk.page_num, chunk.chunk_id,
+                             chunk.char_start, chunk.char_end)
+        self.bm25.add(chunk.text)
+        doc = self.documents.setdefault(chunk.filename, {"num_chunks": 0, "pages": set()})
+        doc["num_chunks"] += 1
+        doc["pages"].add(chunk.page_num)
+        self.num_chunks += 1
+    
+    def add_duplicate(self, chunk: DocumentChunk, canonical_id: int):
+        """Record chunk as another location of the chunk with id canonical_id"""
+        self.chunk_store.add_alternate(canonical_id, chunk.filename, chunk.page_num,
+                                       chunk.char_start, chunk.char_end)
+        doc = self.documents.setdefault(chunk.filename, {"num_chunks": 0, "pages": set()})
+        doc["pages"].add(chunk.page_num)
+        self.num_duplicates += 1
+    
+    def abort(self):
+        """Discard the chunk store without writing an index"""
+        self.chunk_store.abort()
+    
+    def close(self, index: Union[faiss.Index, ShardedIndex]):
+        """
+        Write the FAISS index and everything derived from the chunks
+        
+        Args:
+            index: FAISS index (or sharded index) holding one vector per added chunk
+        """
+        pipeline = self.pipeline
+        output_path = self.output_path
         
         # Save FAISS index
-        index_file = output_path / "faiss_index.bin"
-        faiss.write_index(index, str(index_file))
-        print(f"✓ Saved FAISS index to {index_file}")
+        if isinstance(index, ShardedIndex):
+            index_files = index.write(str(output_path))
+            index_hash = ShardedIndex.digest(index_files)
+            print(f"✓ Saved {len(index_files)} FAISS index shards to {output_path} "
+                  f"({sum(f.stat().st_size for f in index_files) / 2**20:.1f} MB)")
+        else:
+            index_file = output_path / "faiss_index.bin"
+            faiss.write_index(index, str(index_file))
+            index_hash = file_digest(str(index_file))
+            print(f"✓ Saved FAISS index to {index_file} "
+                  f"({index_file.stat().st_size / 2**20:.1f} MB)")
+        storage = pipeline.index_params.get("storage", "float32")
+        if storage != "float32":
+            float32_mb = index.ntotal * index.d * 4 / 2**20
+            print(f"  {storage} storage; the vectors alone take {float32_mb:.1f} MB as float32 "
+                  f"(kept in {FULL_VECTORS_FILE} for re-scoring)")
         
-        # Save metadata (chunks info)
+        # Save chunk metadata as a columnar, memory-mappable store
+        self.chunk_store.close()
+        print(f"✓ Saved chunk store ({STORE_FORMAT}) to {output_path}")
+        
+        # Save BM25 inverted index for lexical / hybrid retrieval
+        bm25 = self.bm25.build()
+        bm25.save(str(output_path))
+        print(f"✓ Saved BM25 index ({len(bm25.terms)} terms) to {output_path / BM25_FILE}")
+        
+        # Save index-level metadata (chunks live in the chunk store)
         metadata_file = output_path / "metadata.pkl"
         metadata = {
-            "chunks": [chunk.to_dict() for chunk in chunks],
-            "embedding_model": self.embedding_model_name,
-            "embedding_dim": self.embedding_dim,
-            "chunk_size": self.chunk_size,
-            "chunk_overlap": self.chunk_overlap,
+            "chunk_store": STORE_FORMAT,
+            "embedding_model": pipeline.embedding_model_name,
+            "embedding_dim": pipeline.embedding_dim,
+            **pipeline.chunking_config(),
+            "index_params": pipeline.index_params,
+            # FAISS labels are chunk ids instead of chunk store rows
+            "id_mapped": pipeline.id_mapped,
+            # Identifies this build; the server's response cache is keyed on it
+            "index_hash": index_hash,
             "created_at": datetime.now().isoformat(),
-            "num_chunks": len(chunks)
+            "num_chunks": self.num_chunks,
+            "dedup_threshold": pipeline.dedup_threshold,
+            # Chunks collapsed into an indexed near-duplicate
+            "num_duplicates": self.num_duplicates
         }
         
         with open(metadata_file, 'wb') as f:
             pickle.dump(metadata, f)
         print(f"✓ Saved metadata to {metadata_file}")
         
+        # Save per-PDF hashes and chunk-id runs for --incremental
+        if pipeline.manifest is not None:
+            pipeline.manifest.save(str(output_path))
+            print(f"✓ Saved manifest ({len(pipeline.manifest.documents)} documents)")
+        
         # Save human-readable JSON summary
         summary_file = output_path / "index_summary.json"
         summary = {
-            "embedding_model": self.embedding_model_name,
-            "num_chunks": len(chunks),
-            "num_documents": len(set(c.filename for c in chunks)),
+            "embedding_model": pipeline.embedding_model_name,
+            "num_chunks": self.num_chunks,
+            "num_duplicates": self.num_duplicates,
+            "num_documents": len(self.documents),
+            "index_type": pipeline.index_params["index_type"],
             "created_at": datetime.now().isoformat(),
-            "documents": {}
+            "documents": {
+                filename: {"num_chunks": doc["num_chunks"], "pages": sorted(doc["pages"])}
+                for filename, doc in self.documents.items()
+            }
         }
         
-        # Group chunks by document
-        for chunk in chunks:
-            if chunk.filename not in summary["documents"]:
-                summary["documents"][chunk.filename] = {
-                    "num_chunks": 0,
-                    "pages": set()
-                }
-            summary["documents"][chunk.filename]["num_chunks"] += 1
-            summary["documents"][chunk.filename]["pages"].add(chunk.page_num)
-        
-        # Convert sets to sorted lists for JSON
-        for doc in summary["documents"].values():
-            doc["pages"] = sorted(list(doc["pages"]))
-        
         with open(summary_file, 'w', encoding='utf-8') as f:
             json.dump(summary, f, indent=2, ensure_ascii=False)
         print(f"✓ Saved summary to {summary_file}")
@@ -401,42 +1103,241 @@ def main():
         default=100,
         help="Overlap between chunks in characters (default: 100)"
     )
+    parser.add_argument(
+        "--chunking",
+        type=str,
+        default="chars",
+        choices=["chars", "tokens"],
+        help="Chunk by character count or by the embedding model's tokens (default: chars)"
+    )
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=None,
+        help="Tokens per chunk with --chunking tokens (default: the model's max_seq_length)"
+    )
+    parser.add_argument(
+        "--chunk-overlap-tokens",
+        type=int,
+        default=32,
+        help="Overlap between chunks in tokens with --chunking tokens (default: 32)"
+    )
+    parser.add_argument(
+        "--index-type",
+        type=str,
+        default="flat",
+        choices=INDEX_TYPES,
+        help="FAISS index type (default: flat = exact search)"
+    )
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=None,
+        help="IVF lists for ivf-flat/ivf-pq (default: ~4*sqrt(num_chunks))"
+    )
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=None,
+        help="Default IVF lists probed per query (default: 16)"
+    )
+    parser.add_argument(
+        "--hnsw-m",
+        type=int,
+        default=None,
+        help="HNSW graph degree (default: 32)"
+    )
+    parser.add_argument(
+        "--ef-search",
+        type=int,
+        default=None,
+        help="Default HNSW efSearch (default: 64)"
+    )
+    parser.add_argument(
+        "--pq-m",
+        type=int,
+        default=None,
+        help="PQ sub-quantizers for ivf-pq, must divide embedding dim (default: 64)"
+    )
+    parser.add_argument(
+        "--train-size",
+        type=int,
+        default=50000,
+        help="Maximum vectors sampled to train IVF/PQ indexes (default: 50000)"
+    )
+    parser.add_argument(
+        "--storage",
+        type=str,
+        default="float32",
+        choices=STORAGE_TYPES,
+        help="Vector storage for flat/hnsw/ivf-flat: fp16 halves and int8 quarters index "
+             "memory; full-precision vectors are kept on disk for re-scoring (default: float32)"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Split the FAISS index into this many shards, searched in parallel by "
+             "the server (default: 1 = a single index)"
+    )
+    parser.add_argument(
+        "--shard-by",
+        type=str,
+        default="document",
+        choices=SHARD_BY,
+        help="Keep each PDF's chunks in one shard (document) or spread chunks "
+             "evenly (chunk) (default: document)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for PDF text extraction, split by page (default: 1; "
+             "0 = one per CPU core)"
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=1,
+        help="Processes generating embeddings, each loading the model and using an "
+             "even share of the cores (default: 1; 0 = one per 4 cores)"
+    )
+    parser.add_argument(
+        "--encode-batch-tokens",
+        type=int,
+        default=MAX_BATCH_TOKENS,
+        help="Padded tokens per embedding batch; chunks are batched by length "
+             f"(default: {MAX_BATCH_TOKENS})"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Chunks per embedding batch in the streaming pipeline (default: 256)"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=8,
+        help="Chunk batches extraction may queue ahead of embedding (default: 8)"
+    )
+    parser.add_argument(
+        "--embedding-cache",
+        type=str,
+        default=os.getenv("EMBEDDING_CACHE_DIR", "./models/embedding_cache"),
+        help="Directory caching chunk embeddings by model and text hash, so rebuilds "
+             "only encode new chunk texts (default: from .env or ./models/embedding_cache)"
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Encode every chunk without reading or writing the embedding cache"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Index one copy of near-duplicate chunks (repeated headers, footers, "
+             "clauses, chunk overlaps) and keep the other locations as citations"
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.8,
+        help="Estimated Jaccard similarity of word 3-shingles at which --dedup "
+             "treats two chunks as duplicates (default: 0.8)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process new/changed PDFs and drop deleted ones, starting from the "
+             "index in --output-dir (falls back to a full build when that isn't possible)"
+    )
+    parser.add_argument(
+        "--versioned",
+        action="store_true",
+        help="Write to a new timestamped version under --output-dir and point "
+             "CURRENT at it (running servers pick it up via reload)"
+    )
     
     args = parser.parse_args()
+    if args.workers == 0:
+        args.workers = available_cores()
+    if args.encode_workers == 0:
+        args.encode_workers = max(1, available_cores() // 4)
     
     print("=" * 70)
     print("  Shankh.ai PDF Ingestion Pipeline")
     print("=" * 70)
     
+    pipeline = None
     try:
         # Initialize pipeline
         pipeline = PDFIngestionPipeline(
             embedding_model=args.embedding_model,
             chunk_size=args.chunk_size,
-            chunk_overlap=args.chunk_overlap
+            chunk_overlap=args.chunk_overlap,
+            chunking=args.chunking,
+            chunk_tokens=args.chunk_tokens,
+            chunk_overlap_tokens=args.chunk_overlap_tokens,
+            index_type=args.index_type,
+            nlist=args.nlist,
+            nprobe=args.nprobe,
+            hnsw_m=args.hnsw_m,
+            ef_search=args.ef_search,
+            pq_m=args.pq_m,
+            train_size=args.train_size,
+            storage=args.storage,
+            shards=args.shards,
+            shard_by=args.shard_by,
+            workers=args.workers,
+            embedding_cache_dir=None if args.no_embedding_cache else args.embedding_cache,
+            dedup_threshold=args.dedup_threshold if args.dedup else None,
+            encode_workers=args.encode_workers,
+            encode_batch_tokens=args.encode_batch_tokens
         )
         
-        # Process PDFs
-        chunks = pipeline.process_pdfs(args.data_dir)
+        output_dir = args.output_dir
+        if args.versioned:
+            version = datetime.now().strftime("%Y%m%d-%H%M%S")
+            output_dir = str(Path(args.output_dir) / version)
         
-        if not chunks:
-            print("\n✗ No chunks created. Check PDF files and extraction.")
-            return 1
+        index = None
+        if args.incremental:
+            base_dir = str(resolve_index_dir(args.output_dir))
+            blocker = pipeline.incremental_blocker(base_dir)
+            if blocker:
+                print(f"⚠ {blocker}; running a full build")
+            else:
+                update = pipeline.update_index(args.data_dir, base_dir)
+                if update is None:
+                    print("\n✓ Index is up to date, nothing to do")
+                    return 0
+                index, chunks = update
+                pipeline.save_index(index, chunks, output_dir)
+                num_chunks = len(chunks)
         
-        # Generate embeddings
-        embeddings = pipeline.create_embeddings(chunks)
+        if index is None:
+            # Extract, chunk, embed and index in one streaming pass
+            num_chunks = pipeline.build_streaming(
+                args.data_dir, output_dir,
+                batch_size=args.batch_size, max_pending=args.max_pending
+            )
+            if not num_chunks:
+                print("\n✗ No chunks created. Check PDF files and extraction.")
+                return 1
         
-        # Build FAISS index
-        index = pipeline.build_faiss_index(embeddings)
+        pipeline.report_embedding_cache()
         
-        # Save everything
-        pipeline.save_index(index, chunks, args.output_dir)
+        # Publish only once every file of the new version is on disk
+        if args.versioned:
+            set_current(args.output_dir, version)
+            print(f"✓ CURRENT -> {version}")
         
         print("\n" + "=" * 70)
         print("  ✓ Ingestion Complete!")
         print("=" * 70)
-        print(f"  Index location: {args.output_dir}")
-        print(f"  Total chunks: {len(chunks)}")
+        print(f"  Index location: {output_dir}")
+        print(f"  Total chunks: {num_chunks}")
         print(f"  Ready for retrieval queries!")
         print("=" * 70)
         
@@ -447,6 +1348,9 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if pipeline is not None:
+            pipeline.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,261 @@
+"""
+BM25 lexical index for hybrid retrieval
+
+Dense mpnet embeddings blur exact tokens that matter in financial PDFs:
+section numbers, scheme names, rupee amounts, acronyms such as NBFC/KYC.
+This module builds a compact BM25 inverted index over chunk text at ingest
+time and scores queries with vectorized numpy operations (no per-document
+Python loop). Results can be fused with dense hits via reciprocal-rank
+fusion.
+
+On-disk format (bm25.npz in the index directory):
+    term_offsets - byte offsets of each term in term_bytes (n_terms + 1)
+    term_bytes   - UTF-8 blob of the sorted vocabulary (term id = position)
+    indptr       - postings offsets per term (CSR layout)
+    doc_ids      - posting doc ids (FAISS labels / chunk store rows)
+    tfs          - term frequencies
+    doc_len      - token count per document
+
+The vocabulary is stored like the chunk store's text rather than as a
+fixed-width unicode array, whose itemsize would be set by the longest
+token (one URL or base64 run would inflate every entry). Indexes written
+with the older `terms` array still load.
+"""
+
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+BM25_FILE = "bm25.npz"
+
+# Numbers keep internal separators so "5,00,000" and "1.5" stay one token
+_NUMBER = r"\d+(?:[.,]\d+)*"
+# Letters plus Devanagari vowel signs / virama / nukta, which are combining
+# marks rather than \w and would otherwise split Hindi words apart
+_WORD = r"(?:[^\W\d_]|[\u0900-\u0963\u0971-\u097F])+"
+TOKEN_RE = re.compile(f"{_NUMBER}|{_WORD}")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase lexical tokens
+
+    Devanagari-aware: danda (।) is treated as punctuation and matras stay
+    attached to their consonants. Digit-group commas are dropped so
+    "5,00,000" and "500000" match.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        List of tokens
+    """
+    text = unicodedata.normalize("NFC", text).casefold()
+    return [token.replace(",", "") for token in TOKEN_RE.findall(text)]
+
+
+class BM25Index:
+    """Okapi BM25 over a CSR inverted index held in numpy arrays"""
+
+    def __init__(self, terms: Sequence[str], indptr: np.ndarray, doc_ids: np.ndarray,
+                 tfs: np.ndarray, doc_len: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        self.terms = terms
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+
+        num_docs = len(doc_len)
+        avgdl = float(doc_len.mean()) if num_docs else 1.0
+        doc_freq = np.diff(indptr).astype(np.float32)
+        self.idf = np.log1p((num_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        # Per-document length normalization, precomputed once
+        self.doc_norm = (k1 * (1.0 - b + b * doc_len / max(avgdl, 1e-9))).astype(np.float32)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_len)
+
+    @classmethod
+    def build(cls, texts: Sequence[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """
+        Build the inverted index from chunk texts
+
+        Args:
+            texts: Chunk texts, in FAISS label order
+
+        Returns:
+            BM25Index
+        """
+        builder = BM25Builder()
+        for text in texts:
+            builder.add(text)
+        return builder.build(k1=k1, b=b)
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return (Path(index_dir) / BM25_FILE).exists()
+
+    def save(self, index_dir: str):
+        """Write bm25.npz to the index directory"""
+        encoded = [term.encode("utf-8") for term in self.terms]
+        term_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(term) for term in encoded], out=term_offsets[1:])
+        np.savez(
+            Path(index_dir) / BM25_FILE,
+            term_offsets=term_offsets,
+            term_bytes=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            indptr=self.indptr,
+            doc_ids=self.doc_ids,
+            tfs=self.tfs,
+            doc_len=self.doc_len,
+            params=np.array([self.k1, self.b], dtype=np.float32),
+        )
+
+    @classmethod
+    def load(cls, index_dir: str) -> "BM25Index":
+        """Load bm25.npz from the index directory"""
+        with np.load(Path(index_dir) / BM25_FILE) as data:
+            k1, b = (float(value) for value in data["params"])
+            if "term_bytes" in data:
+                blob = data["term_bytes"].tobytes()
+                offsets = data["term_offsets"]
+                terms = [blob[start:end].decode("utf-8")
+                         for start, end in zip(offsets[:-1], offsets[1:])]
+            else:
+                terms = [str(term) for term in data["terms"]]
+            return cls(terms, data["indptr"], data["doc_ids"], data["tfs"],
+                       data["doc_len"], k1=k1, b=b)
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        BM25 scores of every document for query
+
+        Returns:
+            float32 array of length num_docs (0 for documents without matches)
+        """
+        term_ids = sorted({self.term_ids[t] for t in tokenize(query) if t in self.term_ids})
+        if not term_ids:
+            return np.zeros(self.num_docs, dtype=np.float32)
+
+        # Gather all postings of the query terms, then score them in one pass
+        slices = [slice(self.indptr[t], self.indptr[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.doc_ids[s] for s in slices])
+        tfs = np.concatenate([self.tfs[s] for s in slices])
+        idf = np.concatenate([
+            np.full(s.stop - s.start, self.idf[t], dtype=np.float32)
+            for s, t in zip(slices, term_ids)
+        ])
+        contributions = idf * tfs * (self.k1 + 1.0) / (tfs + self.doc_norm[docs])
+        return np.bincount(docs, weights=contributions, minlength=self.num_docs).astype(np.float32)
+
+    def search(self, query: str, k: int,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k documents by BM25 score
+
+        Args:
+            query: Query text
+            k: Number of results
+            mask: Optional boolean array; documents with False are excluded
+
+        Returns:
+            (scores, doc_ids) arrays, best first, only documents with score > 0
+        """
+        scores = self.score(query)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        order = np.argsort(-scores[candidates], kind="stable")
+        candidates = candidates[order]
+        return scores[candidates], candidates.astype(np.int64)
+
+
+class BM25Builder:
+    """
+    Accumulates postings one chunk at a time (for streaming ingestion)
+
+    Postings are kept in compact typed arrays rather than Python lists, so
+    memory grows by ~16 bytes per (term, chunk) pair.
+    """
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.term_col = array("q")
+        self.doc_col = array("i")
+        self.tf_col = array("f")
+        self.doc_len = array("f")
+
+    def add(self, text: str):
+        """Append the next chunk (doc ids follow insertion order)"""
+        doc_id = len(self.doc_len)
+        counts = Counter(tokenize(text))
+        self.doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self.term_col.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+            self.doc_col.append(doc_id)
+            self.tf_col.append(tf)
+
+    def build(self, k1: float = 1.5, b: float = 0.75) -> BM25Index:
+        # Renumber terms in sorted order so the vocabulary array is searchable
+        terms = sorted(self.vocabulary)
+        remap = np.empty(len(self.vocabulary), dtype=np.int64)
+        for new_id, term in enumerate(terms):
+            remap[self.vocabulary[term]] = new_id
+        term_col = remap[np.frombuffer(self.term_col, dtype=np.int64)] if self.term_col else np.zeros(0, np.int64)
+
+        order = np.argsort(term_col, kind="stable")
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_col, minlength=len(terms)), out=indptr[1:])
+
+        return BM25Index(
+            terms,
+            indptr,
+            np.frombuffer(self.doc_col, dtype=np.int32)[order],
+            np.frombuffer(self.tf_col, dtype=np.float32)[order],
+            np.array(self.doc_len, dtype=np.float32),
+            k1=k1,
+            b=b,
+        )
+
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], k: int,
+                           rrf_k: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse ranked id lists with reciprocal-rank fusion
+
+    score(d) = sum over rankings of 1 / (rrf_k + rank(d)), rank starting at 1.
+
+    Args:
+        rankings: Id arrays, each ordered best first (-1 entries are ignored)
+        k: Number of fused results
+        rrf_k: RRF damping constant
+
+    Returns:
+        (fused_scores, ids) arrays, best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            if doc_id < 0:
+                continue
+            fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + 1.0 / (rrf_k + rank)
+
+    best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+    return (
+        np.array([score for _, score in best], dtype=np.float32),
+        np.array([doc_id for doc_id, _ in best], dtype=np.int64),
+    )
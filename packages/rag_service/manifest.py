@@ -0,0 +1,155 @@
+"""
+Per-PDF manifest for incremental ingestion
+
+ingest.py records, for every PDF it indexed, the content hash and the
+run of chunk ids its chunks received. `python ingest.py --incremental`
+compares the data directory against the manifest and only extracts and
+embeds PDFs that are new or whose hash changed. Chunks of changed and
+deleted PDFs are removed from the index by id. PDFs whose extraction
+failed are recorded with "failed": true and count as changed, so the
+next run retries them.
+
+Chunk ids double as FAISS labels and are never reused: every processed
+PDF gets a fresh contiguous run starting at next_chunk_id, so the ids of
+untouched documents stay valid across updates.
+
+manifest.json (in the index directory):
+    {
+      "format": 1,
+      "config": {embedding model, chunking and index settings},
+      "next_chunk_id": 1234,
+      "documents": {
+        "circular.pdf": {"hash": "...", "size": 1024, "chunk_ids": [0, 57]},
+        "scanned.pdf": {"hash": "...", "size": 2048, "chunk_ids": [57, 57],
+                        "failed": true},
+        ...
+      }
+    }
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from vector_index import file_digest
+
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+
+
+class ManifestDiff(NamedTuple):
+    """How a data directory differs from the manifest"""
+    added: List[Path]
+    changed: List[Path]
+    removed: List[str]
+    unchanged: List[str]
+
+    @property
+    def to_process(self) -> List[Path]:
+        return self.added + self.changed
+
+    @property
+    def to_remove(self) -> List[str]:
+        """Documents whose current chunks must be deleted from the index"""
+        return [path.name for path in self.changed] + self.removed
+
+
+class IngestManifest:
+    """File hashes and chunk-id runs of the documents in an index"""
+
+    def __init__(self, config: Dict[str, Any], documents: Optional[Dict[str, Dict]] = None,
+                 next_chunk_id: int = 0):
+        self.config = config
+        self.documents: Dict[str, Dict] = documents or {}
+        self.next_chunk_id = next_chunk_id
+
+    @staticmethod
+    def exists(index_dir: str) -> bool:
+        return (Path(index_dir) / MANIFEST_FILE).exists()
+
+    @classmethod
+    def load(cls, index_dir: str) -> "IngestManifest":
+        with open(Path(index_dir) / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"Unsupported manifest format: {data.get('format')}")
+        return cls(data["config"], data["documents"], data["next_chunk_id"])
+
+    def save(self, index_dir: str):
+        """Write manifest.json (atomically, so a crash never leaves half a file)"""
+        path = Path(index_dir) / MANIFEST_FILE
+        tmp = path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "format": MANIFEST_FORMAT,
+                "config": self.config,
+                "next_chunk_id": self.next_chunk_id,
+                "documents": self.documents,
+            }, f, indent=2, ensure_ascii=False)
+        tmp.replace(path)
+
+    def diff(self, pdf_files: List[Path]) -> ManifestDiff:
+        """
+        Compare PDFs on disk against the manifest
+
+        Files whose size matches are hashed to detect in-place edits;
+        a size change is a change without reading the file. Documents whose
+        extraction failed are always changed.
+
+        Args:
+            pdf_files: PDFs currently in the data directory
+
+        Returns:
+            ManifestDiff
+        """
+        added, changed, unchanged = [], [], []
+        for pdf_path in pdf_files:
+            entry = self.documents.get(pdf_path.name)
+            if entry is None:
+                added.append(pdf_path)
+            elif (entry.get("failed")
+                  or entry["size"] != pdf_path.stat().st_size
+                  or entry["hash"] != file_digest(str(pdf_path))):
+                changed.append(pdf_path)
+            else:
+                unchanged.append(pdf_path.name)
+
+        present = {pdf_path.name for pdf_path in pdf_files}
+        removed = sorted(name for name in self.documents if name not in present)
+        return ManifestDiff(added, changed, removed, unchanged)
+
+    def chunk_ids(self, filenames: List[str]) -> List[int]:
+        """All chunk ids recorded for the given documents"""
+        ids: List[int] = []
+        for name in filenames:
+            start, end = self.documents[name]["chunk_ids"]
+            ids.extend(range(start, end))
+        return ids
+
+    def record(self, pdf_path: Path, num_chunks: int, failed: bool = False) -> int:
+        """
+        Register a processed PDF and allocate its chunk-id run
+
+        Args:
+            pdf_path: Processed PDF
+            num_chunks: Chunks it produced (0 is recorded too, so it isn't retried)
+            failed: Extraction failed; the PDF is retried on the next run
+
+        Returns:
+            First chunk id of the run
+        """
+        start = self.next_chunk_id
+        self.documents[pdf_path.name] = {
+            "hash": file_digest(str(pdf_path)),
+            "size": pdf_path.stat().st_size,
+            "chunk_ids": [start, start + num_chunks],
+        }
+        if failed:
+            self.documents[pdf_path.name]["failed"] = True
+        self.next_chunk_id = start + num_chunks
+        return start
+
+    def forget(self, filenames: List[str]):
+        for name in filenames:
+            self.documents.pop(name, None)
@@ -0,0 +1,323 @@
+"""
+ONNX Runtime backend for the query encoder
+
+Exports the transformer of a SentenceTransformer to ONNX (once, cached on
+disk), optionally applies dynamic int8 quantization, and encodes queries
+with ONNX Runtime plus the same pooling the SentenceTransformer uses.
+Drop-in for SentenceTransformer.encode on the server's query path.
+
+The existing FAISS index was built with the PyTorch model, so the server
+only switches backends after embedding_agreement() confirms the ONNX
+embeddings stay within a cosine tolerance of the PyTorch ones. The check
+runs once, right after export, and its result is stored with the model,
+so loading a cached export runs no inference.
+
+Backends (ENCODER_BACKEND):
+    torch     - SentenceTransformer as-is (default)
+    onnx      - fp32 ONNX Runtime
+    onnx-int8 - ONNX Runtime with dynamically quantized int8 weights
+"""
+
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model.int8.onnx"
+CONFIG_FILE = "encoder_config.json"
+AGREEMENT_FILE = "agreement.json"
+
+# Queries used to check ONNX vs PyTorch agreement (English, Hindi, mixed)
+PROBE_TEXTS = [
+    "What are the loan eligibility criteria?",
+    "KYC documents required by an NBFC under Section 45-IA",
+    "Interest rate on fixed deposits up to ₹5,00,000",
+    "होम लोन के लिए पात्रता मानदंड क्या हैं?",
+    "म्यूचुअल फंड में SIP कैसे शुरू करें",
+    "RBI circular on digital lending guidelines",
+]
+
+
+def export_onnx(model, output_dir: str, quantize: bool = False) -> Path:
+    """
+    Export a SentenceTransformer's transformer to ONNX
+
+    Skips work already done: the fp32 export and the int8 copy are each
+    written once per output directory.
+
+    Args:
+        model: Loaded SentenceTransformer
+        output_dir: Directory for the ONNX files, tokenizer and pooling config
+        quantize: Also write a dynamically quantized int8 model
+
+    Returns:
+        Path of the model to load (int8 if quantize, else fp32)
+    """
+    import torch
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+
+    fp32_file = output_path / MODEL_FILE
+    # The config is written last, so an interrupted export is redone
+    if not (output_path / CONFIG_FILE).exists():
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                       if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        export_kwargs = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            # The TorchScript exporter handles dynamic_axes on every torch version
+            export_kwargs["dynamo"] = False
+
+        class HiddenStates(torch.nn.Module):
+            """Returns only last_hidden_state, taking inputs positionally"""
+
+            def __init__(self, auto_model):
+                super().__init__()
+                self.auto_model = auto_model
+
+            def forward(self, *inputs):
+                return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+        with torch.no_grad():
+            torch.onnx.export(
+                HiddenStates(transformer.auto_model.eval()),
+                tuple(sample[name] for name in input_names),
+                str(fp32_file),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                **export_kwargs
+            )
+        tokenizer.save_pretrained(str(output_path))
+
+        pooling = model[1] if len(model) > 1 else None
+        config = {
+            "pooling": _pooling_mode(pooling) if pooling is not None else "mean",
+            "normalize": any(type(module).__name__ == "Normalize" for module in model),
+            "max_seq_length": model.max_seq_length,
+            "dim": model.get_sentence_embedding_dimension(),
+            "input_names": input_names,
+        }
+        with open(output_path / CONFIG_FILE, "w") as f:
+            json.dump(config, f, indent=2)
+
+    if not quantize:
+        return fp32_file
+
+    int8_file = output_path / QUANTIZED_FILE
+    if not int8_file.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_file), str(int8_file), weight_type=QuantType.QInt8)
+    return int8_file
+
+
+def export_encoder(model_name: str, cache_dir: str, quantized: bool = False) -> float:
+    """
+    Load a SentenceTransformer, export it and record its agreement
+
+    Meant to run in a spawned process (serve.py preloads before forking,
+    and export and the agreement check would start thread pools there).
+
+    Returns:
+        Minimum cosine similarity of the exported encoder vs PyTorch
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, token=False)
+    return OnnxEncoder.from_sentence_transformer(model, cache_dir, model_name,
+                                                 quantized=quantized).agreement
+
+
+def _pooling_mode(pooling) -> str:
+    """Pooling mode name across sentence-transformers versions"""
+    if hasattr(pooling, "get_pooling_mode_str"):
+        return pooling.get_pooling_mode_str()
+    return pooling.pooling_mode
+
+
+class OnnxEncoder:
+    """Query encoder running an exported transformer on ONNX Runtime"""
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = 0):
+        """
+        Initialize the encoder
+
+        Args:
+            model_dir: Directory written by export_onnx
+            quantized: Load the int8 model instead of fp32
+            threads: ONNX Runtime intra-op threads (0 = torch's current setting)
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime is not installed")
+
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        self.model_file = self.model_dir / (QUANTIZED_FILE if quantized else MODEL_FILE)
+        self.quantized = quantized
+        self.threads = threads
+        with open(self.model_dir / CONFIG_FILE) as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+        # Min cosine vs the PyTorch model, measured at export (None = not yet)
+        self.agreement: Optional[float] = self._read_agreements().get(self.model_file.name)
+        self._session: Optional["ort.InferenceSession"] = None
+        self._session_pid: Optional[int] = None
+
+    @classmethod
+    def from_sentence_transformer(cls, model, cache_dir: str, model_name: str,
+                                  quantized: bool = False, threads: int = 0) -> "OnnxEncoder":
+        """
+        Export (if not cached yet) and load an encoder for a SentenceTransformer
+
+        A fresh export is checked against the reference model once and
+        the agreement stored; cached exports reuse the stored value.
+
+        Args:
+            model: Loaded SentenceTransformer (the reference model)
+            cache_dir: Root directory for exported models
+            model_name: Model id, used for the cache subdirectory
+            quantized: Use dynamic int8 quantization
+            threads: ONNX Runtime intra-op threads
+
+        Returns:
+            OnnxEncoder
+        """
+        model_dir = Path(cache_dir) / model_name.replace("/", "__")
+        export_onnx(model, str(model_dir), quantize=quantized)
+        encoder = cls(str(model_dir), quantized=quantized, threads=threads)
+        if encoder.agreement is None:
+            encoder.record_agreement(model)
+        return encoder
+
+    def _read_agreements(self) -> dict:
+        path = self.model_dir / AGREEMENT_FILE
+        if not path.exists():
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def record_agreement(self, reference) -> float:
+        """
+        Measure embedding_agreement with the reference model and store it
+
+        Args:
+            reference: SentenceTransformer the model was exported from
+
+        Returns:
+            Minimum per-text cosine similarity
+        """
+        self.agreement = embedding_agreement(reference, self)
+        agreements = self._read_agreements()
+        agreements[self.model_file.name] = self.agreement
+        tmp = self.model_dir / f".{AGREEMENT_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(agreements, f, indent=2)
+        os.replace(tmp, self.model_dir / AGREEMENT_FILE)
+        return self.agreement
+
+    @property
+    def backend(self) -> str:
+        return "onnx-int8" if self.quantized else "onnx"
+
+    def _get_session(self) -> "ort.InferenceSession":
+        # ONNX Runtime thread pools do not survive fork(): a session created
+        # in the gunicorn master is recreated in each worker on first use
+        if self._session is None or self._session_pid != os.getpid():
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            threads = self.threads
+            if not threads:
+                import torch
+                threads = torch.get_num_threads()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            self._session = ort.InferenceSession(
+                str(self.model_file), options, providers=["CPUExecutionProvider"]
+            )
+            self._session_pid = os.getpid()
+        return self._session
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dim"]
+
+    def encode(self, sentences: Sequence[str], batch_size: int = 32,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """
+        Encode sentences (same signature subset as SentenceTransformer.encode)
+
+        Returns:
+            float32 array of shape (len(sentences), dim)
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        session = self._get_session()
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            features = self.tokenizer(
+                list(sentences[start:start + batch_size]),
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_seq_length"],
+                return_tensors="np"
+            )
+            feeds = {name: features[name].astype(np.int64) for name in self.config["input_names"]}
+            hidden = session.run(None, feeds)[0]
+            outputs.append(self._pool(hidden, features["attention_mask"]))
+        if not outputs:
+            return np.zeros((0, self.config["dim"]), dtype=np.float32)
+        return np.concatenate(outputs).astype(np.float32, copy=False)
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        mode = self.config["pooling"]
+        if mode not in ("mean", "cls", "max"):
+            raise ValueError(f"Unsupported pooling mode for ONNX backend: {mode}")
+        if mode == "cls":
+            pooled = hidden[:, 0]
+        elif mode == "max":
+            pooled = np.where(attention_mask[..., None] > 0, hidden, -1e9).max(axis=1)
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            pooled = pooled / np.linalg.norm(pooled, axis=1, keepdims=True).clip(1e-12)
+        return pooled
+
+
+def embedding_agreement(reference, candidate, texts: Sequence[str] = PROBE_TEXTS) -> float:
+    """
+    Lowest cosine similarity between two encoders' embeddings of texts
+
+    Args:
+        reference: Encoder the index was built with (SentenceTransformer)
+        candidate: Encoder to validate
+        texts: Probe texts
+
+    Returns:
+        Minimum per-text cosine similarity
+    """
+    expected = np.asarray(reference.encode(list(texts), convert_to_numpy=True), dtype=np.float32)
+    actual = np.asarray(candidate.encode(list(texts), convert_to_numpy=True), dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True).clip(1e-12)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True).clip(1e-12)
+    return float(np.min(np.sum(expected * actual, axis=1)))
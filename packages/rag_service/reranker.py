@@ -0,0 +1,100 @@
+"""
+Cross-encoder reranking of retrieved chunks
+
+The bi-encoder top-k from FAISS is fast but noisy. A cross-encoder reads
+query and chunk together and scores relevance much more precisely, at the
+cost of one transformer pass per (query, chunk) pair. The server fetches
+RERANK_CANDIDATES hits, rescores them here in one padded batch and keeps
+the best k.
+
+Pair scores depend only on the query and the chunk, so they are cached by
+(query hash, chunk_id): a repeated question only pays for chunks it has
+not been scored against yet.
+"""
+
+import hashlib
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from caching import LRUCache, normalize_query
+
+
+def query_hash(query: str) -> str:
+    """Stable hash of the normalized query text"""
+    return hashlib.blake2b(normalize_query(query).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Reranker:
+    """Scores (query, chunk) pairs with a cross-encoder, with a pair-score cache"""
+
+    def __init__(self, model, cache_size: int = 16384):
+        """
+        Initialize the reranker
+
+        Args:
+            model: Object with predict(pairs, batch_size=...) -> scores,
+                e.g. sentence_transformers.CrossEncoder
+            cache_size: Maximum cached pair scores (0 disables the cache)
+        """
+        self.model = model
+        self.cache = LRUCache(max_entries=cache_size)
+
+    @classmethod
+    def load(cls, model_name: str, max_length: int = 256, device: Optional[str] = None,
+             cache_size: int = 16384) -> "Reranker":
+        """
+        Load a sentence-transformers cross-encoder
+
+        Args:
+            model_name: HuggingFace model id
+            max_length: Token limit per (query, chunk) pair
+            device: Torch device (None = auto)
+            cache_size: Maximum cached pair scores
+
+        Returns:
+            Reranker
+        """
+        from sentence_transformers import CrossEncoder
+
+        model = CrossEncoder(model_name, max_length=max_length, device=device)
+        return cls(model, cache_size=cache_size)
+
+    def score(self, query: str, chunk_ids: Sequence[int], texts: Sequence[str]) -> np.ndarray:
+        """
+        Relevance scores for query against each chunk (blocking)
+
+        Uncached pairs are scored in a single padded batch.
+
+        Args:
+            query: Query text
+            chunk_ids: Chunk ids (cache keys)
+            texts: Chunk texts, aligned with chunk_ids
+
+        Returns:
+            float32 array of scores, aligned with chunk_ids (higher = better)
+        """
+        key = query_hash(query)
+        scores = np.empty(len(chunk_ids), dtype=np.float32)
+        missing: List[int] = []
+        for i, chunk_id in enumerate(chunk_ids):
+            cached = self.cache.get((key, int(chunk_id)))
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+
+        if missing:
+            pairs = [(query, texts[i]) for i in missing]
+            fresh = np.asarray(
+                self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False),
+                dtype=np.float32
+            ).reshape(-1)
+            for i, value in zip(missing, fresh):
+                scores[i] = value
+                self.cache.put((key, int(chunk_ids[i])), float(value))
+        return scores
+
+    def stats(self):
+        """Pair-score cache statistics"""
+        return self.cache.stats()
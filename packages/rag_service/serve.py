@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the Shankh.ai RAG Service
+
+Runs server:app under gunicorn with uvicorn workers:
+    - configurable worker count, no auto-reload
+    - models and the FAISS index are loaded once in the master process
+      before forking, so workers share the weights copy-on-write
+    - each worker caps torch/FAISS threads so that
+      workers x threads does not oversubscribe the CPU cores
+
+Usage:
+    python serve.py --workers 4
+    WORKERS=4 python serve.py
+
+For local development keep using `python server.py` (single process, reload).
+
+Author: Shankh.ai Team
+"""
+
+import argparse
+import gc
+import os
+
+from gunicorn.app.base import BaseApplication
+
+
+def threads_per_worker(workers: int, configured: int = 0) -> int:
+    """
+    Intra-op threads each worker may use
+
+    Args:
+        workers: Number of worker processes
+        configured: Explicit TORCH_NUM_THREADS (0 = split cores evenly)
+
+    Returns:
+        Thread count (at least 1)
+    """
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn application that preloads models before forking"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        import server
+
+        server.preload_models()
+        # Move everything loaded so far out of the GC's reach so collections
+        # in the workers don't touch (and un-share) those pages
+        gc.freeze()
+        return server.app
+
+
+def post_fork(arbiter, worker):
+    """Apply per-worker thread limits in each forked worker"""
+    from server import settings
+    from inference import configure_threads
+
+    threads = threads_per_worker(settings.workers, settings.torch_num_threads)
+    faiss_threads = settings.faiss_omp_threads or threads
+    configure_threads(threads, faiss_threads)
+    print(f"[worker {worker.pid}] torch threads: {threads}, FAISS threads: {faiss_threads}")
+
+
+def main():
+    from server import settings
+
+    parser = argparse.ArgumentParser(description="Run the RAG service in production mode")
+    parser.add_argument("--workers", type=int, default=settings.workers,
+                        help="Worker processes (default: WORKERS or 1)")
+    parser.add_argument("--host", type=str, default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--timeout", type=int, default=120,
+                        help="Worker timeout in seconds (default: 120)")
+    args = parser.parse_args()
+
+    # post_fork reads the worker count from settings
+    settings.workers = args.workers
+
+    print(f"Starting production server on {args.host}:{args.port} "
+          f"({args.workers} workers, {threads_per_worker(args.workers, settings.torch_num_threads)} "
+          f"threads each)")
+    ProductionServer({
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": args.timeout,
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }).run()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
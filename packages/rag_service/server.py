@@ -6,10 +6,18 @@ Provides semantic search endpoints for querying the vector database.
 Loads FAISS index and metadata on startup for fast retrieval.
 
 Endpoints:
-    POST /retrieve - Semantic search with query text
+    POST /retrieve - Semantic, lexical (BM25) or hybrid search with query text
+    POST /retrieve/batch - Several searches in one round trip
     GET /status - Health check and service info
+    GET /admin/index - Live / previous index versions
+    POST /admin/index/reload - Load an index version and swap it in
+    POST /admin/index/rollback - Swap back to the previous index
     POST /transcribe - (Optional) Whisper STT endpoint
 
+Run:
+    python server.py              # development (single process, reload)
+    python serve.py --workers 4   # production (preloaded models, no reload)
+
 Example curl:
     curl -X POST http://localhost:8000/retrieve \
       -H "Content-Type: application/json" \
@@ -19,20 +27,35 @@ Author: Shankh.ai Team
 """
 
 import os
-import pickle
-from pathlib import Path
-from typing import List, Optional, Dict, Any
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Optional, Dict, Any, Literal, Set, Tuple
 from datetime import datetime
 
 import numpy as np
 import faiss
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Response, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+from batching import QueryBatcher
+from caching import QueryEmbeddingCache, ResponseCache
+from filters import SearchFilter
+from index_bundle import IndexBundle, current_version, list_versions, resolve_index_dir
+from inference import InferenceExecutor, InferenceQueueFull, configure_threads
+from lexical import reciprocal_rank_fusion
+from onnx_encoder import ENCODER_BACKENDS, OnnxEncoder, export_encoder
+from reranker import Reranker
+from sharding import ShardedIndex
+from vector_index import (
+    is_hnsw, is_id_mapped, make_search_params, mmap_shares_vectors, rescore, search_subset
+)
+
 # Optional: Whisper for local STT (fallback)
 try:
     import whisper
@@ -78,13 +101,47 @@ class Settings(BaseSettings):
         default="paraphrase-multilingual-mpnet-base-v2",
         env="EMBEDDING_MODEL"
     )
+    encoder_backend: str = Field(default="torch", env="ENCODER_BACKEND")
+    encoder_cache_dir: str = Field(default="./models/onnx", env="ENCODER_CACHE_DIR")
+    encoder_min_cosine: float = Field(default=0.99, env="ENCODER_MIN_COSINE")
     index_path: str = Field(default="./index", env="INDEX_PATH")
+    index_mmap: bool = Field(default=False, env="INDEX_MMAP")
+    index_watch_seconds: float = Field(default=0, env="INDEX_WATCH_SECONDS")
+    admin_token: Optional[str] = Field(default=None, env="ADMIN_TOKEN")
+    faiss_nprobe: int = Field(default=0, env="FAISS_NPROBE")
+    faiss_ef_search: int = Field(default=0, env="FAISS_EF_SEARCH")
     whisper_model: str = Field(default="base", env="WHISPER_MODEL")
     use_indicseamless: bool = Field(default=True, env="USE_INDICSEAMLESS")
     indicseamless_model: str = Field(
         default="ai4bharat/indic-wav2vec2-hindi",
         env="INDICSEAMLESS_MODEL"
     )
+    query_cache_size: int = Field(default=4096, env="QUERY_CACHE_SIZE")
+    query_cache_ttl_seconds: float = Field(default=3600, env="QUERY_CACHE_TTL_SECONDS")
+    response_cache_mb: float = Field(default=64, env="RESPONSE_CACHE_MB")
+    response_cache_ttl_seconds: float = Field(default=0, env="RESPONSE_CACHE_TTL_SECONDS")
+    inference_workers: int = Field(default=2, env="INFERENCE_WORKERS")
+    inference_queue_size: int = Field(default=32, env="INFERENCE_QUEUE_SIZE")
+    batch_window_ms: float = Field(default=3.0, env="BATCH_WINDOW_MS")
+    batch_max_size: int = Field(default=32, env="BATCH_MAX_SIZE")
+    hybrid_candidates: int = Field(default=50, env="HYBRID_CANDIDATES")
+    rrf_k: int = Field(default=60, env="RRF_K")
+    filter_exact_max: int = Field(default=2048, env="FILTER_EXACT_MAX")
+    rescore_factor: int = Field(default=0, env="RESCORE_FACTOR")
+    shard_search_threads: int = Field(default=0, env="SHARD_SEARCH_THREADS")
+    rerank_enabled: bool = Field(default=False, env="RERANK_ENABLED")
+    rerank_model: str = Field(
+        default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1",
+        env="RERANK_MODEL"
+    )
+    rerank_candidates: int = Field(default=30, env="RERANK_CANDIDATES")
+    rerank_budget_ms: float = Field(default=250, env="RERANK_BUDGET_MS")
+    rerank_max_length: int = Field(default=256, env="RERANK_MAX_LENGTH")
+    rerank_cache_size: int = Field(default=16384, env="RERANK_CACHE_SIZE")
+    torch_num_threads: int = Field(default=0, env="TORCH_NUM_THREADS")
+    faiss_omp_threads: int = Field(default=0, env="FAISS_OMP_THREADS")
+    workers: int = Field(default=1, env="WORKERS")
+    preload_stt: bool = Field(default=False, env="PRELOAD_STT")
     host: str = Field(default="0.0.0.0", env="HOST")
     port: int = Field(default=8000, env="PORT")
     
@@ -110,6 +167,51 @@ class RetrievalRequest(BaseModel):
         ge=0.0,
         le=1.0
     )
+    nprobe: Optional[int] = Field(
+        default=None,
+        description="IVF lists to probe (ivf-flat/ivf-pq indexes only)",
+        ge=1,
+        le=65536
+    )
+    ef_search: Optional[int] = Field(
+        default=None,
+        description="HNSW search beam width (hnsw indexes only)",
+        ge=1,
+        le=4096
+    )
+    mode: Literal["dense", "lexical", "hybrid"] = Field(
+        default="dense",
+        description="dense (embeddings), lexical (BM25) or hybrid (both, fused with RRF)"
+    )
+    filenames: Optional[List[str]] = Field(
+        default=None,
+        description="Only search chunks from these documents",
+        min_length=1
+    )
+    page_min: Optional[int] = Field(default=None, description="First page to search", ge=0)
+    page_max: Optional[int] = Field(default=None, description="Last page to search", ge=0)
+    language: Optional[Literal["en", "hi"]] = Field(
+        default=None,
+        description="Only search chunks written in this language (by script)"
+    )
+    rerank: bool = Field(
+        default=False,
+        description="Rescore the top candidates with the cross-encoder (RERANK_ENABLED)"
+    )
+    rerank_budget_ms: Optional[float] = Field(
+        default=None,
+        description="Reranking time budget; the bi-encoder order is returned when exceeded",
+        gt=0,
+        le=10000
+    )
+
+
+class DocumentLocation(BaseModel):
+    """Another place a result's text appears (near-duplicates collapsed at ingest)"""
+    filename: str
+    page_num: int
+    char_start: int
+    char_end: int
 
 
 class DocumentResult(BaseModel):
@@ -120,8 +222,17 @@ class DocumentResult(BaseModel):
     text: str
     excerpt: str
     score: float = Field(description="Similarity score (higher = more relevant)")
+    rerank_score: Optional[float] = Field(
+        default=None,
+        description="Cross-encoder relevance score, when reranked"
+    )
     char_start: int
     char_end: int
+    alternate_locations: List[DocumentLocation] = Field(
+        default_factory=list,
+        description="Other (filename, page) locations of this text, when the index "
+                    "was built with near-duplicate elimination"
+    )
 
 
 class RetrievalResponse(BaseModel):
@@ -130,6 +241,24 @@ class RetrievalResponse(BaseModel):
     results: List[DocumentResult]
     num_results: int
     detected_language: Optional[str] = None
+    reranked: bool = False
+    processing_time_ms: float
+
+
+class BatchRetrievalRequest(BaseModel):
+    """Request schema for /retrieve/batch endpoint"""
+    requests: List[RetrievalRequest] = Field(
+        ...,
+        description="Retrieval requests to run in one pass",
+        min_length=1,
+        max_length=64
+    )
+
+
+class BatchRetrievalResponse(BaseModel):
+    """Response schema for /retrieve/batch endpoint"""
+    responses: List[RetrievalResponse]
+    num_queries: int
     processing_time_ms: float
 
 
@@ -139,11 +268,37 @@ class StatusResponse(BaseModel):
     service: str
     version: str
     embedding_model: str
+    encoder_backend: str = "torch"
     index_loaded: bool
+    index_params: Dict[str, Any] = {}
     num_chunks: int
     whisper_available: bool
     langdetect_available: bool
     uptime_seconds: float
+    capabilities: Dict[str, bool] = {}
+    components: Dict[str, Dict[str, Any]] = {}
+    query_cache: Dict[str, Any] = {}
+    response_cache: Dict[str, Any] = {}
+    inference: Dict[str, Any] = {}
+    batching: Dict[str, Any] = {}
+    rerank_cache: Dict[str, Any] = {}
+
+
+class IndexReloadRequest(BaseModel):
+    """Request schema for /admin/index/reload"""
+    version: Optional[str] = Field(
+        default=None,
+        description="Version directory under INDEX_PATH (default: CURRENT, else newest)"
+    )
+
+
+class IndexStatusResponse(BaseModel):
+    """Response schema for /admin/index endpoints"""
+    current: Optional[Dict[str, Any]] = None
+    previous: Optional[Dict[str, Any]] = None
+    current_pointer: Optional[str] = None
+    available_versions: List[str] = []
+    reload: Dict[str, Any] = {}
 
 
 class TranscriptionResponse(BaseModel):
@@ -154,22 +309,88 @@ class TranscriptionResponse(BaseModel):
     segments: List[Dict[str, Any]] = []
 
 
+# Independently loaded startup components
+COMPONENTS = ("embedding_model", "faiss_index", "reranker", "stt_indic", "stt_whisper", "stocks")
+
+
 # Global state
 class ServerState:
     """Global server state"""
     def __init__(self):
-        self.index: Optional[faiss.Index] = None
-        self.metadata: Optional[Dict] = None
+        # Live index and the one it replaced (kept for instant rollback)
+        self.bundle: Optional[IndexBundle] = None
+        self.previous_bundle: Optional[IndexBundle] = None
+        self.reload_lock = asyncio.Lock()
+        self.reload_status: Dict[str, Any] = {"state": "idle", "error": None}
+        self.watch_task: Optional[asyncio.Task] = None
         self.model: Optional[SentenceTransformer] = None
+        self.reranker: Optional[Reranker] = None
+        self.encoder_backend: str = "torch"
         self.whisper_model: Optional[Any] = None
         self.indic_model: Optional[Any] = None  # IndicConformer model
+        self.query_cache = QueryEmbeddingCache(
+            max_entries=settings.query_cache_size,
+            ttl_seconds=settings.query_cache_ttl_seconds
+        )
+        self.response_cache = ResponseCache(
+            max_bytes=int(settings.response_cache_mb * 2**20),
+            ttl_seconds=settings.response_cache_ttl_seconds
+        )
+        self.executor = InferenceExecutor(
+            max_workers=settings.inference_workers,
+            max_queue=settings.inference_queue_size
+        )
+        # Built once run_dense_search exists (below the search functions)
+        self.batcher: Optional[QueryBatcher] = None
         self.device: str = "cpu"
         self.start_time: datetime = datetime.now()
         self.ready: bool = False
+        self.preloaded: bool = False
+        self.startup_task: Optional[asyncio.Task] = None
+        # Rerank passes that outlived their request's budget
+        self.rerank_tasks: Set[asyncio.Task] = set()
+        self.components: Dict[str, Dict[str, Any]] = {
+            name: {"status": "pending", "load_time_s": None, "error": None}
+            for name in COMPONENTS
+        }
         
         # Initialize device
         if INDICSEAMLESS_AVAILABLE:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
+    
+    # Shortcuts to the live bundle; request handlers take one snapshot of
+    # state.bundle instead, so a concurrent swap can't mix two indexes
+    @property
+    def index(self) -> Optional[faiss.Index]:
+        return self.bundle.index if self.bundle is not None else None
+    
+    @property
+    def chunks(self):
+        return self.bundle.chunks if self.bundle is not None else None
+    
+    @property
+    def metadata(self) -> Optional[Dict]:
+        return self.bundle.metadata if self.bundle is not None else None
+    
+    @property
+    def index_params(self) -> Dict[str, Any]:
+        return self.bundle.index_params if self.bundle is not None else {}
+    
+    @property
+    def retrieval_ready(self) -> bool:
+        """Embedder and index bundle are both loaded"""
+        return self.model is not None and self.bundle is not None
+    
+    def capabilities(self) -> Dict[str, bool]:
+        """Which features can currently serve requests"""
+        return {
+            "retrieval": self.retrieval_ready,
+            "lexical": self.retrieval_ready and self.bundle.bm25 is not None,
+            "rerank": self.reranker is not None,
+            "stt_indic": self.indic_model is not None,
+            "stt_whisper": self.whisper_model is not None,
+            "stocks": STOCK_SERVICE_AVAILABLE,
+        }
 
 
 state = ServerState()
@@ -194,46 +415,244 @@ app.add_middleware(
 
 def load_index_and_metadata():
     """Load FAISS index and metadata on startup"""
-    index_dir = Path(settings.index_path)
+    bundle = load_bundle()
     
-    if not index_dir.exists():
-        raise RuntimeError(
-            f"Index directory not found: {index_dir}\n"
-            f"Run 'python ingest.py' first to create the index."
-        )
-    
-    # Load FAISS index
-    index_file = index_dir / "faiss_index.bin"
-    if not index_file.exists():
-        raise RuntimeError(f"FAISS index file not found: {index_file}")
-    
-    print(f"Loading FAISS index from {index_file}...")
-    state.index = faiss.read_index(str(index_file))
-    print(f"✓ Loaded index with {state.index.ntotal} vectors")
+    # Verify embedding model matches
+    problem = embedding_model_mismatch(bundle)
+    if problem:
+        print(f"Warning: {problem}")
     
-    # Load metadata
-    metadata_file = index_dir / "metadata.pkl"
-    if not metadata_file.exists():
-        raise RuntimeError(f"Metadata file not found: {metadata_file}")
+    if settings.index_mmap:
+        indexes = bundle.index.shards if isinstance(bundle.index, ShardedIndex) else [bundle.index]
+        if not all(mmap_shares_vectors(index) for index in indexes):
+            print(f"Warning: INDEX_MMAP is set, but faiss {faiss.__version__} can only "
+                  f"memory-map IVF inverted lists; this index's flat/HNSW vectors are read "
+                  f"into each worker's private memory (needs faiss-cpu>=1.11)")
     
-    print(f"Loading metadata from {metadata_file}...")
-    with open(metadata_file, 'rb') as f:
-        state.metadata = pickle.load(f)
-    print(f"✓ Loaded metadata for {len(state.metadata['chunks'])} chunks")
+    publish_bundle(bundle)
+
+
+def load_bundle(version: Optional[str] = None) -> IndexBundle:
+    """
+    Load an index version from INDEX_PATH (blocking)
     
-    # Verify embedding model matches
-    stored_model = state.metadata.get('embedding_model')
+    Args:
+        version: Version directory (default: CURRENT, else newest, else flat layout)
+        
+    Returns:
+        Fully loaded IndexBundle, not yet published
+    """
+    index_dir = resolve_index_dir(settings.index_path, version)
+    return IndexBundle.load(
+        index_dir,
+        mmap=settings.index_mmap,
+        nprobe=settings.faiss_nprobe,
+        ef_search=settings.faiss_ef_search,
+        shard_threads=settings.shard_search_threads
+    )
+
+
+def embedding_model_mismatch(bundle: IndexBundle) -> Optional[str]:
+    """Describe why bundle doesn't fit the configured embedding model (None if it does)"""
+    stored_model = bundle.metadata.get('embedding_model')
     if stored_model and stored_model != settings.embedding_model:
-        print(f"Warning: Index was built with {stored_model}, "
-              f"but configured to use {settings.embedding_model}")
+        return (f"Index was built with {stored_model}, "
+                f"but configured to use {settings.embedding_model}")
+    if state.model is not None and bundle.index.d != state.model.get_sentence_embedding_dimension():
+        return (f"Index dimension {bundle.index.d} does not match the embedding model "
+                f"({state.model.get_sentence_embedding_dimension()})")
+    return None
+
+
+def publish_bundle(bundle: IndexBundle):
+    """
+    Make bundle the live index, keeping the current one for rollback
+    
+    A single reference swap: in-flight requests finish on the bundle they
+    started with. The response cache is purged for the new version. The
+    bundle that drops out of rollback reach is closed.
+    """
+    dropped = state.previous_bundle
+    state.previous_bundle, state.bundle = state.bundle, bundle
+    # A rollback republishes the previous bundle; only close one that's gone
+    if dropped is not None and dropped is not bundle and dropped is not state.previous_bundle:
+        dropped.close()
+    state.response_cache.bind_index(bundle.version)
+    # Pair scores are keyed by chunk id, which a new index renumbers
+    if state.reranker is not None:
+        state.reranker.cache.clear()
+    print(f"✓ Index version: {bundle.version}")
 
 
 def load_embedding_model():
     """Load sentence transformer model"""
     print(f"Loading embedding model: {settings.embedding_model}...")
     # Use token=False to avoid authentication issues with public models
-    state.model = SentenceTransformer(settings.embedding_model, token=False)
-    print(f"✓ Model loaded (dim: {state.model.get_sentence_embedding_dimension()})")
+    model = SentenceTransformer(settings.embedding_model, token=False)
+    if settings.encoder_backend != "torch":
+        model = load_onnx_encoder(model)
+    
+    backend = model.backend if isinstance(model, OnnxEncoder) else "torch"
+    state.encoder_backend = backend
+    state.model = model
+    # Backends differ slightly, so they must not share cached embeddings
+    state.query_cache.bind_model(f"{settings.embedding_model}:{backend}")
+    print(f"✓ Model loaded (dim: {model.get_sentence_embedding_dimension()}, backend: {backend})")
+
+
+def load_onnx_encoder(reference: SentenceTransformer):
+    """
+    Switch the query encoder to ONNX Runtime (ENCODER_BACKEND=onnx / onnx-int8)
+    
+    The index was built with the PyTorch model, so the ONNX encoder is only
+    used when its embeddings stay within ENCODER_MIN_COSINE of PyTorch's.
+    The agreement is measured once at export and read back afterwards, so
+    loading a cached export runs no inference.
+    
+    Args:
+        reference: Loaded PyTorch SentenceTransformer
+        
+    Returns:
+        OnnxEncoder, or the reference model if the backend can't be used
+    """
+    backend = settings.encoder_backend
+    if backend not in ENCODER_BACKENDS:
+        print(f"Warning: unknown ENCODER_BACKEND '{backend}'; using torch")
+        return reference
+    
+    try:
+        encoder = OnnxEncoder.from_sentence_transformer(
+            reference,
+            settings.encoder_cache_dir,
+            settings.embedding_model,
+            quantized=backend == "onnx-int8",
+            threads=settings.torch_num_threads
+        )
+        agreement = encoder.agreement
+    except Exception as e:
+        print(f"Warning: {backend} encoder unavailable ({e}); using torch")
+        return reference
+    
+    if agreement < settings.encoder_min_cosine:
+        print(f"Warning: {backend} embeddings drift from torch (min cosine {agreement:.4f} < "
+              f"{settings.encoder_min_cosine}); using torch")
+        return reference
+    
+    print(f"✓ {backend} encoder matches torch (min cosine {agreement:.4f})")
+    return encoder
+
+
+def load_reranker():
+    """Load the cross-encoder reranker (optional, RERANK_ENABLED)"""
+    if not settings.rerank_enabled:
+        print("Reranker disabled (set RERANK_ENABLED=true to enable)")
+        return
+    
+    print(f"Loading reranker: {settings.rerank_model}...")
+    state.reranker = Reranker.load(
+        settings.rerank_model,
+        max_length=settings.rerank_max_length,
+        cache_size=settings.rerank_cache_size
+    )
+    print("✓ Reranker loaded")
+
+
+def encode_queries(queries: List[str]) -> np.ndarray:
+    """
+    Encode queries into L2-normalized embeddings
+
+    Repeated queries are served from the query-embedding cache; only cache
+    misses go through the transformer.
+
+    Args:
+        queries: Query texts
+
+    Returns:
+        float32 array of shape (len(queries), embedding_dim)
+    """
+    embeddings = [state.query_cache.get(query) for query in queries]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    
+    if missing:
+        fresh = state.model.encode([queries[i] for i in missing], convert_to_numpy=True)
+        fresh = np.ascontiguousarray(fresh, dtype=np.float32)
+        
+        # Normalize for cosine similarity
+        faiss.normalize_L2(fresh)
+        
+        for i, embedding in zip(missing, fresh):
+            state.query_cache.put(queries[i], embedding)
+            embeddings[i] = embedding
+    
+    return np.vstack(embeddings)
+
+
+def dense_search(queries: List[str], k: int, bundle: Optional[IndexBundle] = None,
+                 nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                 filters: Optional[SearchFilter] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode queries and search the FAISS index (blocking)
+    
+    Runs on the inference executor, never directly on the event loop.
+    Filters are pushed into the search as an ID selector; small filtered
+    subsets of an HNSW index are scored exactly instead. For fp16/int8
+    indexes, RESCORE_FACTOR > 1 fetches k * RESCORE_FACTOR candidates and
+    re-scores them with the full-precision vectors. Sharded indexes are
+    searched shard-parallel, with filters applied inside every shard.
+    
+    Args:
+        queries: Query texts
+        k: Neighbours per query
+        bundle: Index to search (default: the live one)
+        nprobe: Per-request IVF nprobe override
+        ef_search: Per-request HNSW efSearch override
+        filters: Metadata filter shared by all queries
+    
+    Returns:
+        (distances, chunk store rows) arrays of shape (len(queries), k)
+    """
+    bundle = bundle or state.bundle
+    index = bundle.index
+    selection = bundle.filters.select(filters) if filters is not None else None
+    if selection is not None and selection.count == 0:
+        return (np.full((len(queries), k), -np.inf, dtype=np.float32),
+                np.full((len(queries), k), -1, dtype=np.int64))
+    
+    query_embeddings = encode_queries(queries)
+    fetch = k
+    if bundle.vectors is not None and settings.rescore_factor > 1:
+        fetch = k * settings.rescore_factor
+    if isinstance(index, ShardedIndex):
+        mask = selection.mask if selection is not None else None
+        distances, labels = index.search(query_embeddings, fetch, nprobe=nprobe,
+                                         ef_search=ef_search, mask=mask)
+    elif selection is None:
+        # An IndexIDMap the bundle couldn't unwrap takes no search parameters (FAISS 1.7.4)
+        params = (None if is_id_mapped(index)
+                  else make_search_params(index, nprobe=nprobe, ef_search=ef_search))
+        distances, labels = index.search(query_embeddings, fetch, params=params)
+    elif is_id_mapped(index) or (is_hnsw(index) and selection.count <= settings.filter_exact_max):
+        distances, labels = search_subset(index, query_embeddings, fetch, selection.ids)
+    else:
+        params = make_search_params(index, nprobe=nprobe, ef_search=ef_search,
+                                    selector=selection.selector())
+        distances, labels = index.search(query_embeddings, fetch, params=params)
+    if fetch > k:
+        distances, labels = rescore(query_embeddings, labels, bundle.vectors, k)
+    return distances, bundle.rows(labels)
+
+
+async def run_dense_search(queries: List[str], k: int, **options) -> Tuple[np.ndarray, np.ndarray]:
+    """Run dense_search on the inference executor"""
+    return await state.executor.run(dense_search, queries, k, **options)
+
+
+# Coalesces concurrent /retrieve queries into one encode + one index.search
+state.batcher = QueryBatcher(
+    run_dense_search,
+    window_ms=settings.batch_window_ms,
+    max_batch=settings.batch_max_size
+)
 
 
 def load_whisper_model():
@@ -287,6 +706,51 @@ def load_indicseamless_model():
         print("[STT] Will fall back to Whisper for all languages")
 
 
+def export_onnx_encoder():
+    """
+    Export and check the ONNX encoder in a spawned process (preload only)
+    
+    Export traces the PyTorch model and the agreement check runs both
+    encoders; in the master that would start thread pools before the fork.
+    Afterwards load_onnx_encoder only reads the cached files. Falls back to
+    torch if the export fails.
+    """
+    backend = settings.encoder_backend
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            pool.submit(export_encoder, settings.embedding_model, settings.encoder_cache_dir,
+                        backend == "onnx-int8").result()
+    except Exception as e:
+        print(f"Warning: {backend} encoder unavailable ({e}); using torch")
+        settings.encoder_backend = "torch"
+
+
+def preload_models():
+    """
+    Load models in the master process before workers fork (serve.py)
+    
+    Weights loaded here are shared copy-on-write by every worker. No
+    inference runs here, so no OpenMP thread pool exists before the fork:
+    an ONNX encoder is exported and checked in a spawned process first,
+    and its inference session is only created in the workers.
+    Speech models are only preloaded with PRELOAD_STT=true and on CPU
+    (CUDA state must not cross fork()). By default each worker loads them
+    in the background after it starts serving, as in single-process mode:
+    the master doesn't bind the port until preloading is done, so slow STT
+    loads here would delay retrieval.
+    """
+    print("Preloading models before forking workers...")
+    if settings.encoder_backend in ENCODER_BACKENDS and settings.encoder_backend != "torch":
+        export_onnx_encoder()
+    load_embedding_model()
+    load_index_and_metadata()
+    load_reranker()
+    if settings.preload_stt and state.device == "cpu":
+        load_indicseamless_model()
+        load_whisper_model()
+    state.preloaded = True
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize service on startup"""
@@ -294,22 +758,81 @@ async def startup_event():
     print("  Shankh.ai RAG Service Starting...")
     print("=" * 70)
     
+    # In production mode serve.py's post_fork hook sets per-worker limits
+    if not state.preloaded:
+        configure_threads(settings.torch_num_threads, settings.faiss_omp_threads)
+    
+    # Load in the background so the server accepts requests right away;
+    # /retrieve starts serving as soon as the embedder and index are up
+    state.startup_task = asyncio.create_task(load_components())
+    if settings.index_watch_seconds > 0:
+        state.watch_task = asyncio.create_task(watch_index(settings.index_watch_seconds))
+
+
+async def load_component(name: str, loader, is_loaded) -> None:
+    """
+    Load one startup component in a worker thread and record its status
+    
+    Args:
+        name: Key in state.components
+        loader: Blocking load function
+        is_loaded: Callable telling whether the component ended up available
+    """
+    component = state.components[name]
+    
+    # Already preloaded before fork (serve.py)
+    if is_loaded():
+        component.update(status="ready", load_time_s=0.0)
+        return
+    
+    component["status"] = "loading"
+    start = time.perf_counter()
     try:
-        load_embedding_model()
-        load_index_and_metadata()
-        load_indicseamless_model()  # Load IndicSeamless first (primary)
-        load_whisper_model()  # Load Whisper second (fallback)
-        
-        state.ready = True
-        print("=" * 70)
-        print("  ✓ RAG Service Ready!")
-        print("=" * 70)
-        
+        await asyncio.to_thread(loader)
     except Exception as e:
-        print(f"✗ Startup failed: {e}")
+        component.update(status="failed", error=str(e))
+        print(f"✗ Failed to load {name}: {e}")
         import traceback
         traceback.print_exc()
-        raise
+    else:
+        # Optional components (e.g. STT) log and skip when unavailable
+        component["status"] = "ready" if is_loaded() else "unavailable"
+    component["load_time_s"] = round(time.perf_counter() - start, 3)
+    
+    if name in ("embedding_model", "faiss_index") and state.retrieval_ready:
+        print(f"✓ Retrieval ready ({(datetime.now() - state.start_time).total_seconds():.1f}s after start)")
+
+
+async def load_components():
+    """Load all startup components concurrently"""
+    await asyncio.gather(
+        load_component("embedding_model", load_embedding_model,
+                       lambda: state.model is not None),
+        load_component("faiss_index", load_index_and_metadata,
+                       lambda: state.index is not None),
+        load_component("reranker", load_reranker,
+                       lambda: state.reranker is not None),
+        # IndicSeamless is primary, Whisper the fallback
+        load_component("stt_indic", load_indicseamless_model,
+                       lambda: state.indic_model is not None),
+        load_component("stt_whisper", load_whisper_model,
+                       lambda: state.whisper_model is not None),
+        load_component("stocks", lambda: None,
+                       lambda: STOCK_SERVICE_AVAILABLE),
+    )
+    
+    state.ready = True
+    print("=" * 70)
+    print(f"  ✓ RAG Service Ready! (capabilities: {state.capabilities()})")
+    print("=" * 70)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release inference threads on shutdown"""
+    if state.watch_task is not None:
+        state.watch_task.cancel()
+    state.executor.shutdown()
 
 
 @app.get("/", response_model=Dict[str, str])
@@ -332,73 +855,332 @@ async def get_status():
     uptime = (datetime.now() - state.start_time).total_seconds()
     
     return StatusResponse(
-        status="ready" if state.ready else "initializing",
+        status="ready" if state.ready else (
+            "partial" if state.retrieval_ready else "initializing"
+        ),
         service="RAG Retrieval Service",
         version="1.0.0",
         embedding_model=settings.embedding_model,
-        index_loaded=state.index is not None,
-        num_chunks=len(state.metadata['chunks']) if state.metadata else 0,
+        encoder_backend=state.encoder_backend,
+        index_loaded=state.bundle is not None,
+        index_params=state.index_params,
+        num_chunks=len(state.chunks) if state.chunks is not None else 0,
         whisper_available=WHISPER_AVAILABLE and state.whisper_model is not None,
         langdetect_available=LANGDETECT_AVAILABLE,
-        uptime_seconds=uptime
+        uptime_seconds=uptime,
+        capabilities=state.capabilities(),
+        components=state.components,
+        query_cache=state.query_cache.stats(),
+        response_cache=state.response_cache.stats(),
+        inference=state.executor.stats(),
+        batching=state.batcher.stats(),
+        rerank_cache=state.reranker.stats() if state.reranker is not None else {}
     )
 
 
-@app.post("/retrieve", response_model=RetrievalResponse)
-async def retrieve(request: RetrievalRequest):
+async def reload_index(version: Optional[str] = None) -> IndexBundle:
     """
-    Semantic search endpoint
+    Load an index version in a worker thread and swap it in
     
-    Performs vector similarity search and returns top-k most relevant document chunks.
+    The live index keeps serving while the new one loads; a load failure
+    or model mismatch leaves it in place.
     
     Args:
-        request: RetrievalRequest with query text and parameters
+        version: Version directory (default: CURRENT, else newest)
         
     Returns:
-        RetrievalResponse with ranked results and metadata
+        The newly published bundle
+    """
+    async with state.reload_lock:
+        state.reload_status = {"state": "loading", "version": version, "error": None,
+                               "started_at": datetime.now().isoformat()}
+        start = time.perf_counter()
+        try:
+            bundle = await asyncio.to_thread(load_bundle, version)
+            problem = embedding_model_mismatch(bundle)
+            if problem:
+                raise ValueError(problem)
+        except Exception as e:
+            state.reload_status.update(state="failed", error=str(e))
+            print(f"✗ Index reload failed: {e}")
+            raise
         
-    Example:
-        ```bash
-        curl -X POST http://localhost:8000/retrieve \
-          -H "Content-Type: application/json" \
-          -d '{"query": "What are the loan eligibility criteria?", "k": 5}'
-        ```
+        publish_bundle(bundle)
+        state.reload_status.update(state="idle", version=bundle.version,
+                                   load_time_s=round(time.perf_counter() - start, 3))
+        return bundle
+
+
+async def watch_index(interval: float):
     """
-    if not state.ready:
-        raise HTTPException(status_code=503, detail="Service not ready")
-    
-    start_time = datetime.now()
+    Reload whenever INDEX_PATH/CURRENT points at a different version
     
-    # Detect language (optional)
-    detected_lang = None
-    if LANGDETECT_AVAILABLE:
+    Runs in every worker, so with WORKERS > 1 this is what moves all
+    workers to a new index (an admin request only reaches one of them).
+    A failed version is not retried until CURRENT changes again, and a
+    manual rollback is not undone.
+    """
+    last_seen = None
+    while True:
+        await asyncio.sleep(interval)
+        if state.bundle is None:
+            continue
         try:
-            detected_lang = detect(request.query)
-        except LangDetectException:
+            target = resolve_index_dir(settings.index_path)
+        except ValueError as e:
+            print(f"⚠ Index watcher: {e}")
+            continue
+        if last_seen is None:
+            last_seen = state.bundle.path
+        if target == last_seen:
+            continue
+        last_seen = target
+        print(f"Index watcher: {target} is now current, reloading...")
+        try:
+            await reload_index(target.name)
+        except Exception:
             pass
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Check the X-Admin-Token header when ADMIN_TOKEN is set"""
+    if settings.admin_token and x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token")
+
+
+def index_status() -> IndexStatusResponse:
+    """Live / previous index versions and reload progress"""
+    return IndexStatusResponse(
+        current=state.bundle.describe() if state.bundle is not None else None,
+        previous=state.previous_bundle.describe() if state.previous_bundle is not None else None,
+        current_pointer=current_version(settings.index_path),
+        available_versions=list_versions(settings.index_path),
+        reload=state.reload_status
+    )
+
+
+@app.get("/admin/index", response_model=IndexStatusResponse,
+         dependencies=[Depends(require_admin)])
+async def get_index_status():
+    """Live and previous index versions, plus the versions on disk"""
+    return index_status()
+
+
+@app.post("/admin/index/reload", response_model=IndexStatusResponse,
+          dependencies=[Depends(require_admin)])
+async def reload_index_endpoint(request: Optional[IndexReloadRequest] = None):
+    """
+    Load an index version and swap it in without restarting
     
-    # Generate query embedding
-    query_embedding = state.model.encode([request.query], convert_to_numpy=True)
+    In-flight requests finish on the index they started with. The replaced
+    index stays in memory for /admin/index/rollback.
+    """
+    if state.bundle is None:
+        raise HTTPException(status_code=503, detail="Initial index load has not finished")
+    if state.reload_lock.locked():
+        raise HTTPException(status_code=409, detail="An index reload is already in progress")
+    version = request.version if request is not None else None
+    if version is not None and version not in list_versions(settings.index_path):
+        raise HTTPException(status_code=404, detail=f"Unknown index version: {version}")
     
-    # Normalize for cosine similarity
-    faiss.normalize_L2(query_embedding)
+    try:
+        await reload_index(version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index reload failed: {e}")
+    return index_status()
+
+
+@app.post("/admin/index/rollback", response_model=IndexStatusResponse,
+          dependencies=[Depends(require_admin)])
+async def rollback_index():
+    """Swap the previous index back in (the current one becomes previous)"""
+    async with state.reload_lock:
+        if state.previous_bundle is None:
+            raise HTTPException(status_code=409, detail="No previous index to roll back to")
+        publish_bundle(state.previous_bundle)
+    return index_status()
+
+
+def retrieval_unavailable_reason() -> str:
+    """Explain why /retrieve can't serve yet"""
+    for name in ("embedding_model", "faiss_index"):
+        component = state.components[name]
+        if component["status"] == "failed":
+            return f"Retrieval unavailable: {name} failed to load ({component['error']})"
+    return "Retrieval not ready (embedding model / index still loading)"
+
+
+def request_filter(request: RetrievalRequest, bundle: IndexBundle) -> Optional[SearchFilter]:
+    """Metadata filter of a request (None when it has no filter fields)"""
+    if (request.filenames is None and request.page_min is None
+            and request.page_max is None and request.language is None):
+        return None
+    if request.language is not None and not bundle.filters.supports_language:
+        raise HTTPException(
+            status_code=400,
+            detail="Index has no language column; re-run ingest.py or "
+                   "python chunk_store.py --migrate"
+        )
+    filenames = tuple(sorted(set(request.filenames))) if request.filenames else None
+    return SearchFilter(filenames, request.page_min, request.page_max, request.language)
+
+
+def search_options(request: RetrievalRequest, bundle: IndexBundle) -> Dict[str, Any]:
+    """Index to search plus per-request overrides and filters (only those actually set)"""
+    options = {
+        'bundle': bundle,
+        'nprobe': request.nprobe,
+        'ef_search': request.ef_search,
+        'filters': request_filter(request, bundle),
+    }
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Best-effort language detection (None if unavailable)"""
+    if not LANGDETECT_AVAILABLE:
+        return None
+    try:
+        return detect(text)
+    except LangDetectException:
+        return None
+
+
+def candidate_request(request: RetrievalRequest) -> RetrievalRequest:
+    """The request to search with: deepened to RERANK_CANDIDATES when reranking"""
+    if not request.rerank:
+        return request
+    if not settings.rerank_enabled:
+        raise HTTPException(status_code=400, detail="Reranking is disabled (RERANK_ENABLED=false)")
+    return request.model_copy(update={'k': max(request.k, settings.rerank_candidates)})
+
+
+def _finish_background_rerank(task: asyncio.Task):
+    state.rerank_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: background rerank pass failed: {task.exception()}")
+
+
+async def rerank_results(request: RetrievalRequest,
+                         candidates: List[DocumentResult]) -> Tuple[List[DocumentResult], bool]:
+    """
+    Rerank candidates with the cross-encoder within the request's time budget
+    
+    Falls back to the bi-encoder order when the reranker is still loading,
+    the inference queue is full or the budget runs out. A scoring pass cut
+    off by the budget still finishes in the background and fills the pair
+    cache for the next request.
+    
+    Args:
+        request: Original request (for k and budget)
+        candidates: Bi-encoder results, best first
+        
+    Returns:
+        (top request.k results, whether they were reranked)
+    """
+    if not request.rerank or state.reranker is None or not candidates:
+        return candidates[:request.k], False
     
-    # Search index
-    distances, indices = state.index.search(query_embedding, request.k)
+    budget_ms = request.rerank_budget_ms or settings.rerank_budget_ms
+    scoring = asyncio.ensure_future(state.executor.run(
+        state.reranker.score,
+        request.query,
+        [result.chunk_id for result in candidates],
+        [result.text for result in candidates]
+    ))
+    try:
+        # Shielded so the timeout doesn't cancel a queued or running pass
+        scores = await asyncio.wait_for(asyncio.shield(scoring), timeout=budget_ms / 1000)
+    except (asyncio.TimeoutError, InferenceQueueFull):
+        return candidates[:request.k], False
+    finally:
+        if not scoring.done():
+            # Finishes in the background and warms the pair cache
+            state.rerank_tasks.add(scoring)
+            scoring.add_done_callback(_finish_background_rerank)
     
-    # Build results
     results = []
-    for idx, (distance, chunk_idx) in enumerate(zip(distances[0], indices[0])):
+    for position in np.argsort(-scores, kind="stable")[:request.k]:
+        result = candidates[position]
+        result.rerank_score = float(scores[position])
+        results.append(result)
+    return results, True
+
+
+async def search_request(request: RetrievalRequest,
+                         bundle: IndexBundle) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run one request's search in its retrieval mode
+    
+    Hybrid mode runs the dense and BM25 searches concurrently, each for
+    HYBRID_CANDIDATES hits, and fuses the two rankings with reciprocal-rank
+    fusion.
+    
+    Args:
+        request: Retrieval request
+        bundle: Index snapshot to search
+        
+    Returns:
+        (scores, chunk indices) for the query, best first
+    """
+    if request.mode == "dense":
+        return await state.batcher.search(request.query, request.k,
+                                          **search_options(request, bundle))
+    
+    if bundle.bm25 is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{request.mode} retrieval needs a BM25 index; re-run ingest.py"
+        )
+    
+    options = search_options(request, bundle)
+    filters = options.get('filters')
+    mask = bundle.filters.select(filters).mask if filters is not None else None
+    
+    if request.mode == "lexical":
+        return await state.executor.run(bundle.bm25.search, request.query, request.k, mask)
+    
+    depth = max(request.k, settings.hybrid_candidates)
+    (dense_scores, dense_ids), (_, lexical_ids) = await asyncio.gather(
+        state.batcher.search(request.query, depth, **options),
+        state.executor.run(bundle.bm25.search, request.query, depth, mask)
+    )
+    if request.threshold is not None:
+        dense_ids = dense_ids[dense_scores >= request.threshold]
+    return reciprocal_rank_fusion([dense_ids, lexical_ids], request.k, rrf_k=settings.rrf_k)
+
+
+def build_results(request: RetrievalRequest, distances: np.ndarray,
+                  indices: np.ndarray, bundle: IndexBundle) -> List[DocumentResult]:
+    """
+    Turn one query's FAISS hits into DocumentResult objects
+    
+    Args:
+        request: Originating request (for threshold and k)
+        distances: Scores for the query, best first (cosine similarity in
+            dense mode, BM25 or fused RRF scores otherwise)
+        indices: Chunk indices for the query (-1 = no result)
+        bundle: Index snapshot the indices came from
+        
+    Returns:
+        Up to request.k results meeting the threshold
+    """
+    results = []
+    for distance, chunk_idx in zip(distances[:request.k], indices[:request.k]):
         if chunk_idx == -1:  # FAISS returns -1 for missing results
             continue
             
-        chunk_data = state.metadata['chunks'][chunk_idx]
-        score = float(distance)  # Cosine similarity (higher = better)
+        score = float(distance)  # Higher = better
         
-        # Apply threshold filter if specified
-        if request.threshold is not None and score < request.threshold:
+        # Threshold is a cosine similarity; hybrid applies it before fusion
+        if (request.mode == "dense" and request.threshold is not None
+                and score < request.threshold):
             continue
         
+        # Text is only decoded for hits we actually return
+        chunk_data = bundle.chunks[chunk_idx]
         result = DocumentResult(
             chunk_id=chunk_data['chunk_id'],
             filename=chunk_data['filename'],
@@ -407,18 +1189,171 @@ async def retrieve(request: RetrievalRequest):
             excerpt=chunk_data['excerpt'],
             score=score,
             char_start=chunk_data['char_start'],
-            char_end=chunk_data['char_end']
+            char_end=chunk_data['char_end'],
+            alternate_locations=chunk_data.get('alternate_locations', [])
         )
         results.append(result)
     
+    return results
+
+
+@app.post("/retrieve", response_model=RetrievalResponse)
+async def retrieve(request: RetrievalRequest):
+    """
+    Semantic search endpoint
+    
+    Performs vector similarity search and returns top-k most relevant document chunks.
+    Responses are cached per (index version, request parameters) as serialized
+    JSON; the X-Cache header tells whether a response came from the cache.
+    
+    Args:
+        request: RetrievalRequest with query text and parameters
+        
+    Returns:
+        RetrievalResponse with ranked results and metadata
+        
+    Example:
+        ```bash
+        curl -X POST http://localhost:8000/retrieve \
+          -H "Content-Type: application/json" \
+          -d '{"query": "What are the loan eligibility criteria?", "k": 5}'
+        ```
+    """
+    if not state.retrieval_ready:
+        raise HTTPException(status_code=503, detail=retrieval_unavailable_reason())
+    
+    # One index snapshot for the whole request, even if a reload swaps it
+    bundle = state.bundle
+    
+    # Identical requests against the same index are answered from the cache
+    cache_key = request.model_dump_json()
+    cached = state.response_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json", headers={"X-Cache": "hit"})
+    
+    start_time = datetime.now()
+    
+    # Detect language (optional)
+    detected_lang = detect_language(request.query)
+    
+    # Embed (cached across requests) and search off the event loop, batched
+    # together with any queries arriving concurrently
+    search = candidate_request(request)
+    try:
+        distances, indices = await search_request(search, bundle)
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # Build results, then optionally rerank the candidates
+    results = build_results(search, distances, indices, bundle)
+    results, reranked = await rerank_results(request, results)
+    
     # Calculate processing time
     processing_time = (datetime.now() - start_time).total_seconds() * 1000
     
-    return RetrievalResponse(
+    response = RetrievalResponse(
         query=request.query,
         results=results,
         num_results=len(results),
         detected_language=detected_lang,
+        reranked=reranked,
+        processing_time_ms=round(processing_time, 2)
+    )
+    body = response.model_dump_json().encode("utf-8")
+    
+    # A rerank that fell back on its budget isn't cached: a retry may make it
+    if reranked or not request.rerank:
+        state.response_cache.put(cache_key, body, bundle.version)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "miss"})
+
+
+@app.post("/retrieve/batch", response_model=BatchRetrievalResponse)
+async def retrieve_batch(request: BatchRetrievalRequest):
+    """
+    Multi-query semantic search endpoint
+    
+    Encodes every query in one forward pass and runs a single batched FAISS
+    search sized to the largest k, replacing N round trips to /retrieve.
+    Items with different nprobe/ef_search overrides are searched per group;
+    lexical and hybrid items are searched concurrently alongside. Items
+    asking for reranking are reranked concurrently after the search.
+    
+    Args:
+        request: BatchRetrievalRequest with a list of retrieval requests
+        
+    Returns:
+        BatchRetrievalResponse with one RetrievalResponse per query, in order
+        
+    Example:
+        ```bash
+        curl -X POST http://localhost:8000/retrieve/batch \
+          -H "Content-Type: application/json" \
+          -d '{"requests": [{"query": "loan eligibility", "k": 3},
+                            {"query": "KYC documents", "k": 5}]}'
+        ```
+    """
+    if not state.retrieval_ready:
+        raise HTTPException(status_code=503, detail=retrieval_unavailable_reason())
+    
+    start_time = datetime.now()
+    bundle = state.bundle
+    searches = [candidate_request(item) for item in request.requests]
+    
+    # Items with different search overrides (nprobe/efSearch) can't share a search
+    groups: Dict[tuple, List[int]] = {}
+    other_rows: List[int] = []
+    for row, item in enumerate(searches):
+        if item.mode != "dense":
+            other_rows.append(row)
+            continue
+        groups.setdefault(tuple(sorted(search_options(item, bundle).items())), []).append(row)
+    
+    # One encode + one search per dense group (normally the whole batch)
+    hits: List[Tuple[np.ndarray, np.ndarray]] = [None] * len(searches)
+    other_hits = asyncio.gather(
+        *(search_request(searches[row], bundle) for row in other_rows)
+    )
+    try:
+        for options, rows in groups.items():
+            distances, indices = await run_dense_search(
+                [searches[row].query for row in rows],
+                max(searches[row].k for row in rows),
+                **dict(options)
+            )
+            for position, row in enumerate(rows):
+                hits[row] = (distances[position], indices[position])
+        for row, hit in zip(other_rows, await other_hits):
+            hits[row] = hit
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    finally:
+        # A failed dense search must not leave lexical/hybrid searches running
+        if not other_hits.done():
+            other_hits.cancel()
+    
+    reranked = await asyncio.gather(*(
+        rerank_results(item, build_results(searches[row], *hits[row], bundle))
+        for row, item in enumerate(request.requests)
+    ))
+    
+    responses = []
+    for item, (results, was_reranked) in zip(request.requests, reranked):
+        # Per-item time covers the shared search plus this item's assembly
+        item_time = (datetime.now() - start_time).total_seconds() * 1000
+        responses.append(RetrievalResponse(
+            query=item.query,
+            results=results,
+            num_results=len(results),
+            detected_language=detect_language(item.query),
+            reranked=was_reranked,
+            processing_time_ms=round(item_time, 2)
+        ))
+    
+    processing_time = (datetime.now() - start_time).total_seconds() * 1000
+    
+    return BatchRetrievalResponse(
+        responses=responses,
+        num_queries=len(responses),
         processing_time_ms=round(processing_time, 2)
     )
 
@@ -434,6 +1369,13 @@ async def transcribe_audio(audio: UploadFile = File(...)):
     
     IndicConformer is a 600M parameter model trained on 44,000+ hours of BhasaAnuvaad dataset
     """
+    stt_loading = any(
+        state.components[name]["status"] in ("pending", "loading")
+        for name in ("stt_indic", "stt_whisper")
+    )
+    if not state.indic_model and not state.whisper_model and stt_loading:
+        raise HTTPException(status_code=503, detail="STT models still loading")
+    
     if not WHISPER_AVAILABLE and not state.indic_model:
         raise HTTPException(
             status_code=501,
@@ -575,12 +1517,18 @@ async def transcribe_audio(audio: UploadFile = File(...)):
 @app.get("/health")
 async def health():
     """Simple health check"""
-    return {"status": "healthy", "ready": state.ready}
+    return {
+        "status": "healthy",
+        "ready": state.ready,
+        "capabilities": state.capabilities()
+    }
 
 
 if __name__ == "__main__":
     import uvicorn
     
+    # Development server (single process, auto-reload).
+    # For production use: python serve.py --workers N
     print(f"Starting server on {settings.host}:{settings.port}")
     uvicorn.run(
         "server:app",
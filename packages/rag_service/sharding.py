@@ -0,0 +1,314 @@
+"""
+Sharded FAISS indexes with scatter-gather search
+
+One index is searched by one call, so its latency grows with the corpus
+however many cores the host has. `python ingest.py --shards N` splits the
+vectors into N independent FAISS indexes instead. The server searches
+every shard in parallel on a thread pool (FAISS releases the GIL) and
+merges the per-shard top-k with a FAISS result heap.
+
+Chunk store, BM25 postings and filters stay global: each shard records
+the global chunk store row of each of its vectors. A filter (a mask over
+global rows) becomes a local IDSelectorBitmap per shard, and local
+labels are mapped back to global rows after each shard's search.
+
+Shards are assigned per document (all chunks of a PDF in one shard, by
+hash of the filename) or per chunk (by hash of the row; evenly sized).
+
+Files (next to the chunk store, instead of faiss_index.bin):
+    shards.json                {"format": 1, "shard_by": "document",
+                                "shards": [{"index": ..., "rows": ...,
+                                            "count": n, "params": {...}}]}
+    faiss_index.shard-000.bin  shard index, labels 0..count-1
+    rows.shard-000.npy         global chunk store row of each label
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from vector_index import (
+    StreamingIndexBuilder, apply_search_defaults, file_digest, make_search_params, read_index
+)
+
+
+SHARDS_FILE = "shards.json"
+SHARDS_FORMAT = 1
+SHARD_BY = ("document", "chunk")
+
+
+def shard_of(filename: str, row: int, num_shards: int, shard_by: str) -> int:
+    """Shard of the chunk at global row of filename (stable across runs)"""
+    if shard_by == "document":
+        key = filename.encode("utf-8")
+    else:
+        key = int(row).to_bytes(8, "little")
+    return zlib.crc32(key) % num_shards
+
+
+def is_sharded(index_dir: str) -> bool:
+    """Whether index_dir holds a sharded index"""
+    return (Path(index_dir) / SHARDS_FILE).exists()
+
+
+class ShardedIndex:
+    """
+    Several FAISS indexes searched as one
+
+    Search results are global chunk store rows. Exposes ntotal and d like
+    a faiss.Index, but searches through search() with keyword knobs
+    rather than a SearchParameters object, since shards of IVF or HNSW
+    indexes each need their own.
+    """
+
+    def __init__(self, shards: List[faiss.Index], rows: List[np.ndarray],
+                 params: List[Dict[str, Any]], shard_by: str = "document",
+                 threads: int = 0):
+        """
+        Args:
+            shards: Shard indexes, labelled 0..ntotal-1 each
+            rows: Global row of each label, one array per shard
+            params: Resolved index parameters of each shard
+            shard_by: How chunks were assigned ("document" or "chunk")
+            threads: Threads searching shards in parallel (0 = one per shard)
+        """
+        self.shards = shards
+        self.rows = [np.ascontiguousarray(r, dtype=np.int64) for r in rows]
+        self.params = params
+        self.shard_by = shard_by
+        self.ntotal = sum(shard.ntotal for shard in shards)
+        self.d = shards[0].d
+        workers = threads or len(shards)
+        self._executor = (ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+                          if len(shards) > 1 and workers > 1 else None)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: Optional[int] = None,
+               ef_search: Optional[int] = None,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search every shard and merge the results
+
+        Args:
+            queries: Normalized query embeddings, shape (n, dim)
+            k: Neighbours per query
+            nprobe: Per-request IVF nprobe override
+            ef_search: Per-request HNSW efSearch override
+            mask: Filter, True for every allowed global row (None = all)
+
+        Returns:
+            (distances, global rows) arrays of shape (n, k), padded with -1
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        empty = (np.full((len(queries), k), -np.inf, dtype=np.float32),
+                 np.full((len(queries), k), -1, dtype=np.int64))
+
+        def search_shard(shard: int) -> Tuple[np.ndarray, np.ndarray]:
+            index, rows = self.shards[shard], self.rows[shard]
+            selector = bitmap = None
+            if mask is not None:
+                local = mask[rows]
+                if not local.any():
+                    return empty
+                if not local.all():
+                    # Local labels are positions in rows; bitmap stays alive until search returns
+                    bitmap = np.packbits(local, bitorder="little")
+                    selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            params = make_search_params(index, nprobe=nprobe, ef_search=ef_search,
+                                        selector=selector)
+            distances, labels = index.search(queries, k, params=params)
+            return distances, np.where(labels >= 0, rows[np.maximum(labels, 0)], -1)
+
+        shards = range(len(self.shards))
+        executor = self._executor
+        try:
+            results = (map(search_shard, shards) if executor is None
+                       else executor.map(search_shard, shards))
+        except RuntimeError:
+            # Closed while a request that started on this index was in flight
+            results = map(search_shard, shards)
+
+        heap = faiss.ResultHeap(len(queries), k, keep_max=True)
+        for distances, labels in results:
+            heap.add_result(np.ascontiguousarray(distances, dtype=np.float32),
+                            np.ascontiguousarray(labels, dtype=np.int64))
+        heap.finalize()
+        return heap.D, heap.I
+
+    def write(self, index_dir: str) -> List[Path]:
+        """
+        Write the shards and shards.json
+
+        Returns:
+            Paths of the shard index files
+        """
+        index_path = Path(index_dir)
+        entries, files = [], []
+        for i, (shard, rows, params) in enumerate(zip(self.shards, self.rows, self.params)):
+            index_file = index_path / f"faiss_index.shard-{i:03d}.bin"
+            rows_file = index_path / f"rows.shard-{i:03d}.npy"
+            faiss.write_index(shard, str(index_file))
+            np.save(rows_file, rows)
+            entries.append({"index": index_file.name, "rows": rows_file.name,
+                            "count": int(shard.ntotal), "params": params})
+            files.append(index_file)
+
+        tmp = index_path / f".{SHARDS_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"format": SHARDS_FORMAT, "shard_by": self.shard_by, "shards": entries},
+                      f, indent=2)
+        os.replace(tmp, index_path / SHARDS_FILE)
+        return files
+
+    @classmethod
+    def read(cls, index_dir: str, mmap: bool = False, nprobe: int = 0, ef_search: int = 0,
+             threads: int = 0) -> "ShardedIndex":
+        """
+        Load a sharded index written by write()
+
+        Args:
+            index_dir: Index directory
+            mmap: Memory-map the shard indexes
+            nprobe: IVF nprobe override (0 = value stored by ingest.py)
+            ef_search: HNSW efSearch override (0 = value stored by ingest.py)
+            threads: Threads searching shards in parallel (0 = one per shard)
+        """
+        index_path = Path(index_dir)
+        with open(index_path / SHARDS_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SHARDS_FORMAT:
+            raise RuntimeError(f"Unsupported shard format in {index_path / SHARDS_FILE}")
+
+        shards, rows, params = [], [], []
+        for entry in manifest["shards"]:
+            shard = read_index(str(index_path / entry["index"]), mmap=mmap)
+            apply_search_defaults(shard, entry["params"], nprobe=nprobe, ef_search=ef_search)
+            shard_rows = np.load(index_path / entry["rows"])
+            if len(shard_rows) != shard.ntotal:
+                raise RuntimeError(
+                    f"Shard {entry['index']} has {shard.ntotal} vectors but "
+                    f"{len(shard_rows)} rows"
+                )
+            shards.append(shard)
+            rows.append(shard_rows)
+            params.append(entry["params"])
+        return cls(shards, rows, params, shard_by=manifest["shard_by"], threads=threads)
+
+    @staticmethod
+    def digest(index_files: Sequence[Path]) -> str:
+        """Content hash of all shard files"""
+        digest = hashlib.blake2b(digest_size=16)
+        for index_file in index_files:
+            digest.update(file_digest(str(index_file)).encode("ascii"))
+        return digest.hexdigest()
+
+    def close(self):
+        """Stop the shard search threads (later searches run serially)"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+class ShardedIndexBuilder:
+    """
+    Builds one StreamingIndexBuilder per shard from embedding batches
+
+    Vectors are numbered in the order they are added, which must be the
+    chunk store row order. With vectors_path set, full-precision vectors
+    are written there in that order (for re-scoring quantized shards).
+    """
+
+    def __init__(self, dim: int, index_type: str, num_shards: int, shard_by: str,
+                 output_dir: str, vectors_path: Optional[str] = None, **index_options):
+        """
+        Args:
+            dim: Embedding dimension
+            index_type: One of INDEX_TYPES
+            num_shards: Number of shards (at least 2)
+            shard_by: "document" or "chunk"
+            output_dir: Directory for the per-shard spill files
+            vectors_path: Keep the full-precision vectors here (None = don't)
+            **index_options: Keyword arguments of resolve_index_params
+
+        Raises:
+            ValueError: If the shard layout is invalid
+        """
+        if num_shards < 2:
+            raise ValueError(f"A sharded index needs at least 2 shards, got {num_shards}")
+        if shard_by not in SHARD_BY:
+            raise ValueError(f"Unknown shard assignment: {shard_by} "
+                             f"(choose from {', '.join(SHARD_BY)})")
+        self.num_shards = num_shards
+        self.shard_by = shard_by
+        self.builders = [
+            StreamingIndexBuilder(
+                dim, index_type,
+                spill_path=str(Path(output_dir) / f"embeddings.shard-{i:03d}.spill"),
+                **index_options
+            )
+            for i in range(num_shards)
+        ]
+        self._rows: List[List[np.ndarray]] = [[] for _ in range(num_shards)]
+        self.vectors_path = vectors_path
+        self._vectors = open(vectors_path, "wb") if vectors_path else None
+        self.count = 0
+        self.params: Optional[Dict[str, Any]] = None
+
+    def add(self, embeddings: np.ndarray, filenames: Sequence[str]):
+        """Add a batch of normalized embeddings with the filename of each"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        rows = np.arange(self.count, self.count + len(embeddings), dtype=np.int64)
+        assignment = np.array([
+            shard_of(filename, row, self.num_shards, self.shard_by)
+            for filename, row in zip(filenames, rows)
+        ], dtype=np.int64)
+        for shard in np.unique(assignment):
+            mask = assignment == shard
+            self.builders[shard].add(embeddings[mask])
+            self._rows[shard].append(rows[mask])
+        if self._vectors is not None:
+            self._vectors.write(embeddings.tobytes())
+        self.count += len(embeddings)
+
+    def discard(self):
+        """Drop everything added so far without building an index"""
+        for builder in self.builders:
+            builder.discard()
+        if self._vectors is not None:
+            self._vectors.close()
+            self._vectors = None
+        if self.vectors_path and os.path.exists(self.vectors_path):
+            os.remove(self.vectors_path)
+
+    def finish(self, threads: int = 0) -> ShardedIndex:
+        """
+        Complete every non-empty shard
+
+        Returns:
+            ShardedIndex; metadata-level parameters in self.params
+        """
+        if self._vectors is not None:
+            self._vectors.close()
+            self._vectors = None
+
+        shards, rows, params = [], [], []
+        for builder, shard_rows in zip(self.builders, self._rows):
+            if builder.count == 0:
+                builder.discard()
+                continue
+            shards.append(builder.finish())
+            rows.append(np.concatenate(shard_rows))
+            params.append(builder.params)
+
+        if not shards:
+            raise ValueError("No vectors were added to any shard")
+        largest = max(range(len(shards)), key=lambda i: shards[i].ntotal)
+        self.params = {**params[largest], "num_shards": len(shards), "shard_by": self.shard_by}
+        return ShardedIndex(shards, rows, params, shard_by=self.shard_by, threads=threads)
+
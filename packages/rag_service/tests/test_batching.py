@@ -0,0 +1,123 @@
+"""
+Unit Tests for /retrieve micro-batching
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from batching import QueryBatcher
+
+
+def make_search(calls):
+    """Fake batched search: row i holds ids 100*i .. 100*i + k - 1"""
+    async def search(queries, k, **options):
+        calls.append((list(queries), k) + ((options,) if options else ()))
+        indices = np.array([[100 * i + j for j in range(k)] for i in range(len(queries))])
+        distances = np.ones_like(indices, dtype=np.float32)
+        return distances, indices
+    return search
+
+
+class TestQueryBatcher:
+    """Test request coalescing"""
+
+    def test_concurrent_queries_share_one_search(self):
+        calls = []
+        batcher = QueryBatcher(make_search(calls), window_ms=5, max_batch=32)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.search("loan", 2),
+                batcher.search("interest rate", 5),
+                batcher.search("kyc", 3),
+            )
+
+        results = asyncio.run(run())
+
+        assert len(calls) == 1
+        assert calls[0] == (["loan", "interest rate", "kyc"], 5)
+        # Each caller gets its own row, sliced to its own k
+        assert list(results[0][1]) == [0, 1]
+        assert list(results[1][1]) == [100, 101, 102, 103, 104]
+        assert list(results[2][1]) == [200, 201, 202]
+
+    def test_flushes_when_batch_is_full(self):
+        calls = []
+        batcher = QueryBatcher(make_search(calls), window_ms=10_000, max_batch=2)
+
+        async def run():
+            return await asyncio.gather(*(batcher.search(f"q{i}", 1) for i in range(4)))
+
+        results = asyncio.run(run())
+
+        assert [len(queries) for queries, _ in calls] == [2, 2]
+        assert batcher.stats()["avg_batch_size"] == 2.0
+        assert len(results) == 4
+
+    def test_errors_propagate_to_every_caller(self):
+        async def failing(queries, k, **options):
+            raise RuntimeError("boom")
+
+        batcher = QueryBatcher(failing, window_ms=1)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.search("a", 1), batcher.search("b", 1), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_cancelled_batch_cancels_every_caller(self):
+        started = []
+
+        async def hang(queries, k, **options):
+            started.append(queries)
+            await asyncio.Event().wait()
+
+        batcher = QueryBatcher(hang, window_ms=1, max_batch=32)
+
+        async def run():
+            callers = [asyncio.ensure_future(batcher.search(q, 1)) for q in ("loan", "kyc")]
+            while not started:
+                await asyncio.sleep(0.001)
+            assert len(batcher._tasks) == 1
+            for task in list(batcher._tasks):
+                task.cancel()
+            results = await asyncio.gather(*callers, return_exceptions=True)
+            await asyncio.sleep(0)
+            return results
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, asyncio.CancelledError) for r in results)
+        assert not batcher._tasks
+
+    def test_different_options_are_not_mixed(self):
+        calls = []
+        batcher = QueryBatcher(make_search(calls), window_ms=5)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.search("a", 1),
+                batcher.search("b", 1, nprobe=32),
+                batcher.search("c", 1, nprobe=32),
+            )
+
+        asyncio.run(run())
+
+        assert sorted(calls, key=len) == [(["a"], 1), (["b", "c"], 1, {"nprobe": 32})]
+
+    def test_disabled_batching_searches_directly(self):
+        calls = []
+        batcher = QueryBatcher(make_search(calls), window_ms=0)
+
+        asyncio.run(batcher.search("loan", 3))
+
+        assert calls == [(["loan"], 3)]
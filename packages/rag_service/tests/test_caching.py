@@ -0,0 +1,140 @@
+"""
+Unit Tests for the in-process caches used by the RAG service
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from caching import LRUCache, QueryEmbeddingCache, ResponseCache, normalize_query
+
+
+class TestLRUCache:
+    """Test the generic LRU cache"""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(max_entries=4, ttl_seconds=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_stats_count_hits_and_misses(self):
+        cache = LRUCache(max_entries=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_disabled_cache(self):
+        cache = LRUCache(max_entries=0)
+        cache.put("a", 1)
+        assert cache.get("a") is None
+
+
+class TestQueryEmbeddingCache:
+    """Test the query-embedding cache"""
+
+    def test_normalized_lookup(self):
+        cache = QueryEmbeddingCache()
+        cache.bind_model("model-a")
+        cache.put("Loan  eligibility ", np.ones(4))
+
+        assert normalize_query("  Loan\teligibility") == "Loan eligibility"
+        assert cache.get("Loan eligibility") is not None
+
+    def test_lookup_is_case_sensitive(self):
+        cache = QueryEmbeddingCache()
+        cache.bind_model("model-a")
+        cache.put("SBI home loan", np.ones(4))
+
+        assert cache.get("sbi home loan") is None
+
+    def test_nfc_variants_share_entry(self):
+        cache = QueryEmbeddingCache()
+        cache.bind_model("model-a")
+        cache.put("\u0915\u093c", np.ones(4))
+
+        assert cache.get("\u0958") is not None
+
+    def test_cached_vectors_are_read_only(self):
+        cache = QueryEmbeddingCache()
+        cache.bind_model("model-a")
+        cache.put("kyc", np.ones(4))
+
+        with pytest.raises(ValueError):
+            cache.get("kyc")[0] = 0.0
+
+    def test_model_change_invalidates(self):
+        cache = QueryEmbeddingCache()
+        cache.bind_model("model-a")
+        cache.put("interest rate", np.ones(4))
+        cache.bind_model("model-b")
+
+        assert cache.get("interest rate") is None
+        assert cache.stats()["size"] == 0
+
+
+class TestResponseCache:
+    """Test the versioned /retrieve response cache"""
+
+    def test_byte_budget_evicts_lru(self):
+        cache = LRUCache(max_entries=100, max_bytes=10)
+        cache.put("a", b"aaaa", nbytes=4)
+        cache.put("b", b"bbbb", nbytes=4)
+        cache.get("a")
+        cache.put("c", b"cccc", nbytes=4)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == b"aaaa"
+        assert cache.nbytes == 8
+
+    def test_oversized_entry_is_not_stored(self):
+        cache = LRUCache(max_entries=100, max_bytes=10)
+        cache.put("a", b"x" * 11, nbytes=11)
+        assert cache.get("a") is None
+        assert cache.nbytes == 0
+
+    def test_new_index_version_purges(self):
+        cache = ResponseCache(max_bytes=1024)
+        cache.bind_index("v1")
+        cache.put("request", b"{}", "v1")
+        assert cache.get("request") == b"{}"
+
+        cache.bind_index("v2")
+        assert cache.get("request") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_stale_version_is_not_stored(self):
+        cache = ResponseCache(max_bytes=1024)
+        cache.bind_index("v2")
+        cache.put("request", b"{}", "v1")
+        assert cache.get("request") is None
+
+    def test_zero_budget_disables(self):
+        cache = ResponseCache(max_bytes=0)
+        cache.bind_index("v1")
+        cache.put("request", b"{}", "v1")
+        assert cache.get("request") is None
@@ -0,0 +1,73 @@
+"""
+Unit Tests for the columnar chunk store
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import ChunkStore, ChunkStoreWriter, load_chunk_store, migrate, write_chunk_store
+
+
+SAMPLE_CHUNKS = [
+    {"chunk_id": 0, "filename": "151.pdf", "page_num": 2, "char_start": 0, "char_end": 40,
+     "text": "Loan eligibility criteria for borrowers."},
+    {"chunk_id": 1, "filename": "151.pdf", "page_num": 3, "char_start": 600, "char_end": 1300,
+     "text": "ब्याज दर " * 20},
+    {"chunk_id": 2, "filename": "149[1].pdf", "page_num": 7, "char_start": 10, "char_end": 60,
+     "text": "KYC documents required by the NBFC."},
+]
+
+
+class TestChunkStore:
+    """Test writing and memory-mapped reading of chunk metadata"""
+
+    def test_round_trip(self, tmp_path):
+        write_chunk_store(SAMPLE_CHUNKS, str(tmp_path))
+        store = ChunkStore.open(str(tmp_path))
+
+        assert len(store) == 3
+        for row, expected in enumerate(SAMPLE_CHUNKS):
+            chunk = store[row]
+            for key in ("chunk_id", "filename", "page_num", "char_start", "char_end", "text"):
+                assert chunk[key] == expected[key]
+
+    def test_excerpt_matches_legacy_rule(self, tmp_path):
+        write_chunk_store(SAMPLE_CHUNKS, str(tmp_path))
+        store = ChunkStore.open(str(tmp_path))
+
+        assert store[0]["excerpt"] == SAMPLE_CHUNKS[0]["text"]
+        assert store[1]["excerpt"] == SAMPLE_CHUNKS[1]["text"][:100] + "..."
+
+    def test_rewrite_keeps_open_store_readable(self, tmp_path):
+        write_chunk_store(SAMPLE_CHUNKS, str(tmp_path))
+        live = ChunkStore.open(str(tmp_path))
+
+        # A new build into the same directory while a server has it mapped
+        writer = ChunkStoreWriter(str(tmp_path))
+        writer.add("new", "new.pdf", 1, 0, 0, 3)
+        assert live[1]["text"] == SAMPLE_CHUNKS[1]["text"]
+        writer.close()
+
+        assert live[1]["text"] == SAMPLE_CHUNKS[1]["text"]
+        assert ChunkStore.open(str(tmp_path))[0]["text"] == "new"
+        assert not list(tmp_path.glob(".*.tmp"))
+
+    def test_legacy_pickle_migration(self, tmp_path):
+        metadata = {"chunks": SAMPLE_CHUNKS, "embedding_model": "test-model"}
+        with open(tmp_path / "metadata.pkl", "wb") as f:
+            pickle.dump(metadata, f)
+
+        # Legacy pickles are readable before migrating...
+        assert load_chunk_store(str(tmp_path), metadata)[2]["filename"] == "149[1].pdf"
+
+        # ...and migration moves chunks out of the pickle
+        assert migrate(str(tmp_path)) == 3
+        with open(tmp_path / "metadata.pkl", "rb") as f:
+            migrated = pickle.load(f)
+        assert "chunks" not in migrated
+        assert migrated["embedding_model"] == "test-model"
+        assert load_chunk_store(str(tmp_path), migrated)[1]["text"] == SAMPLE_CHUNKS[1]["text"]
@@ -0,0 +1,76 @@
+"""
+Unit Tests for token-budget chunking
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunking import TokenChunker, token_spans
+
+
+class WhitespaceTokenizer:
+    """Fast-tokenizer stand-in: one token per word and per punctuation mark"""
+
+    is_fast = True
+    pattern = re.compile(r"\w+|[^\w\s]")
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False,
+                 verbose=True):
+        matches = list(self.pattern.finditer(text))
+        encoding = {"input_ids": list(range(len(matches)))}
+        if return_offsets_mapping:
+            encoding["offset_mapping"] = [match.span() for match in matches]
+        return encoding
+
+
+def make_text(num_sentences: int, words: int = 9) -> str:
+    return " ".join(
+        " ".join(f"w{s}x{w}" for w in range(words)) + ("।" if s % 2 else ".")
+        for s in range(num_sentences)
+    )
+
+
+class TestTokenChunker:
+    """Test budgets, boundaries and character offsets"""
+
+    @pytest.mark.parametrize("max_tokens,overlap", [(8, 0), (16, 4), (40, 10), (64, 8)])
+    def test_chunks_fit_budget_and_cover_text(self, max_tokens, overlap):
+        tokenizer = WhitespaceTokenizer()
+        chunker = TokenChunker(tokenizer, max_tokens, overlap)
+        text = make_text(30)
+        spans = chunker.spans(text)
+
+        assert all(chunker.count_tokens(text[start:end]) <= max_tokens for start, end in spans)
+        assert spans[0][0] == 0 and spans[-1][1] == len(text)
+        # Nothing but whitespace falls between consecutive chunks
+        assert all(not text[prev[1]:nxt[0]].strip() for prev, nxt in zip(spans, spans[1:]))
+
+    def test_cuts_at_sentence_ends(self):
+        # 10 tokens per sentence (9 words + the mark): a 25-token budget fits two
+        chunker = TokenChunker(WhitespaceTokenizer(), 25, 0)
+        text = make_text(6)
+        spans = chunker.spans(text)
+
+        assert len(spans) == 3
+        assert all(text[end - 1] in ".।" for _, end in spans)
+        assert text[spans[1][0]:spans[1][1]].startswith("w2x0")
+
+    def test_overlap_in_tokens(self):
+        offsets = np.array([(2 * i, 2 * i + 1) for i in range(100)])
+        text = " ".join("a" for _ in range(100))
+        spans = token_spans(text, offsets, 30, 5)
+
+        assert spans[0] == (0, 30)
+        assert spans[1] == (25, 55)
+        assert spans[-1][1] == 100
+
+    def test_rejects_bad_budget(self):
+        with pytest.raises(ValueError):
+            TokenChunker(WhitespaceTokenizer(), 16, 16)
@@ -0,0 +1,87 @@
+"""
+Unit Tests for near-duplicate chunk elimination
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import ChunkStore, ChunkStoreWriter
+from dedup import NearDuplicateIndex, lsh_bands
+
+
+CLAUSE = (
+    "All NBFCs shall put in place a board approved policy for grant of loans "
+    "against the security of gold jewellery and shall ensure that the loan to "
+    "value ratio does not exceed seventy five percent at any point of time "
+    "during the tenor of the loan as stipulated in these directions."
+)
+
+
+class TestNearDuplicateIndex:
+    """Test MinHash/LSH duplicate detection"""
+
+    def test_band_layout_crosses_at_threshold(self):
+        bands, rows = lsh_bands(0.8)
+        assert bands * rows == 128
+        assert (1 / bands) ** (1 / rows) <= 0.8
+        # A pair at the threshold shares a band with high probability
+        assert 1 - (1 - 0.8 ** rows) ** bands > 0.9
+
+    def test_page_number_change_is_duplicate(self):
+        dedup = NearDuplicateIndex(0.8)
+        assert dedup.add(10, CLAUSE + " Page 3 of 40") is None
+        assert dedup.add(11, CLAUSE + " Page 4 of 40") == 10
+        assert len(dedup) == 1
+        assert dedup.duplicates == 1
+
+    def test_distinct_text_is_kept(self):
+        dedup = NearDuplicateIndex(0.8)
+        dedup.add(0, CLAUSE)
+        other = ("Know your customer documents must be verified before the account "
+                 "is opened and updated periodically based on the risk category.")
+        assert dedup.add(1, other) is None
+        assert len(dedup) == 2
+
+    def test_duplicates_point_at_first_occurrence(self):
+        dedup = NearDuplicateIndex(0.8)
+        dedup.add(5, CLAUSE)
+        assert dedup.add(6, CLAUSE) == 5
+        assert dedup.add(7, CLAUSE.lower()) == 5
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(0)
+
+
+class TestAlternateLocations:
+    """Test alternate citations stored with the chunk store"""
+
+    def test_round_trip(self, tmp_path):
+        writer = ChunkStoreWriter(str(tmp_path))
+        writer.add(CLAUSE, "151.pdf", 2, 0, 0, len(CLAUSE))
+        writer.add("Another chunk of text.", "151.pdf", 2, 1, 300, 322)
+        writer.add_alternate(0, "149[1].pdf", 9, 40, 40 + len(CLAUSE))
+        writer.add_alternate(0, "151.pdf", 5, 0, len(CLAUSE))
+        writer.close()
+
+        store = ChunkStore.open(str(tmp_path))
+        assert store[0]["alternate_locations"] == [
+            {"filename": "149[1].pdf", "page_num": 9, "char_start": 40,
+             "char_end": 40 + len(CLAUSE)},
+            {"filename": "151.pdf", "page_num": 5, "char_start": 0, "char_end": len(CLAUSE)},
+        ]
+        assert store[1]["alternate_locations"] == []
+
+    def test_store_without_alternates(self, tmp_path):
+        writer = ChunkStoreWriter(str(tmp_path))
+        writer.add(CLAUSE, "151.pdf", 2, 0, 0, len(CLAUSE))
+        writer.close()
+
+        store = ChunkStore.open(str(tmp_path))
+        assert store.alternates is None
+        assert store[0]["alternate_locations"] == []
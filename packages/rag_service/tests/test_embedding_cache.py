@@ -0,0 +1,79 @@
+"""
+Unit Tests for the on-disk embedding cache
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from embedding_cache import KEYS_FILE, VECTORS_FILE, EmbeddingCache
+
+
+DIM = 8
+
+
+class CountingEncoder:
+    """Deterministic fake model that records which texts it was asked to encode"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text) + i for i in range(DIM)] for text in texts],
+                        dtype=np.float32)
+
+
+class TestEmbeddingCache:
+    """Test that only cache misses reach the model"""
+
+    def test_only_misses_are_encoded(self, tmp_path):
+        encoder = CountingEncoder()
+        cache = EmbeddingCache(str(tmp_path), "test-model", DIM)
+        first = cache.encode(["alpha", "beta", "alpha"], encoder)
+        second = cache.encode(["gamma", "beta", "alpha"], encoder)
+
+        assert [sorted(call) for call in encoder.calls] == [["alpha", "beta"], ["gamma"]]
+        np.testing.assert_array_equal(first, encoder(["alpha", "beta", "alpha"]))
+        np.testing.assert_array_equal(second, encoder(["gamma", "beta", "alpha"]))
+        assert (cache.hits, cache.misses) == (2, 4)
+
+    def test_persists_across_opens(self, tmp_path):
+        encoder = CountingEncoder()
+        EmbeddingCache(str(tmp_path), "test-model", DIM).encode(["alpha", "beta"], encoder)
+
+        cache = EmbeddingCache(str(tmp_path), "test-model", DIM)
+        embeddings = cache.encode(["beta", "alpha"], encoder)
+        assert len(encoder.calls) == 1
+        np.testing.assert_array_equal(embeddings, encoder(["beta", "alpha"]))
+
+        # Other models never see these vectors
+        other = EmbeddingCache(str(tmp_path), "other-model", DIM)
+        other.encode(["alpha"], encoder)
+        assert other.misses == 1
+
+    def test_dimension_mismatch(self, tmp_path):
+        EmbeddingCache(str(tmp_path), "test-model", DIM)
+        with pytest.raises(ValueError):
+            EmbeddingCache(str(tmp_path), "test-model", DIM * 2)
+
+    def test_interrupted_append_is_dropped(self, tmp_path):
+        encoder = CountingEncoder()
+        cache = EmbeddingCache(str(tmp_path), "test-model", DIM)
+        cache.encode(["alpha", "beta"], encoder)
+        # Vectors written but the run died before their keys were
+        with open(cache.path / VECTORS_FILE, "ab") as f:
+            f.write(np.ones(DIM + 3, dtype=np.float32).tobytes())
+        with open(cache.path / KEYS_FILE, "ab") as f:
+            f.write(b"partial")
+
+        reopened = EmbeddingCache(str(tmp_path), "test-model", DIM)
+        assert len(reopened) == 2
+        embeddings = reopened.encode(["gamma", "alpha"], encoder)
+        np.testing.assert_array_equal(embeddings, encoder(["gamma", "alpha"]))
+        assert len(EmbeddingCache(str(tmp_path), "test-model", DIM)) == 3
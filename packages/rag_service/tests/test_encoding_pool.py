@@ -0,0 +1,73 @@
+"""
+Unit Tests for length-bucketed embedding generation
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from encoding_pool import BucketedEncoder, plan_batches
+
+
+class RecordingModel:
+    """Embeds a text as [len(text), position of its first char]; records batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return 2
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, convert_to_numpy=True):
+        self.batches.append(list(texts))
+        return np.array([[len(text), ord(text[0])] for text in texts], dtype=np.float32)
+
+
+class TestPlanBatches:
+    """Test grouping texts by length within a token budget"""
+
+    def test_batches_cover_every_text_once(self):
+        lengths = np.random.default_rng(0).integers(1, 300, size=500)
+        batches = plan_batches(lengths, max_batch_tokens=1024, max_batch_size=64)
+        np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(500))
+
+    def test_padded_size_within_budget(self):
+        lengths = np.random.default_rng(1).integers(1, 300, size=500)
+        for batch in plan_batches(lengths, max_batch_tokens=1024, max_batch_size=64):
+            assert len(batch) * lengths[batch].max() <= 1024
+
+    def test_short_texts_get_larger_batches(self):
+        lengths = np.array([10] * 100 + [200] * 100)
+        batches = plan_batches(lengths, max_batch_tokens=2000, max_batch_size=100)
+        assert [len(batch) for batch in batches] == [10] * 10 + [100]
+
+    def test_text_over_budget_gets_own_batch(self):
+        batches = plan_batches(np.array([5000, 5]), max_batch_tokens=1000)
+        assert [list(batch) for batch in batches] == [[0], [1]]
+
+
+class TestBucketedEncoder:
+    """Test in-process bucketed encoding"""
+
+    def test_restores_input_order(self):
+        model = RecordingModel()
+        encoder = BucketedEncoder(model, "recording", max_batch_tokens=40)
+        texts = ["a" * 3, "b" * 30, "c" * 7, "d" * 12, "e" * 30, "f"]
+        embeddings = encoder.encode(texts)
+
+        np.testing.assert_array_equal(embeddings[:, 0], [len(text) for text in texts])
+        np.testing.assert_array_equal(embeddings[:, 1], [ord(text[0]) for text in texts])
+        assert model.batches[0] == ["b" * 30]
+
+    def test_empty_input(self):
+        encoder = BucketedEncoder(RecordingModel(), "recording")
+        assert encoder.encode([]).shape == (0, 2)
+
+    def test_invalid_budget(self):
+        with pytest.raises(ValueError):
+            BucketedEncoder(RecordingModel(), "recording", max_batch_tokens=0)
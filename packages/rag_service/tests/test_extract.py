@@ -0,0 +1,101 @@
+"""
+Unit Tests for page-parallel PDF text extraction
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import ingest
+
+
+def fake_extract_pages(pdf_path, page_nums):
+    """Page 7 can't be parsed, page 9 has no text, pages 13-15 crash their worker"""
+    if 14 in page_nums:
+        raise RuntimeError("worker died")
+    return [
+        (page_num, "" if page_num in (7, 9) else f"text of page {page_num}",
+         "pdfplumber: ValueError: bad xref" if page_num == 7 else None)
+        for page_num in page_nums
+    ]
+
+
+def crashing_extract_pages(pdf_path, page_nums):
+    """Like fake_extract_pages, but page 14 kills its worker process"""
+    if 14 in page_nums:
+        os._exit(1)
+    return fake_extract_pages(pdf_path, page_nums)
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    monkeypatch.setattr(ingest, "count_pages", lambda pdf_path: 20)
+    monkeypatch.setattr(ingest, "extract_pages", fake_extract_pages)
+
+
+class TestExtractPdfPages:
+    """Test ordering and per-page error isolation"""
+
+    @pytest.mark.parametrize("workers", [2, 3, 8])
+    def test_parallel_keeps_page_order(self, fake_pdf, workers):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pages, failures = ingest.extract_pdf_pages("doc.pdf", pool, workers)
+
+        page_nums = [page_num for page_num, _ in pages]
+        assert page_nums == sorted(page_nums)
+        assert all(text == f"text of page {page_num}" for page_num, text in pages)
+
+    def test_failures_are_isolated(self, fake_pdf):
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            pages, failures = ingest.extract_pdf_pages("doc.pdf", pool, 5)
+
+        # 20 pages, 5 workers -> batches of one page, so only page 14 is lost to the crash
+        assert failures[7].startswith("pdfplumber")
+        assert failures[14].startswith("worker: RuntimeError")
+        assert set(failures) == {7, 14}
+        assert [page_num for page_num, _ in pages] == [
+            n for n in range(1, 21) if n not in (7, 9, 14)
+        ]
+
+    def test_single_process(self, monkeypatch):
+        monkeypatch.setattr(ingest, "count_pages", lambda pdf_path: 3)
+        monkeypatch.setattr(ingest, "extract_pages", fake_extract_pages)
+
+        pages, failures = ingest.extract_pdf_pages("doc.pdf")
+        assert pages == [(n, f"text of page {n}") for n in (1, 2, 3)]
+        assert failures == {}
+
+    def test_worker_crash_loses_only_its_batch(self, monkeypatch):
+        monkeypatch.setattr(ingest, "count_pages", lambda pdf_path: 20)
+        monkeypatch.setattr(ingest, "extract_pages", crashing_extract_pages)
+        pools = [ProcessPoolExecutor(max_workers=5)]
+
+        def restart_pool():
+            pools[-1].shutdown(cancel_futures=True)
+            pools.append(ProcessPoolExecutor(max_workers=5))
+            return pools[-1]
+
+        try:
+            pages, failures = ingest.extract_pdf_pages("doc.pdf", pools[0], 5, restart_pool)
+            assert set(failures) == {7, 14}
+            assert failures[14].startswith("worker: BrokenProcessPool")
+            assert [page_num for page_num, _ in pages] == [
+                n for n in range(1, 21) if n not in (7, 9, 14)
+            ]
+
+            # A pool broken by an earlier PDF is replaced before submitting
+            broken = restart_pool()
+            with pytest.raises(Exception):
+                broken.submit(os._exit, 1).result()
+            monkeypatch.setattr(ingest, "count_pages", lambda pdf_path: 10)
+            pages, failures = ingest.extract_pdf_pages("next.pdf", broken, 5, restart_pool)
+            assert set(failures) == {7}
+            assert len(pages) == 8
+        finally:
+            pools[-1].shutdown()
@@ -0,0 +1,162 @@
+"""
+Unit Tests for metadata-filtered search
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import ChunkStore, chunk_language
+from filters import FilterIndex, SearchFilter
+from vector_index import (
+    create_index, make_search_params, resolve_index_params, search_subset, train_index,
+    update_index
+)
+
+
+def make_chunks():
+    """Three documents, 4 pages each, 2 chunks per page; doc b.pdf is Hindi"""
+    chunks = []
+    for filename in ("a.pdf", "b.pdf", "c.pdf"):
+        for page in range(1, 5):
+            for _ in range(2):
+                text = "ब्याज दर नियम" if filename == "b.pdf" else "Interest rate rules"
+                chunks.append({"chunk_id": len(chunks), "filename": filename, "page_num": page,
+                               "char_start": 0, "char_end": len(text), "text": text})
+    return chunks
+
+
+def expected_ids(chunks, filenames=None, page_min=None, page_max=None, language=None):
+    return [
+        row for row, chunk in enumerate(chunks)
+        if (filenames is None or chunk["filename"] in filenames)
+        and (page_min is None or chunk["page_num"] >= page_min)
+        and (page_max is None or chunk["page_num"] <= page_max)
+        and (language is None or chunk_language(chunk["text"]) == language)
+    ]
+
+
+class TestFilterIndex:
+    """Test resolving filters to label ranges and masks"""
+
+    def test_chunk_language(self):
+        assert chunk_language("ब्याज दर नियम") == "hi"
+        assert chunk_language("KYC norms") == "en"
+        assert chunk_language("RBI circular: ब्याज दर नियम") == "hi"
+
+    @pytest.mark.parametrize("spec", [
+        {"filenames": ("b.pdf",)},
+        {"filenames": ("b.pdf",), "page_min": 2, "page_max": 3},
+        {"filenames": ("a.pdf", "c.pdf"), "page_max": 1},
+        {"page_min": 4},
+        {"language": "hi"},
+        {"filenames": ("a.pdf", "b.pdf"), "language": "en"},
+        {"filenames": ("missing.pdf",)},
+    ])
+    def test_selection_matches_brute_force(self, spec):
+        chunks = make_chunks()
+        selection = FilterIndex(ChunkStore.from_chunks(chunks)).select(SearchFilter(**spec))
+
+        assert list(selection.ids) == expected_ids(chunks, **spec)
+        assert selection.count == len(expected_ids(chunks, **spec))
+
+    def test_single_document_is_one_range(self):
+        selection = FilterIndex(ChunkStore.from_chunks(make_chunks())).select(
+            SearchFilter(filenames=("b.pdf",), page_min=2))
+        assert selection.ranges.tolist() == [[10, 16]]
+        assert isinstance(selection.selector(), faiss.IDSelectorRange)
+
+    def test_interleaved_documents_fall_back_to_mask(self):
+        chunks = make_chunks()
+        chunks[0], chunks[-1] = chunks[-1], chunks[0]
+        filters = FilterIndex(ChunkStore.from_chunks(chunks))
+
+        assert not filters.contiguous
+        selection = filters.select(SearchFilter(filenames=("a.pdf",), page_max=2))
+        assert list(selection.ids) == expected_ids(chunks, filenames=("a.pdf",), page_max=2)
+
+
+class TestFilteredSearch:
+    """Test that selectors restrict FAISS results for every index type"""
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf-flat"])
+    def test_results_stay_inside_filter(self, index_type):
+        chunks = make_chunks() * 100
+        for row, chunk in enumerate(chunks):
+            chunks[row] = dict(chunk, chunk_id=row)
+        chunks.sort(key=lambda chunk: (chunk["filename"], chunk["page_num"]))
+
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((len(chunks), 32)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        params = resolve_index_params(index_type, len(vectors), nlist=8)
+        index = create_index(32, params)
+        train_index(index, vectors, params)
+        index.add(vectors)
+
+        selection = FilterIndex(ChunkStore.from_chunks(chunks)).select(
+            SearchFilter(filenames=("c.pdf",), page_min=3))
+        search_params = make_search_params(index, selector=selection.selector())
+        _, indices = index.search(vectors[:5], 10, params=search_params)
+
+        allowed = set(selection.ids.tolist())
+        assert all(label in allowed for label in indices.ravel() if label != -1)
+
+    def test_filter_after_incremental_update(self):
+        chunks = make_chunks() * 100
+        chunks.sort(key=lambda chunk: (chunk["filename"], chunk["page_num"]))
+        for row, chunk in enumerate(chunks):
+            chunks[row] = dict(chunk, chunk_id=row)
+
+        rng = np.random.default_rng(2)
+        vectors = rng.standard_normal((len(chunks) + 200, 32)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        params = resolve_index_params("ivf-flat", len(chunks), nlist=8, nprobe=8)
+        index = create_index(32, params)
+        train_index(index, vectors[:len(chunks)], params)
+        index.add(vectors[:len(chunks)])
+
+        # Re-ingest a.pdf: its old chunk ids are removed, new ones appended
+        removed = np.array([c["chunk_id"] for c in chunks if c["filename"] == "a.pdf"])
+        new_ids = np.arange(len(chunks), len(chunks) + 200)
+        index = update_index(index, params, removed, vectors[len(chunks):], new_ids)
+        chunks = [c for c in chunks if c["filename"] != "a.pdf"] + [
+            {"chunk_id": int(chunk_id), "filename": "a.pdf", "page_num": 1 + i // 50,
+             "char_start": 0, "char_end": 4, "text": "Interest rate rules"}
+            for i, chunk_id in enumerate(new_ids)
+        ]
+        labels = np.array([c["chunk_id"] for c in chunks], dtype=np.int64)
+        filters = FilterIndex(ChunkStore.from_chunks(chunks), labels=labels)
+
+        for spec in ({"filenames": ("c.pdf",), "page_min": 3},
+                     {"filenames": ("b.pdf",)},
+                     {"filenames": ("a.pdf",), "page_max": 2}):
+            selection = filters.select(SearchFilter(**spec))
+            expected = labels[expected_ids(chunks, **spec)]
+            search_params = make_search_params(index, nprobe=8, selector=selection.selector())
+            _, found = index.search(vectors[:3], selection.count, params=search_params)
+            for row in found:
+                # Every list is probed, so each query must reach every match
+                assert sorted(row.tolist()) == sorted(expected.tolist())
+
+    def test_search_subset_is_exact(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((200, 16)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        index = faiss.IndexFlatIP(16)
+        index.add(vectors)
+        ids = np.arange(50, 80)
+
+        distances, indices = search_subset(index, vectors[:3], 5, ids)
+        scores = vectors[:3] @ vectors[ids].T
+        np.testing.assert_array_equal(indices, ids[np.argsort(-scores, axis=1)[:, :5]])
+        np.testing.assert_allclose(distances, np.sort(scores, axis=1)[:, ::-1][:, :5], rtol=1e-5)
+
+        _, padded = search_subset(index, vectors[:1], 5, ids[:2])
+        assert list(padded[0, 2:]) == [-1, -1, -1]
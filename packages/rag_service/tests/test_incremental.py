@@ -0,0 +1,193 @@
+"""
+Unit Tests for incremental ingestion (manifest diffing and index updates)
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import ChunkStore
+from filters import SearchFilter
+from index_bundle import IndexBundle
+from manifest import IngestManifest
+from vector_index import (
+    create_index, make_search_params, resolve_index_params, train_index, update_index
+)
+
+
+CONFIG = {"embedding_model": "test-model", "chunk_size": 700, "chunk_overlap": 100,
+          "index_type": "flat"}
+
+
+def write_pdf(path: Path, content: bytes) -> Path:
+    path.write_bytes(content)
+    return path
+
+
+class TestManifest:
+    """Test change detection and chunk-id allocation"""
+
+    def test_diff(self, tmp_path):
+        a = write_pdf(tmp_path / "a.pdf", b"a" * 10)
+        b = write_pdf(tmp_path / "b.pdf", b"b" * 10)
+        c = write_pdf(tmp_path / "c.pdf", b"c" * 10)
+        manifest = IngestManifest(CONFIG)
+        for pdf, num_chunks in ((a, 3), (b, 2), (c, 4)):
+            manifest.record(pdf, num_chunks)
+
+        write_pdf(b, b"B" * 10)  # same size, new content
+        c.unlink()
+        d = write_pdf(tmp_path / "d.pdf", b"d" * 5)
+        diff = manifest.diff([a, b, d])
+
+        assert diff.added == [d]
+        assert diff.changed == [b]
+        assert diff.removed == ["c.pdf"]
+        assert diff.unchanged == ["a.pdf"]
+        assert diff.to_remove == ["b.pdf", "c.pdf"]
+        assert manifest.chunk_ids(diff.to_remove) == [3, 4, 5, 6, 7, 8]
+
+    def test_failed_extraction_is_retried(self, tmp_path):
+        a = write_pdf(tmp_path / "a.pdf", b"a" * 10)
+        b = write_pdf(tmp_path / "b.pdf", b"b" * 10)
+        manifest = IngestManifest(CONFIG)
+        manifest.record(a, 0)
+        manifest.record(b, 0, failed=True)
+
+        diff = manifest.diff([a, b])
+        assert diff.changed == [b]
+        assert diff.unchanged == ["a.pdf"]
+
+        manifest.forget(diff.to_remove)
+        manifest.record(b, 2)
+        assert manifest.diff([a, b]).unchanged == ["a.pdf", "b.pdf"]
+
+    def test_ids_are_never_reused(self, tmp_path):
+        a = write_pdf(tmp_path / "a.pdf", b"a")
+        manifest = IngestManifest(CONFIG)
+        assert manifest.record(a, 3) == 0
+
+        manifest.forget(["a.pdf"])
+        assert manifest.record(a, 2) == 3
+        assert manifest.documents["a.pdf"]["chunk_ids"] == [3, 5]
+
+    def test_round_trip(self, tmp_path):
+        manifest = IngestManifest(CONFIG)
+        manifest.record(write_pdf(tmp_path / "a.pdf", b"a"), 3)
+        manifest.save(str(tmp_path))
+
+        loaded = IngestManifest.load(str(tmp_path))
+        assert loaded.config == CONFIG
+        assert loaded.documents == manifest.documents
+        assert loaded.next_chunk_id == 3
+
+
+class TestUpdateIndex:
+    """Test deleting and appending vectors by chunk id"""
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf-flat"])
+    def test_update_matches_rebuild(self, index_type):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((400, 16)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        params = resolve_index_params(index_type, 300, nlist=4, nprobe=4)
+        index = create_index(16, params)
+        train_index(index, vectors[:300], params)
+        index.add(vectors[:300])
+
+        removed = np.arange(100, 200)
+        index = update_index(index, params, removed, vectors[300:], np.arange(300, 400))
+        labels = np.setdiff1d(np.arange(400), removed)
+
+        assert index.ntotal == 300
+        distances, found = index.search(vectors[labels[::7]], 1)
+        np.testing.assert_array_equal(found[:, 0], labels[::7])
+
+        _, found = index.search(vectors[100:200], 400)
+        assert not np.isin(found, removed).any()
+
+
+class TestIdMappedBundle:
+    """Test translating chunk-id labels back to chunk store rows"""
+
+    def make_bundle(self, index_type="ivf"):
+        # Rows hold chunk ids 0-3 (doc a) and 10-13 (doc c); ids 4-9 were deleted
+        chunk_ids = [0, 1, 2, 3, 10, 11, 12, 13]
+        chunks = ChunkStore.from_chunks([
+            {"chunk_id": chunk_id, "filename": "a.pdf" if chunk_id < 10 else "c.pdf",
+             "page_num": 1 + (chunk_id % 10) // 2, "char_start": 0, "char_end": 4,
+             "text": f"text {chunk_id}"}
+            for chunk_id in chunk_ids
+        ])
+        vectors = np.eye(16, dtype=np.float32)[chunk_ids]
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(16), 16, 1, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        else:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(16))
+        index.add_with_ids(vectors, np.array(chunk_ids, dtype=np.int64))
+        return IndexBundle(index, chunks, {"id_mapped": True}), vectors
+
+    def test_rows(self):
+        bundle, vectors = self.make_bundle()
+        _, labels = bundle.index.search(vectors, 1)
+
+        np.testing.assert_array_equal(bundle.rows(labels[:, 0]), np.arange(8))
+        np.testing.assert_array_equal(bundle.rows(np.array([-1, 5, 13])), [-1, -1, 7])
+
+    def test_flat_is_unwrapped(self):
+        bundle, vectors = self.make_bundle("flat")
+        _, labels = bundle.index.search(vectors, 1)
+
+        assert bundle.labels is None
+        assert isinstance(bundle.index, faiss.IndexFlat)
+        np.testing.assert_array_equal(bundle.rows(labels[:, 0]), np.arange(8))
+
+    @pytest.mark.parametrize("index_type", ["ivf", "flat"])
+    @pytest.mark.parametrize("search_filter", [
+        SearchFilter(filenames=("c.pdf",)),
+        SearchFilter(filenames=("c.pdf",), page_min=2),
+        SearchFilter(filenames=("a.pdf", "c.pdf"), page_max=1),
+        SearchFilter(language="en"),
+    ])
+    def test_filters_select_labels(self, search_filter, index_type):
+        bundle, vectors = self.make_bundle(index_type)
+        selection = bundle.filters.select(search_filter)
+        params = make_search_params(bundle.index, selector=selection.selector())
+        _, labels = bundle.index.search(vectors[:1], 8, params=params)
+        rows = bundle.rows(labels[0])
+
+        assert sorted(rows[rows >= 0].tolist()) == np.flatnonzero(selection.mask).tolist()
+        if bundle.labels is not None:
+            assert selection.ids.tolist() == bundle.labels[selection.mask].tolist()
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+    def test_updated_index_takes_search_params(self, index_type):
+        vectors = np.random.default_rng(0).standard_normal((60, 16)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        params = resolve_index_params(index_type, 40)
+        index = create_index(16, params)
+        index.add(vectors[:40])
+        index = update_index(index, params, np.arange(10, 20), vectors[40:], np.arange(40, 60))
+
+        chunk_ids = np.setdiff1d(np.arange(60), np.arange(10, 20))
+        chunks = ChunkStore.from_chunks([
+            {"chunk_id": int(chunk_id), "filename": "a.pdf" if chunk_id < 30 else "b.pdf",
+             "page_num": 1, "char_start": 0, "char_end": 4, "text": "text"}
+            for chunk_id in chunk_ids
+        ])
+        bundle = IndexBundle(index, chunks, {"id_mapped": True})
+        selection = bundle.filters.select(SearchFilter(filenames=("b.pdf",)))
+        search_params = make_search_params(bundle.index, ef_search=64,
+                                           selector=selection.selector())
+        _, labels = bundle.index.search(vectors[40:45], 5, params=search_params)
+
+        rows = bundle.rows(labels)
+        assert (rows >= 0).all()
+        assert np.isin(chunk_ids[rows], np.arange(30, 60)).all()
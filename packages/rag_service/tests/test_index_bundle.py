@@ -0,0 +1,108 @@
+"""
+Unit Tests for index versioning and bundle loading
+"""
+
+import pickle
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import write_chunk_store
+from filters import SearchFilter
+from index_bundle import (
+    CURRENT_FILE, IndexBundle, current_version, list_versions, resolve_index_dir, set_current
+)
+
+
+def write_index(index_dir: Path, num_chunks: int = 6, dim: int = 8, created_at: str = "t0"):
+    """Minimal ingest.py output: flat index, chunk store and metadata.pkl"""
+    index_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(num_chunks)
+    index = faiss.IndexFlatIP(dim)
+    index.add(rng.standard_normal((num_chunks, dim)).astype(np.float32))
+    faiss.write_index(index, str(index_dir / "faiss_index.bin"))
+    write_chunk_store([
+        {"chunk_id": i, "filename": "a.pdf", "page_num": 1 + i // 2,
+         "char_start": 0, "char_end": 9, "text": f"chunk {i}"}
+        for i in range(num_chunks)
+    ], str(index_dir))
+    with open(index_dir / "metadata.pkl", "wb") as f:
+        pickle.dump({"embedding_model": "test-model", "created_at": created_at,
+                     "index_params": {"index_type": "flat"}}, f)
+
+
+class TestVersions:
+    """Test version discovery and the CURRENT pointer"""
+
+    def test_flat_layout(self, tmp_path):
+        write_index(tmp_path)
+
+        assert list_versions(str(tmp_path)) == []
+        assert current_version(str(tmp_path)) is None
+        assert resolve_index_dir(str(tmp_path)) == tmp_path
+
+    def test_newest_version_without_pointer(self, tmp_path):
+        write_index(tmp_path / "20240101-000000")
+        write_index(tmp_path / "20240201-000000")
+        (tmp_path / "not-an-index").mkdir()
+
+        assert list_versions(str(tmp_path)) == ["20240101-000000", "20240201-000000"]
+        assert resolve_index_dir(str(tmp_path)) == tmp_path / "20240201-000000"
+
+    def test_current_pointer_wins(self, tmp_path):
+        write_index(tmp_path / "20240101-000000")
+        write_index(tmp_path / "20240201-000000")
+        set_current(str(tmp_path), "20240101-000000")
+
+        assert current_version(str(tmp_path)) == "20240101-000000"
+        assert resolve_index_dir(str(tmp_path)) == tmp_path / "20240101-000000"
+        assert not list(tmp_path.glob(f".{CURRENT_FILE}*"))
+
+    def test_set_current_rejects_missing_version(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            set_current(str(tmp_path), "missing")
+
+    def test_rejects_path_traversal(self, tmp_path):
+        with pytest.raises(ValueError):
+            resolve_index_dir(str(tmp_path), "../elsewhere")
+
+
+class TestIndexBundle:
+    """Test loading a bundle from disk"""
+
+    def test_load(self, tmp_path):
+        write_index(tmp_path / "v1", num_chunks=6, created_at="t1")
+        bundle = IndexBundle.load(tmp_path / "v1")
+
+        assert bundle.index.ntotal == 6
+        assert len(bundle.chunks) == 6
+        assert bundle.chunks[3]["text"] == "chunk 3"
+        assert bundle.bm25 is None
+        assert bundle.version.endswith("@t1")
+        assert bundle.filters.select(SearchFilter(filenames=("a.pdf",), page_max=1)).count == 2
+        assert bundle.describe()["num_chunks"] == 6
+
+    def test_versions_differ(self, tmp_path):
+        write_index(tmp_path / "v1", num_chunks=6, created_at="t1")
+        write_index(tmp_path / "v2", num_chunks=8, created_at="t2")
+
+        assert IndexBundle.load(tmp_path / "v1").version != IndexBundle.load(tmp_path / "v2").version
+
+    def test_chunk_count_mismatch(self, tmp_path):
+        write_index(tmp_path)
+        index = faiss.read_index(str(tmp_path / "faiss_index.bin"))
+        index.add(np.zeros((1, index.d), dtype=np.float32))
+        faiss.write_index(index, str(tmp_path / "faiss_index.bin"))
+
+        with pytest.raises(RuntimeError, match="chunk store"):
+            IndexBundle.load(tmp_path)
+
+    def test_missing_directory(self, tmp_path):
+        with pytest.raises(RuntimeError, match="not found"):
+            IndexBundle.load(tmp_path / "missing")
@@ -0,0 +1,110 @@
+"""
+Unit Tests for BM25 lexical retrieval and rank fusion
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+CORPUS = [
+    "Loan eligibility criteria for salaried borrowers.",
+    "KYC documents required by the NBFC under Section 45-IA.",
+    "यह हिंदी पाठ ब्याज दर के बारे में है।",
+    "The interest rate is 7.5% on deposits up to 5,00,000 rupees.",
+]
+
+
+class TestTokenize:
+    """Test Devanagari-aware tokenization"""
+
+    def test_acronyms_and_sections(self):
+        assert tokenize("NBFC KYC Section 45-IA") == ["nbfc", "kyc", "section", "45", "ia"]
+
+    def test_devanagari_words_stay_whole(self):
+        assert tokenize("यह हिंदी पाठ है।") == ["यह", "हिंदी", "पाठ", "है"]
+
+    def test_numbers_keep_separators(self):
+        assert tokenize("5,00,000 at 7.5%") == ["500000", "at", "7.5"]
+
+
+class TestBM25Index:
+    """Test index construction, scoring and persistence"""
+
+    def test_exact_token_ranks_first(self):
+        bm25 = BM25Index.build(CORPUS)
+        scores, ids = bm25.search("NBFC KYC", k=3)
+
+        assert ids[0] == 1
+        assert len(ids) == 1  # only documents that match are returned
+        assert scores[0] > 0
+
+    def test_hindi_query(self):
+        bm25 = BM25Index.build(CORPUS)
+        _, ids = bm25.search("ब्याज दर", k=2)
+        assert ids[0] == 2
+
+    def test_unknown_terms_return_nothing(self):
+        bm25 = BM25Index.build(CORPUS)
+        scores, ids = bm25.search("cryptocurrency", k=5)
+        assert len(scores) == 0 and len(ids) == 0
+
+    def test_mask_excludes_documents(self):
+        bm25 = BM25Index.build(CORPUS)
+        mask = np.ones(len(CORPUS), dtype=bool)
+        mask[1] = False
+        _, ids = bm25.search("NBFC", k=5, mask=mask)
+        assert 1 not in ids
+
+    def test_save_and_load(self, tmp_path):
+        bm25 = BM25Index.build(CORPUS, k1=1.2, b=0.6)
+        bm25.save(str(tmp_path))
+
+        assert BM25Index.exists(str(tmp_path))
+        loaded = BM25Index.load(str(tmp_path))
+        assert np.allclose([loaded.k1, loaded.b], [1.2, 0.6])
+        np.testing.assert_allclose(loaded.score("interest rate 7.5"), bm25.score("interest rate 7.5"))
+
+    def test_long_token_does_not_widen_vocabulary(self, tmp_path):
+        bm25 = BM25Index.build(CORPUS + ["x" * 100_000])
+        bm25.save(str(tmp_path))
+
+        with np.load(tmp_path / "bm25.npz") as data:
+            assert data["term_bytes"].nbytes < 100_000 + 1000
+        loaded = BM25Index.load(str(tmp_path))
+        assert loaded.terms == bm25.terms
+        _, ids = loaded.search("हिंदी", k=1)
+        assert list(ids) == [2]
+
+    def test_loads_legacy_terms_array(self, tmp_path):
+        bm25 = BM25Index.build(CORPUS)
+        np.savez(tmp_path / "bm25.npz", terms=np.array(bm25.terms, dtype=str),
+                 indptr=bm25.indptr, doc_ids=bm25.doc_ids, tfs=bm25.tfs,
+                 doc_len=bm25.doc_len, params=np.array([bm25.k1, bm25.b], dtype=np.float32))
+
+        loaded = BM25Index.load(str(tmp_path))
+        assert loaded.terms == bm25.terms
+        np.testing.assert_allclose(loaded.score("NBFC KYC"), bm25.score("NBFC KYC"))
+
+
+class TestReciprocalRankFusion:
+    """Test fusing dense and lexical rankings"""
+
+    def test_shared_hits_rank_first(self):
+        dense = np.array([3, 0, 1])
+        lexical = np.array([1, 2])
+        scores, ids = reciprocal_rank_fusion([dense, lexical], k=4, rrf_k=60)
+
+        assert ids[0] == 1  # present in both rankings
+        assert set(ids) == {0, 1, 2, 3}
+        assert np.all(np.diff(scores) <= 0)
+
+    def test_ignores_missing_results(self):
+        _, ids = reciprocal_rank_fusion([np.array([2, -1, -1])], k=5)
+        assert list(ids) == [2]
@@ -0,0 +1,93 @@
+"""
+Unit Tests for the ONNX Runtime query encoder backend
+
+Uses a tiny randomly initialized transformer, so no model download is needed.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from onnx_encoder import OnnxEncoder, PROBE_TEXTS, embedding_agreement
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """SentenceTransformer with a 2-layer BERT and a word-level tokenizer"""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from tokenizers import Tokenizer, models as tokenizer_models, pre_tokenizers
+    from transformers import BertConfig, BertModel, PreTrainedTokenizerFast
+
+    model_dir = tmp_path_factory.mktemp("tiny_model")
+    words = sorted({word for text in PROBE_TEXTS for word in text.split()})
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]", "[CLS]", "[SEP]"] + words)}
+    tokenizer = Tokenizer(tokenizer_models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="[PAD]", unk_token="[UNK]",
+        cls_token="[CLS]", sep_token="[SEP]"
+    ).save_pretrained(str(model_dir))
+
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+                        num_attention_heads=2, intermediate_size=64)
+    BertModel(config).save_pretrained(str(model_dir))
+
+    transformer = models.Transformer(str(model_dir), max_seq_length=32)
+    pooling = models.Pooling(32, "mean")
+    return SentenceTransformer(modules=[transformer, pooling], device="cpu")
+
+
+class TestOnnxEncoder:
+    """Test export, encoding fidelity and quantization"""
+
+    def test_fp32_matches_torch(self, tiny_model, tmp_path):
+        encoder = OnnxEncoder.from_sentence_transformer(tiny_model, str(tmp_path), "tiny/model")
+
+        assert encoder.backend == "onnx"
+        assert encoder.get_sentence_embedding_dimension() == 32
+        assert embedding_agreement(tiny_model, encoder) > 0.9999
+
+    def test_batches_with_padding(self, tiny_model, tmp_path):
+        encoder = OnnxEncoder.from_sentence_transformer(tiny_model, str(tmp_path), "tiny/model")
+        together = encoder.encode(PROBE_TEXTS, batch_size=len(PROBE_TEXTS))
+        alone = np.concatenate([encoder.encode([text]) for text in PROBE_TEXTS])
+
+        assert together.shape == (len(PROBE_TEXTS), 32)
+        np.testing.assert_allclose(together, alone, atol=1e-4)
+
+    def test_int8_stays_close(self, tiny_model, tmp_path):
+        encoder = OnnxEncoder.from_sentence_transformer(
+            tiny_model, str(tmp_path), "tiny/model", quantized=True
+        )
+
+        assert encoder.backend == "onnx-int8"
+        assert (tmp_path / "tiny__model" / "model.int8.onnx").exists()
+        assert embedding_agreement(tiny_model, encoder) > 0.95
+
+    def test_export_is_cached(self, tiny_model, tmp_path):
+        OnnxEncoder.from_sentence_transformer(tiny_model, str(tmp_path), "tiny/model")
+        model_file = tmp_path / "tiny__model" / "model.onnx"
+        exported_at = model_file.stat().st_mtime_ns
+
+        OnnxEncoder.from_sentence_transformer(tiny_model, str(tmp_path), "tiny/model")
+        assert model_file.stat().st_mtime_ns == exported_at
+
+    def test_agreement_recorded_at_export(self, tiny_model, tmp_path):
+        encoder = OnnxEncoder.from_sentence_transformer(tiny_model, str(tmp_path), "tiny/model")
+        assert encoder.agreement > 0.9999
+        assert (tmp_path / "tiny__model" / "agreement.json").exists()
+
+        # A cached export reads the stored value instead of measuring again
+        cached = OnnxEncoder(str(tmp_path / "tiny__model"))
+        assert cached.agreement == encoder.agreement
+        assert cached._session is None
+        assert OnnxEncoder(str(tmp_path / "tiny__model"), quantized=True).agreement is None
@@ -0,0 +1,62 @@
+"""
+Unit Tests for cross-encoder reranking
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from reranker import Reranker, query_hash
+
+
+class KeywordCrossEncoder:
+    """Scores a pair by how many query words occur in the chunk"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        return np.array([
+            sum(word in text.lower() for word in query.lower().split())
+            for query, text in pairs
+        ], dtype=np.float32)
+
+
+class TestReranker:
+    """Test pair scoring and the pair-score cache"""
+
+    def test_scores_in_one_batch(self):
+        model = KeywordCrossEncoder()
+        reranker = Reranker(model)
+        scores = reranker.score("kyc norms", [1, 2, 3],
+                                ["Loan tenure", "KYC norms for NBFCs", "KYC update"])
+
+        assert list(scores) == [0.0, 2.0, 1.0]
+        assert model.batches == [3]
+
+    def test_cache_only_scores_new_pairs(self):
+        model = KeywordCrossEncoder()
+        reranker = Reranker(model)
+        reranker.score("KYC norms", [1, 2], ["Loan tenure", "KYC norms"])
+        scores = reranker.score("  KYC   norms ", [2, 3], ["KYC norms", "norms"])
+
+        assert list(scores) == [2.0, 1.0]
+        assert model.batches == [2, 1]
+        assert reranker.stats()["hits"] == 1
+
+    def test_cache_disabled(self):
+        model = KeywordCrossEncoder()
+        reranker = Reranker(model, cache_size=0)
+        reranker.score("kyc", [1], ["KYC"])
+        reranker.score("kyc", [1], ["KYC"])
+        assert model.batches == [1, 1]
+
+    def test_query_hash_normalizes(self):
+        assert query_hash(" KYC\n Norms") == query_hash("KYC Norms")
+        assert query_hash("KYC Norms") != query_hash("kyc norms")
+        assert query_hash("kyc") != query_hash("aml")
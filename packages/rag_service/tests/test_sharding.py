@@ -0,0 +1,113 @@
+"""
+Unit Tests for sharded indexes and scatter-gather search
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sharding import ShardedIndex, ShardedIndexBuilder, shard_of
+
+
+def make_vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def build(tmp_path, vectors: np.ndarray, shard_by: str = "chunk", index_type: str = "flat",
+          **options) -> ShardedIndex:
+    builder = ShardedIndexBuilder(16, index_type, 3, shard_by, str(tmp_path), **options)
+    filenames = [f"doc{i // 50}.pdf" for i in range(len(vectors))]
+    for start in range(0, len(vectors), 64):
+        builder.add(vectors[start:start + 64], filenames[start:start + 64])
+    return builder.finish()
+
+
+class TestShardAssignment:
+    """Test how chunks are spread over shards"""
+
+    def test_document_keeps_pdf_together(self):
+        shards = {shard_of("circular.pdf", row, 4, "document") for row in range(100)}
+        assert len(shards) == 1
+
+    def test_chunk_spreads_rows(self):
+        counts = np.bincount([shard_of("circular.pdf", row, 4, "chunk") for row in range(4000)])
+        assert counts.min() > 800
+
+
+class TestShardedSearch:
+    """Test that scatter-gather search matches one exact index"""
+
+    @pytest.mark.parametrize("shard_by", ["document", "chunk"])
+    def test_matches_single_index(self, tmp_path, shard_by):
+        vectors = make_vectors(600)
+        index = build(tmp_path, vectors, shard_by=shard_by)
+        exact = faiss.IndexFlatIP(16)
+        exact.add(vectors)
+        queries = make_vectors(20, seed=1)
+
+        distances, rows = index.search(queries, 5)
+        expected_distances, expected_rows = exact.search(queries, 5)
+
+        assert index.ntotal == 600
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+        assert not list(tmp_path.glob("*.spill"))
+
+    def test_selector_filters_global_rows(self, tmp_path):
+        vectors = make_vectors(600)
+        index = build(tmp_path, vectors)
+        mask = np.zeros(600, dtype=bool)
+        mask[100:200] = True
+
+        distances, rows = index.search(vectors[:5], 10, mask=mask)
+        exact = faiss.IndexFlatIP(16)
+        exact.add(vectors[100:200])
+        expected_distances, expected_rows = exact.search(vectors[:5], 10)
+
+        np.testing.assert_array_equal(rows, expected_rows + 100)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-5)
+
+    def test_mask_outside_every_shard(self, tmp_path):
+        index = build(tmp_path, make_vectors(600))
+        _, rows = index.search(make_vectors(2, seed=1), 5, mask=np.zeros(600, dtype=bool))
+
+        assert (rows == -1).all()
+
+    def test_round_trip(self, tmp_path):
+        vectors = make_vectors(600)
+        index = build(tmp_path, vectors, index_type="ivf-flat", nlist=2, nprobe=2)
+        index.write(str(tmp_path))
+        loaded = ShardedIndex.read(str(tmp_path))
+
+        assert loaded.ntotal == index.ntotal
+        np.testing.assert_array_equal(loaded.search(vectors[:5], 3)[1],
+                                      index.search(vectors[:5], 3)[1])
+        np.testing.assert_array_equal(loaded.search(vectors[:5], 1)[1][:, 0], np.arange(5))
+
+    def test_search_after_close(self, tmp_path):
+        vectors = make_vectors(600)
+        index = build(tmp_path, vectors)
+        expected = index.search(vectors[:5], 3)[1]
+        index.close()
+
+        np.testing.assert_array_equal(index.search(vectors[:5], 3)[1], expected)
+
+    def test_discard_removes_files(self, tmp_path):
+        builder = ShardedIndexBuilder(16, "flat", 3, "chunk", str(tmp_path),
+                                      vectors_path=str(tmp_path / "vectors.f32"))
+        builder.add(make_vectors(100), ["doc.pdf"] * 100)
+        builder.discard()
+
+        assert not list(tmp_path.iterdir())
+
+    def test_needs_two_shards(self, tmp_path):
+        with pytest.raises(ValueError):
+            ShardedIndexBuilder(16, "flat", 1, "chunk", str(tmp_path))
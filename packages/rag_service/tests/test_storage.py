@@ -0,0 +1,85 @@
+"""
+Unit Tests for scalar-quantized vector storage and exact re-scoring
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from vector_index import (
+    StreamingIndexBuilder, create_index, rescore, resolve_index_params, train_index
+)
+
+
+def make_vectors(count: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class TestQuantizedIndexes:
+    """Test fp16/int8 storage across index types"""
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf-flat"])
+    @pytest.mark.parametrize("storage", ["fp16", "int8"])
+    def test_finds_own_vectors(self, index_type, storage):
+        vectors = make_vectors(500)
+        params = resolve_index_params(index_type, len(vectors), nlist=4, nprobe=4,
+                                      storage=storage)
+        index = create_index(32, params)
+        train_index(index, vectors, params)
+        index.add(vectors)
+
+        assert params["storage"] == storage
+        _, labels = index.search(vectors[:20], 1)
+        assert (labels[:, 0] == np.arange(20)).mean() >= 0.95
+
+    def test_ivf_pq_rejects_quantized_storage(self):
+        with pytest.raises(ValueError):
+            resolve_index_params("ivf-pq", 1000, storage="int8")
+
+    def test_unknown_storage(self):
+        with pytest.raises(ValueError):
+            resolve_index_params("flat", 1000, storage="int4")
+
+
+class TestStreamingQuantized:
+    """Test streaming builds that keep full-precision vectors"""
+
+    @pytest.mark.parametrize("storage", ["fp16", "int8"])
+    def test_keeps_full_precision_vectors(self, tmp_path, storage):
+        vectors = make_vectors(300)
+        spill = tmp_path / "embeddings.spill"
+        kept = tmp_path / "vectors.f32"
+        builder = StreamingIndexBuilder(32, "flat", str(spill), vectors_path=str(kept),
+                                        storage=storage)
+        for start in range(0, len(vectors), 64):
+            builder.add(vectors[start:start + 64])
+        index = builder.finish()
+
+        assert index.ntotal == 300
+        assert not spill.exists()
+        stored = np.fromfile(kept, dtype=np.float32).reshape(-1, 32)
+        np.testing.assert_array_equal(stored, vectors)
+
+
+class TestRescore:
+    """Test exact re-scoring of quantized candidates"""
+
+    def test_reorders_by_exact_score(self):
+        vectors = make_vectors(50)
+        queries = vectors[:3]
+        candidates = np.array([[7, 0, 9], [1, -1, 4], [-1, 2, -1]], dtype=np.int64)
+
+        distances, labels = rescore(queries, candidates, vectors, 2)
+
+        np.testing.assert_array_equal(labels[:, 0], [0, 1, 2])
+        assert labels[2, 1] == -1
+        assert distances[0, 0] == pytest.approx(1.0, abs=1e-5)
+        assert distances[0, 0] >= distances[0, 1]
@@ -0,0 +1,65 @@
+"""
+Unit Tests for the streaming ingestion building blocks
+"""
+
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import ROW_BLOCK, ChunkStore, ChunkStoreWriter
+from vector_index import StreamingIndexBuilder
+
+
+def make_vectors(count: int, dim: int = 16) -> np.ndarray:
+    vectors = np.random.default_rng(0).standard_normal((count, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class TestStreamingIndexBuilder:
+    """Test building an index batch by batch"""
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf-flat"])
+    def test_labels_follow_insertion_order(self, tmp_path, index_type):
+        vectors = make_vectors(1000)
+        spill = tmp_path / "embeddings.spill"
+        builder = StreamingIndexBuilder(16, index_type, str(spill), nprobe=8)
+        for start in range(0, len(vectors), 96):
+            builder.add(vectors[start:start + 96])
+        index = builder.finish()
+
+        assert index.ntotal == builder.count == 1000
+        assert builder.params["index_type"] == index_type
+        assert not spill.exists()
+        _, labels = index.search(vectors[::50], 1)
+        np.testing.assert_array_equal(labels[:, 0], np.arange(0, 1000, 50))
+
+    def test_ivf_lists_sized_from_final_count(self, tmp_path):
+        builder = StreamingIndexBuilder(16, "ivf-flat", str(tmp_path / "spill"))
+        builder.add(make_vectors(4000))
+        builder.finish()
+
+        # nlist depends on the whole corpus, which is unknown until the end
+        assert builder.params["nlist"] == 102
+
+
+class TestStreamingWriters:
+    """Test the chunk store writer fed one chunk at a time"""
+
+    def test_chunk_store_spans_row_blocks(self, tmp_path):
+        writer = ChunkStoreWriter(str(tmp_path))
+        count = 2 * ROW_BLOCK + 5
+        for i in range(count):
+            writer.add(f"chunk {i}", f"doc{i // 1000}.pdf", 1 + i % 7, i, 0, 8)
+        assert writer.close() == count
+
+        store = ChunkStore.open(str(tmp_path))
+        assert len(store) == count
+        assert store[ROW_BLOCK]["text"] == f"chunk {ROW_BLOCK}"
+        assert store[count - 1]["filename"] == f"doc{(count - 1) // 1000}.pdf"
@@ -0,0 +1,538 @@
+"""
+FAISS index construction and search-parameter helpers
+
+Shared by ingest.py (which builds the index) and server.py (which applies
+search-time knobs). All index types use inner product on L2-normalized
+vectors, i.e. cosine similarity.
+
+Index types:
+    flat     - exact brute-force search (IndexFlatIP)
+    hnsw     - graph-based ANN (IndexHNSWFlat), tuned by efSearch
+    ivf-flat - inverted lists with full vectors (IndexIVFFlat), tuned by nprobe
+    ivf-pq   - inverted lists with product-quantized codes (IndexIVFPQ)
+
+Vector storage (flat, hnsw, ivf-flat):
+    float32  - full precision, 4 bytes per dimension
+    fp16     - half precision scalar quantizer, 2 bytes per dimension
+    int8     - 8-bit scalar quantizer trained on per-dimension ranges, 1 byte
+
+Quantized builds also keep the full-precision vectors in vectors.f32
+(row = label) so the server can re-score the top candidates exactly.
+
+A full build labels vectors 0..n-1 in chunk order. After an incremental
+update (update_index) labels are stable chunk ids instead: IVF indexes
+store them natively, flat and HNSW indexes are wrapped in IndexIDMap2.
+"""
+
+import hashlib
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import faiss
+
+
+INDEX_TYPES = ("flat", "hnsw", "ivf-flat", "ivf-pq")
+STORAGE_TYPES = ("float32", "fp16", "int8")
+SCALAR_QUANTIZERS = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# Full-precision vectors of a quantized index, memory-mapped by the server
+FULL_VECTORS_FILE = "vectors.f32"
+
+# Search-time defaults recorded in metadata when not given explicitly
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+DEFAULT_HNSW_M = 32
+DEFAULT_EF_CONSTRUCTION = 200
+DEFAULT_PQ_M = 64
+
+
+def default_nlist(num_vectors: int) -> int:
+    """Rule-of-thumb number of IVF lists (~4*sqrt(n), at least 39 points per list)"""
+    nlist = int(4 * math.sqrt(max(num_vectors, 1)))
+    return max(1, min(nlist, num_vectors // 39))
+
+
+def resolve_index_params(index_type: str, num_vectors: int,
+                         nlist: Optional[int] = None,
+                         nprobe: Optional[int] = None,
+                         hnsw_m: Optional[int] = None,
+                         ef_search: Optional[int] = None,
+                         pq_m: Optional[int] = None,
+                         train_size: int = 50000,
+                         storage: str = "float32") -> Dict[str, Any]:
+    """
+    Fill in defaults for an index configuration
+
+    Args:
+        index_type: One of INDEX_TYPES
+        num_vectors: Number of vectors the index will hold
+        nlist: IVF lists (default from corpus size)
+        nprobe: IVF lists probed per query
+        hnsw_m: HNSW graph degree
+        ef_search: HNSW search beam width
+        pq_m: PQ sub-quantizers (must divide the embedding dimension)
+        train_size: Maximum vectors sampled for training
+        storage: One of STORAGE_TYPES
+
+    Returns:
+        Dict of index parameters, suitable for storing in metadata
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type} (choose from {', '.join(INDEX_TYPES)})")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown storage: {storage} (choose from {', '.join(STORAGE_TYPES)})")
+    if index_type == "ivf-pq" and storage != "float32":
+        raise ValueError("ivf-pq already compresses vectors; use --storage float32")
+
+    params: Dict[str, Any] = {"index_type": index_type, "storage": storage}
+    if storage == "int8":
+        params["train_size"] = train_size
+    if index_type.startswith("ivf"):
+        params["nlist"] = nlist or default_nlist(num_vectors)
+        params["nprobe"] = min(nprobe or DEFAULT_NPROBE, params["nlist"])
+        params["train_size"] = train_size
+    if index_type == "ivf-pq":
+        params["pq_m"] = pq_m or DEFAULT_PQ_M
+        params["pq_nbits"] = 8
+    if index_type == "hnsw":
+        params["hnsw_m"] = hnsw_m or DEFAULT_HNSW_M
+        params["ef_construction"] = DEFAULT_EF_CONSTRUCTION
+        params["ef_search"] = ef_search or DEFAULT_EF_SEARCH
+    return params
+
+
+def create_index(dim: int, params: Dict[str, Any]) -> faiss.Index:
+    """
+    Create an empty (untrained) index for the given parameters
+
+    Args:
+        dim: Embedding dimension
+        params: Output of resolve_index_params
+
+    Returns:
+        FAISS index using inner-product similarity
+    """
+    index_type = params["index_type"]
+    qtype = SCALAR_QUANTIZERS.get(params.get("storage", "float32"))
+
+    if index_type == "flat":
+        if qtype is not None:
+            return faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexFlatIP(dim)
+
+    if index_type == "hnsw":
+        if qtype is not None:
+            index = faiss.IndexHNSWSQ(dim, qtype, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWFlat(dim, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["ef_construction"]
+        index.hnsw.efSearch = params["ef_search"]
+        return index
+
+    quantizer = faiss.IndexFlatIP(dim)
+    if index_type == "ivf-flat" and qtype is not None:
+        index = faiss.IndexIVFScalarQuantizer(
+            quantizer, dim, params["nlist"], qtype, faiss.METRIC_INNER_PRODUCT
+        )
+    elif index_type == "ivf-flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, params["nlist"], faiss.METRIC_INNER_PRODUCT)
+    else:
+        if dim % params["pq_m"] != 0:
+            raise ValueError(f"pq_m={params['pq_m']} must divide embedding dimension {dim}")
+        index = faiss.IndexIVFPQ(
+            quantizer, dim, params["nlist"], params["pq_m"], params["pq_nbits"],
+            faiss.METRIC_INNER_PRODUCT
+        )
+    index.nprobe = params["nprobe"]
+    # Keep the quantizer alive as long as the index (SWIG ownership)
+    index.own_fields = True
+    quantizer.this.disown()
+    return index
+
+
+def train_index(index: faiss.Index, embeddings: np.ndarray, params: Dict[str, Any],
+                seed: int = 1234):
+    """
+    Train an index on a random sample of the (normalized) embeddings
+
+    No-op for index types that need no training.
+    """
+    if index.is_trained:
+        return
+
+    num_vectors = embeddings.shape[0]
+    min_points = params.get("nlist", 1)
+    if params["index_type"] == "ivf-pq":
+        min_points = max(min_points, 2 ** params["pq_nbits"])
+    if num_vectors < min_points:
+        raise ValueError(
+            f"{params['index_type']} needs at least {min_points} vectors to train, "
+            f"got {num_vectors}; use --index-type flat for small corpora"
+        )
+
+    train_size = min(num_vectors, params.get("train_size", num_vectors))
+    if train_size < num_vectors:
+        rng = np.random.default_rng(seed)
+        sample = embeddings[np.sort(rng.choice(num_vectors, train_size, replace=False))]
+    else:
+        sample = embeddings
+    index.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+
+class StreamingIndexBuilder:
+    """
+    Builds an index from embedding batches as they arrive
+
+    Flat and HNSW indexes with float32 or fp16 storage take every batch
+    directly. IVF indexes need nlist (derived from the final corpus size)
+    and a training sample before the first add, as does int8 storage, so
+    their batches are spilled to a float32 file and added after training.
+    Memory stays bounded either way.
+
+    With vectors_path set every batch is spilled, and the spill file is
+    kept there as the full-precision copy of the index vectors.
+    """
+
+    def __init__(self, dim: int, index_type: str, spill_path: str,
+                 vectors_path: Optional[str] = None, **index_options):
+        """
+        Args:
+            dim: Embedding dimension
+            index_type: One of INDEX_TYPES
+            spill_path: Scratch file for embeddings (deleted or moved by finish)
+            vectors_path: Keep the full-precision vectors here (None = don't)
+            **index_options: Keyword arguments of resolve_index_params
+        """
+        self.dim = dim
+        self.index_type = index_type
+        self.index_options = index_options
+        self.spill_path = Path(spill_path)
+        self.vectors_path = Path(vectors_path) if vectors_path else None
+        self.count = 0
+        self.params: Optional[Dict[str, Any]] = None
+        self.index: Optional[faiss.Index] = None
+        self._spill = None
+        if not index_type.startswith("ivf"):
+            self.params = resolve_index_params(index_type, 0, **index_options)
+            self.index = create_index(dim, self.params)
+        if self.index is None or not self.index.is_trained or self.vectors_path is not None:
+            self._spill = open(self.spill_path, "wb")
+
+    def add(self, embeddings: np.ndarray):
+        """Add a batch of normalized embeddings (labels continue from the previous batch)"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.index is not None and self.index.is_trained:
+            self.index.add(embeddings)
+        if self._spill is not None:
+            self._spill.write(embeddings.tobytes())
+        self.count += len(embeddings)
+
+    def finish(self, add_batch: int = 65536) -> faiss.Index:
+        """
+        Complete the index (trains and fills IVF / int8 indexes from the spill file)
+
+        Returns:
+            Index holding every added vector; resolved parameters in self.params
+        """
+        if self._spill is None:
+            return self.index
+
+        self._spill.close()
+        self._spill = None
+        try:
+            if self.index is None or not self.index.is_trained:
+                vectors = np.memmap(self.spill_path, dtype=np.float32, mode="r",
+                                    shape=(self.count, self.dim))
+                if self.index is None:
+                    self.params = resolve_index_params(self.index_type, self.count,
+                                                       **self.index_options)
+                    self.index = create_index(self.dim, self.params)
+                train_index(self.index, vectors, self.params)
+                for start in range(0, self.count, add_batch):
+                    self.index.add(np.ascontiguousarray(vectors[start:start + add_batch]))
+                del vectors
+        finally:
+            if self.vectors_path is not None:
+                os.replace(self.spill_path, self.vectors_path)
+            else:
+                os.remove(self.spill_path)
+        return self.index
+
+    def discard(self):
+        """Drop everything added so far without building an index"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            os.remove(self.spill_path)
+
+
+def update_index(index: faiss.Index, params: Dict[str, Any], remove_ids: np.ndarray,
+                 embeddings: np.ndarray, ids: np.ndarray) -> faiss.Index:
+    """
+    Delete and append vectors by label (incremental ingestion)
+
+    IVF indexes are updated in place with the existing coarse quantizer.
+    A flat index is wrapped in IndexIDMap2 on its first update. HNSW graphs
+    can't delete nodes, so they are rebuilt from their stored vectors; no
+    document is re-embedded either way.
+
+    Args:
+        index: Index from a full build or an earlier update
+        params: index_params from metadata
+        remove_ids: Labels to delete
+        embeddings: Normalized vectors to add
+        ids: Labels for the added vectors (larger than any existing label)
+
+    Returns:
+        Updated index (a new object when it had to be wrapped or rebuilt)
+    """
+    remove_ids = np.ascontiguousarray(remove_ids, dtype=np.int64)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(-1, index.d)
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+
+    downcast = faiss.downcast_index(index)
+    if _as_ivf(index) is not None or (isinstance(downcast, faiss.IndexIDMap2)
+                                      and not is_hnsw(index)):
+        if len(remove_ids):
+            index.remove_ids(remove_ids)
+        if len(ids):
+            index.add_with_ids(embeddings, ids)
+        return index
+
+    labels, vectors = _labeled_vectors(index)
+    keep = ~np.isin(labels, remove_ids)
+    base = create_index(index.d, params)
+    rebuilt = faiss.IndexIDMap2(base)
+    # Keep the wrapped index alive as long as the wrapper (SWIG ownership)
+    rebuilt.own_fields = True
+    base.this.disown()
+    rebuilt.add_with_ids(np.concatenate([vectors[keep], embeddings]),
+                         np.concatenate([labels[keep], ids]))
+    return rebuilt
+
+
+def unwrap_id_map(index: faiss.Index, labels: np.ndarray) -> Optional[faiss.Index]:
+    """
+    The index inside an IndexIDMap whose ids are exactly labels, in order
+
+    update_index wraps flat and HNSW indexes in IndexIDMap2 with the chunk
+    ids in chunk store row order, so positions in the wrapped index are
+    chunk store rows. FAISS 1.7.4's IndexIDMap rejects SearchParameters
+    (filters, nprobe/efSearch overrides); the wrapped index takes them.
+
+    Args:
+        index: Index as read or returned by update_index
+        labels: Chunk id of each chunk store row
+
+    Returns:
+        Wrapped index (keeping the wrapper alive), or None if index isn't
+        ID-mapped or its ids differ from labels
+    """
+    downcast = faiss.downcast_index(index)
+    if not isinstance(downcast, faiss.IndexIDMap):
+        return None
+    if not np.array_equal(faiss.vector_to_array(downcast.id_map), labels):
+        return None
+    inner = faiss.downcast_index(downcast.index)
+    # The wrapper owns the inner index; index is the Python object owning the wrapper
+    inner.referenced_objects = [index]
+    return inner
+
+
+def is_id_mapped(index: faiss.Index) -> bool:
+    """Whether index is an IndexIDMap(2) wrapper"""
+    return isinstance(faiss.downcast_index(index), faiss.IndexIDMap)
+
+
+def _labeled_vectors(index: faiss.Index) -> Tuple[np.ndarray, np.ndarray]:
+    """(labels, vectors) of a flat or HNSW index, optionally ID-mapped"""
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, faiss.IndexIDMap2):
+        labels = faiss.vector_to_array(downcast.id_map).astype(np.int64)
+        base = faiss.downcast_index(downcast.index)
+    else:
+        labels = np.arange(index.ntotal, dtype=np.int64)
+        base = downcast
+    vectors = base.reconstruct_n(0, base.ntotal) if base.ntotal else np.zeros((0, index.d), np.float32)
+    return labels, vectors
+
+
+def rescore(queries: np.ndarray, labels: np.ndarray, vectors: np.ndarray,
+            k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact inner-product re-scoring of candidates from a quantized index
+
+    Args:
+        queries: Normalized query embeddings, shape (n, dim)
+        labels: Candidate labels from the index search, shape (n, m), -1 padded
+        vectors: Full-precision vectors indexed by label (e.g. a memmap of
+            vectors.f32)
+        k: Results to keep per query (<= m)
+
+    Returns:
+        (distances, labels) arrays of shape (n, k), best first, padded with -1
+    """
+    valid = labels >= 0
+    candidates = vectors[np.where(valid, labels, 0)]
+    scores = np.einsum("nd,nmd->nm", queries, candidates).astype(np.float32)
+    scores[~valid] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    distances = np.take_along_axis(scores, order, axis=1)
+    labels = np.take_along_axis(labels, order, axis=1)
+    return distances, np.where(np.isfinite(distances), labels, -1)
+
+
+def read_index(path: str, mmap: bool = False) -> faiss.Index:
+    """
+    Load an index from disk, optionally memory-mapped read-only
+
+    With mmap=True the vectors stay in the page cache instead of being
+    copied into private memory, so several worker processes on one host
+    share a single copy and nothing is read until it is searched. IVF
+    inverted lists are mapped by every FAISS version; flat code storage
+    (IndexFlat, HNSW storage) needs IO_FLAG_MMAP_IFC, added in faiss 1.11.
+    On older builds those parts are read normally (see mmap_shares_vectors).
+
+    Args:
+        path: Path to faiss_index.bin
+        mmap: Memory-map instead of reading into private memory
+
+    Returns:
+        FAISS index (read-only when memory-mapped)
+    """
+    if not mmap:
+        return faiss.read_index(path)
+
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    return faiss.read_index(path, flags)
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Content hash of an index file (streamed, constant memory)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mmap_supports_flat_codes() -> bool:
+    """Whether this FAISS build can memory-map flat vector storage"""
+    return hasattr(faiss, "IO_FLAG_MMAP_IFC")
+
+
+def mmap_shares_vectors(index: faiss.Index) -> bool:
+    """Whether read_index(mmap=True) leaves this index's vectors in the page cache"""
+    return mmap_supports_flat_codes() or _as_ivf(index) is not None
+
+
+def apply_search_defaults(index: faiss.Index, params: Dict[str, Any],
+                          nprobe: int = 0, ef_search: int = 0):
+    """
+    Set index-wide search knobs after loading
+
+    Args:
+        index: Loaded FAISS index
+        params: index_params from metadata
+        nprobe: Override for IVF nprobe (0 = use params)
+        ef_search: Override for HNSW efSearch (0 = use params)
+    """
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = nprobe or params.get("nprobe", DEFAULT_NPROBE)
+
+    hnsw = _as_hnsw(index)
+    if hnsw is not None:
+        hnsw.hnsw.efSearch = ef_search or params.get("ef_search", DEFAULT_EF_SEARCH)
+
+
+def make_search_params(index: faiss.Index, nprobe: Optional[int] = None,
+                       ef_search: Optional[int] = None,
+                       selector: Optional[faiss.IDSelector] = None
+                       ) -> Optional[faiss.SearchParameters]:
+    """
+    Build per-query search parameters for index.search(..., params=...)
+
+    Knobs that do not apply to the index type are ignored. With a selector,
+    vectors outside it are skipped before their distances are computed.
+    The caller must keep the selector alive until the search returns.
+
+    Returns:
+        SearchParameters object, or None to use the index defaults
+    """
+    ivf = _as_ivf(index)
+    if ivf is not None and (nprobe or selector is not None):
+        # SearchParametersIVF defaults to nprobe=1, so carry the index setting
+        params = faiss.SearchParametersIVF(nprobe=nprobe or ivf.nprobe)
+    else:
+        hnsw = _as_hnsw(index)
+        if hnsw is not None and (ef_search or selector is not None):
+            params = faiss.SearchParametersHNSW(efSearch=ef_search or hnsw.hnsw.efSearch)
+        elif selector is not None:
+            params = faiss.SearchParameters()
+        else:
+            return None
+
+    if selector is not None:
+        params.sel = selector
+    return params
+
+
+def search_subset(index: faiss.Index, queries: np.ndarray, k: int,
+                  ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact inner-product search restricted to the given ids
+
+    Costs O(len(ids)) regardless of index size. Used for small filtered
+    subsets on graph indexes, where a selective filter starves the HNSW
+    beam and loses recall.
+
+    Args:
+        index: Index that supports reconstruct (flat or HNSW storage)
+        queries: Normalized query embeddings, shape (n, dim)
+        k: Neighbours per query
+        ids: Candidate ids
+
+    Returns:
+        (distances, indices) arrays of shape (n, k), padded with -1
+    """
+    distances = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    indices = np.full((len(queries), k), -1, dtype=np.int64)
+    if len(ids) == 0:
+        return distances, indices
+
+    ids = np.asarray(ids, dtype=np.int64)
+    scores = queries @ index.reconstruct_batch(ids).T
+    top = min(k, len(ids))
+    best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    distances[:, :top] = np.take_along_axis(best_scores, order, axis=1)
+    indices[:, :top] = ids[np.take_along_axis(best, order, axis=1)]
+    return distances, indices
+
+
+def is_hnsw(index: faiss.Index) -> bool:
+    """Whether the index is an HNSW graph index"""
+    return _as_hnsw(index) is not None
+
+
+def _as_ivf(index: faiss.Index) -> Optional[faiss.IndexIVF]:
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def _as_hnsw(index: faiss.Index) -> Optional[faiss.IndexHNSW]:
+    downcast = faiss.downcast_index(index)
+    if isinstance(downcast, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        downcast = faiss.downcast_index(downcast.index)
+    return downcast if isinstance(downcast, faiss.IndexHNSW) else None